@@ -8,6 +8,7 @@ from gimpfu import (
     pdb,
     register,
     CHANNEL_OP_ADD,
+    CHANNEL_OP_REPLACE,
     RGBA_IMAGE,
     NORMAL_MODE,
     TRANSPARENT_FILL,
@@ -18,81 +19,200 @@ from gimpfu import (
     FG_TRANSPARENT_MODE,
     FG_BUCKET_FILL,
     RGB,
+    CLIP_TO_IMAGE,
+    PF_INT,
+    PF_TOGGLE,
+    PF_STRING,
+    PF_DIRNAME,
+    PF_FILE,
+    PF_IMAGE,
+    PF_DRAWABLE,
 )
 # pylint: enable=E0401
-IMAGE_WIDTH = 256
-IMAGE_HEIGHT = 256
+import json
+import math
+import os
+
+import layer_memory
+import pdb_context
+import pdb_profiler
+import png_writer
+import tux_geometry
+import tux_layers
+import tux_layout
+import tux_paths
+import tux_scene
+
+pdb = pdb_profiler.instrument(pdb)
+# Skip colour sets the context already holds (see pdb_context.py)
+pdb = pdb_context.shadow(pdb)
+
+DEFAULT_SIZE = 256
 DEFAULT_OPACITY = 100
+DEFAULT_ICON_SIZES = "16 22 24 32 48 64 128 256 512 1024"
+ICON_FILENAME = "crystal-tux-%dx%d.png"
+VARIANT_FILENAME = "crystal-tux-%s.png"
+DEFAULT_POSTER_SIZE = 8192
+DEFAULT_TILE_SIZE = 1024
+POSTER_FILENAME = "crystal-tux-poster.png"
+MEMORY_REPORT = "-"
 
 
 def get_coords_by_name(image, layer_name):
-    pdb.gimp_image_select_item(
-        image, CHANNEL_OP_ADD, pdb.gimp_image_get_layer_by_name(image, layer_name)
-    )
-    _, x_1, y_1, x_2, y_2 = pdb.gimp_selection_bounds(image)
-    pdb.gimp_selection_none(image)
-    return x_1, y_1, x_2, y_2
-
-
-def new_layer_from_vector(image, layer_name, vector_string, vector_name, layer_pos_name):
-    new_layer = gimp.Layer(
-        image, layer_name, IMAGE_WIDTH, IMAGE_HEIGHT, RGBA_IMAGE, DEFAULT_OPACITY, NORMAL_MODE
-    )
-    layer_pos = pdb.gimp_image_get_layer_position(
-        image, pdb.gimp_image_get_layer_by_name(image, layer_pos_name)
-    )
-
-    pdb.gimp_image_insert_layer(image, new_layer, None, layer_pos)
-    new_layer.fill(TRANSPARENT_FILL)
-    pdb.gimp_vectors_import_from_string(image, vector_string, -1, 1, 1)
-    new_vector = pdb.gimp_image_get_vectors_by_name(image, vector_name)
-    pdb.gimp_image_select_item(image, CHANNEL_OP_ADD, new_vector)
-    pdb.gimp_image_remove_vectors(image, new_vector)
-
-
-def fill_layer_foreground(image, layer):
-    pdb.gimp_edit_fill(layer, FOREGROUND_FILL)
-    pdb.gimp_selection_none(image)
+    # Bounds of the part's outline, computed instead of selected and measured.
+    layers = tux_layers.registry(image)
+    if layer_name in layers.mirrors:
+        source, (off_x, off_y) = layers.mirrors[layer_name]
+        bounds = tux_geometry.mirror(
+            get_coords_by_name(image, source), layers.layout("mirror_axis")
+        )
+        return tux_geometry.translate(bounds, off_x, off_y, layers.width)
+    return tux_geometry.part_bounds(layer_name, layers.width)
+
+
+def part_paths(image):
+    # The outlines on the design grid, with every mirrored part (see
+    # tux_scene.symmetric) its source flipped and moved exactly the way its
+    # layers are at this size, so selections line up with them
+    layers = tux_layers.registry(image)
+    scale = layers.layout.scale
+    axis = layers.layout("mirror_axis") / scale
+    paths = dict(tux_paths.PATHS)
+    for name, (source, (off_x, off_y)) in layers.mirrors.items():
+        if name in paths:
+            paths[name] = tux_paths.mirrored(paths[source], axis, off_x / scale, off_y / scale)
+    return paths
+
+
+def import_part_vectors(image):
+    # One import for every body part, scaled from the design grid to the image.
+    layers = tux_layers.registry(image)
+    svg = tux_paths.SVG
+    if any(name in tux_paths.PATHS for name in layers.mirrors):
+        svg = tux_paths.svg_document(paths=part_paths(image))
+    _, vectors_ids = pdb.gimp_vectors_import_from_string(image, svg, -1, False, True)
+    # The PDB hands back IDs, not paths
+    imported = [gimp.Vectors.from_id(vectors_id) for vectors_id in vectors_ids]
+    by_id = dict((vectors.name, vectors) for vectors in imported)
+    layers.vectors = dict((name, by_id[tux_paths.path_id(name)]) for name in tux_paths.PART_NAMES)
+
+
+def remove_part_vectors(image):
+    layers = tux_layers.registry(image)
+    for vectors in layers.vectors.values():
+        pdb.gimp_image_remove_vectors(image, vectors)
+    layers.vectors = {}
+
+
+def new_layer_from_vector(image, layer_name, layer_pos_name):
+    layers = tux_layers.registry(image)
+    layer_pos = layers.position(layer_pos_name)
+    part_layer = new_layer(
+        image, layer_name, DEFAULT_OPACITY, get_coords_by_name(image, layer_name), layer_pos
+    )
+    part_layer.fill(TRANSPARENT_FILL)
+    select_part(image, layer_name)
+    return part_layer
+
+
+def select_part(image, part_name):
+    # A part's outline: exactly its layer's alpha, but also where the layer
+    # was not drawn (see new_layer and draw_tux_poster)
+    pdb.gimp_image_select_item(image, CHANNEL_OP_ADD, tux_layers.registry(image).vectors[part_name])
+
+
+def select_derived(image, part_name, *operations):
+    # A part's outline changed by ``operations``, gimp_selection_* calls
+    # such as ("shrink", 2), ("translate", -42, 40) or ("invert",), in place
+    # of the selection.  Each derived selection is saved as a channel, so
+    # the same steps later in the render, or a first part of them, are
+    # selected from it instead of worked out again.
+    layers = tux_layers.registry(image)
+    selections = layers.selections
+    key = (part_name,) + operations
+    done, channel = selections.lookup(key)
+    pdb_profiler.count("selection cache hits" if done == len(key) else "selection cache misses")
+    if channel is not None:
+        pdb.gimp_image_select_item(image, CHANNEL_OP_REPLACE, channel)
+        operations = operations[done - 1 :]
+    else:
+        pdb.gimp_image_select_item(image, CHANNEL_OP_REPLACE, layers.vectors[part_name])
+    if operations:
+        for operation in operations:
+            getattr(pdb, "gimp_selection_" + operation[0])(image, *operation[1:])
+        for dropped in selections.put(key, pdb.gimp_selection_save(image)):
+            pdb.gimp_image_remove_channel(image, dropped)
+
+
+def selection_box(image):
+    # Exact bounds of the current selection, None when nothing is selected.
+    # tux_geometry.shrink only bounds a shrunk outline from outside, so
+    # blends and cuts placed from one ask GIMP instead.
+    non_empty, x_1, y_1, x_2, y_2 = pdb.gimp_selection_bounds(image)
+    return (x_1, y_1, x_2, y_2) if non_empty else None
+
+
+def remove_selections(image):
+    for channel in tux_layers.registry(image).selections.clear():
+        pdb.gimp_image_remove_channel(image, channel)
+
+
+def new_layer(image, layer_name, opacity, bounds=None, position=-1):
+    # A canvas-sized layer; in crop mode sized to ``bounds`` (what will be
+    # painted plus any blur padding) and moved into place instead.  With a
+    # window (one poster tile) only the part inside it is kept.
+    layers = tux_layers.registry(image)
+    x_1, y_1, x_2, y_2 = 0, 0, layers.width, layers.height
+    if layers.crop and bounds is not None:
+        x_1, y_1, x_2, y_2 = bounds
+    if layers.window is not None:
+        window = layers.window
+        for source, (off_x, off_y) in layers.mirrors.values():
+            if source == layer_name:
+                # Its flipped copies have to cover the window
+                moved = tux_geometry.translate(layers.window, -off_x, -off_y, layers.width)
+                moved = tux_geometry.mirror(moved, layers.layout("mirror_axis"))
+                window = tux_geometry.union(window, moved)
+        inside = tux_geometry.intersect((x_1, y_1, x_2, y_2), window)
+        # Nothing inside: a pixel off the canvas
+        x_1, y_1, x_2, y_2 = inside or (-1, -1, 0, 0)
+    layer = gimp.Layer(image, layer_name, x_2 - x_1, y_2 - y_1, RGBA_IMAGE, opacity, NORMAL_MODE)
+    layers.add(layer, position)
+    if (x_1, y_1) != (0, 0):
+        layer.set_offsets(x_1, y_1)
+    return layer
+
+
+def mirror_layer(image, layer_name, position=None):
+    # ``layer_name`` as a copy of its source layer (see tux_scene.mirrors)
+    # flipped about the mirror axis and moved by its offset; at ``position``
+    # or, by default, where tux_scene.STACK puts it
+    layers = tux_layers.registry(image)
+    source, (off_x, off_y) = layers.mirrors[layer_name]
+    layer = layers.rename(pdb.gimp_layer_copy(layers[source], True), layer_name)
+    if position is None:
+        tux_scene.stack_layer(image, layer)
+    else:
+        layers.add(layer, position)
+    axis = layers.layout("mirror_axis")
+    pdb.gimp_item_transform_flip(layer, axis, 0, axis, layers.height)
+    if (off_x, off_y) != (0, 0):
+        x_pos, y_pos = layer.offsets
+        layer.set_offsets(x_pos + off_x, y_pos + off_y)
+    return layer
 
 
-def draw_body(image):
-    body_vector_string = (
-        '<svg xmlns="http://www.w3.org/2000/svg" width="35.5556mm" height="35.5556mm" '
-        'viewBox="0 0 256 256"> <path id="B1" fill="none" stroke="black" '
-        'stroke-width="1" d="M 191.55,45.00 C 197.33,59.30 196.46,75.14 199.89,90.00 '
-        "204.25,108.93 213.75,119.91 214.00,141.00 214.42,177.06 196.44,209.60 "
-        "162.00,223.55 147.40,229.46 138.40,230.18 123.00,230.00 92.69,229.64 "
-        "61.71,207.56 49.87,180.00 43.10,164.23 42.81,154.65 43.00,138.00 43.16,124.27 "
-        "52.23,103.28 55.58,88.00 55.58,88.00 62.03,49.00 62.03,49.00 69.93,24.13 "
-        '90.87,8.08 116.00,3.44 148.33,-0.71 178.94,13.79 191.55,45.00 Z" /> </svg>'
-    )
-    pdb.gimp_context_set_foreground((0, 0, 0))
-    new_layer_from_vector(image, "Body", body_vector_string, "B1", "Background")
-    body_layer = pdb.gimp_image_get_layer_by_name(image, "Body")
-    fill_layer_foreground(image, body_layer)
+def padded(image, bounds, blur):
+    # Room around ``bounds`` for what a blur of that radius spreads out
+    return tux_geometry.grow(bounds, int(math.ceil(blur)), tux_layers.registry(image).width)
 
 
-def draw_tummy(image):
-    patch_vector_string = (
-        '<svg xmlns="http://www.w3.org/2000/svg" width="35.5556mm" height="35.5556mm" '
-        'viewBox="0 0 256 256"> <path id="B2" fill="none" stroke="black" '
-        'stroke-width="1" d="M 130.00,86.22 C 136.01,86.07 141.31,87.52 147.00,89.34 '
-        "177.72,99.19 196.95,132.65 197.00,164.00 197.00,164.00 197.00,173.00 "
-        "197.00,173.00 196.91,180.71 193.72,197.51 189.78,203.99 187.08,208.43 "
-        "181.30,212.43 177.00,215.33 163.67,224.31 150.72,228.11 135.00,230.56 "
-        "126.03,231.96 116.72,229.97 108.00,227.87 95.59,224.88 75.12,215.43 "
-        "67.65,204.99 63.10,198.63 59.04,178.01 59.00,170.00 58.82,130.69 80.26,93.97 "
-        '121.00,86.22 121.00,86.22 130.00,86.22 130.00,86.22 Z" /> </svg>'
-    )
-    pdb.gimp_context_set_foreground((208, 208, 208))
-    pdb.gimp_context_set_background((171, 171, 171))
-    new_layer_from_vector(image, "White Patch", patch_vector_string, "B2", "Body")
-    patch_layer = pdb.gimp_image_get_layer_by_name(image, "White Patch")
-    _, x_1, y_1, x_2, y_2 = pdb.gimp_selection_bounds(image)
-    x_pos = x_2 - (x_2 - x_1) / 2
+def edit_blend(layer, blend_mode, x_1, y_1, x_2, y_2):
+    # Image coordinates in; the blend itself wants them relative to the layer
+    off_x, off_y = layer.offsets
     pdb.gimp_edit_blend(
-        patch_layer,
-        FG_BG_RGB_MODE,  # Blend-Mode
+        layer,
+        blend_mode,  # Blend-Mode
         NORMAL_MODE,  # Paint Mode
         GRADIENT_LINEAR,  # Gradient Type
         100,  # Opacity
@@ -103,1206 +223,789 @@ def draw_tummy(image):
         1,  # Super sampling Max-Depth
         0,  # Super sampling Threshold
         True,  # Dither
-        x_pos,
-        y_1,  # Blend X,Y Start point
-        x_pos,
-        y_2,
+        x_1 - off_x,
+        y_1 - off_y,  # Blend X,Y Start point
+        x_2 - off_x,
+        y_2 - off_y,
     )  # Blend X,Y Endpoint
+
+
+def bucket_fill(layer, x_pos, y_pos):
+    # Foreground fill of the selection; the seed point is relative to the layer
+    off_x, off_y = layer.offsets
+    pdb.gimp_edit_bucket_fill(
+        layer, FG_BUCKET_FILL, NORMAL_MODE, 100, 255, False, x_pos - off_x, y_pos - off_y
+    )
+
+
+def add_drop_shadows(image, shadows, blur, colour=(0, 0, 0), opacity=63):
+    # What script-fu-drop-shadow draws, for several shadows sharing a blur
+    # radius, colour and opacity.  Each shadow is (name, source layer names,
+    # (off_x, off_y), layer name to go right below) and is created under its
+    # final name; the new layers are returned in the same order.
+    layers = tux_layers.registry(image)
+    pdb.gimp_context_set_foreground(colour)
+    shadow_layers = []
+    for layer_name, sources, (off_x, off_y), below in shadows:
+        bounds = None
+        for source in sources:
+            bounds = tux_geometry.union(bounds, get_coords_by_name(image, source))
+        bounds = tux_geometry.translate(bounds, off_x, off_y, layers.width)
+        shadow_layer = new_layer(
+            image, layer_name, opacity, padded(image, bounds, blur), layers.position(below) + 1
+        )
+        shadow_layer.fill(TRANSPARENT_FILL)
+        for source in sources:
+            select_part(image, source)
+        pdb.gimp_selection_translate(image, off_x, off_y)
+        pdb.gimp_edit_fill(shadow_layer, FOREGROUND_FILL)
+        pdb.gimp_selection_none(image)
+        pdb.plug_in_gauss(image, shadow_layer, blur, blur, 1)
+        shadow_layers.append(shadow_layer)
+    return shadow_layers
+
+
+def fill_layer_foreground(image, layer):
+    pdb.gimp_edit_fill(layer, FOREGROUND_FILL)
     pdb.gimp_selection_none(image)
 
 
-def draw_wing(image, side):
+def draw_background(image, node):
+    background_layer = new_layer(image, "Background", 100)
+    background_layer.fill(TRANSPARENT_FILL)
+
+
+def draw_body(image, node):
+    pdb.gimp_context_set_foreground(node.colours["fill"])
+    body_layer = new_layer_from_vector(image, "Body", "Background")
+    fill_layer_foreground(image, body_layer)
+
+
+def draw_tummy(image, node):
+    pdb.gimp_context_set_foreground(node.colours["top"])
+    pdb.gimp_context_set_background(node.colours["bottom"])
+    patch_layer = new_layer_from_vector(image, "White Patch", "Body")
+    x_1, y_1, x_2, y_2 = get_coords_by_name(image, "White Patch")
+    x_pos = x_2 - (x_2 - x_1) / 2
+    edit_blend(patch_layer, FG_BG_RGB_MODE, x_pos, y_1, x_pos, y_2)
+    pdb.gimp_selection_none(image)
+
+
+def draw_wing(image, node):
+    side = node.side
     wings = {
         "left": {
-            "vector": (
-                '<svg xmlns="http://www.w3.org/2000/svg" width="35.5556mm" '
-                'height="35.5556mm" viewBox="0 0 256 256"> <path id="B3" '
-                'fill="none" stroke="black" stroke-width="1" '
-                'd="M 58.00,93.00 C 58.00,93.00 55.61,124.00 55.61,124.00 '
-                "55.13,126.26 53.54,129.79 52.58,132.00 51.31,134.92 48.90,140.43 "
-                "46.61,142.49 44.40,144.48 37.32,146.26 34.00,147.60 34.00,147.60 "
-                "15.00,156.89 15.00,156.89 11.72,157.93 8.05,157.94 6.92,153.94 "
-                "5.37,148.45 13.61,138.72 17.09,135.00 17.09,135.00 41.96,113.00 "
-                "41.96,113.00 49.43,105.19 50.52,101.42 56.00,93.00 56.00,93.00 "
-                '58.00,93.00 58.00,93.00 Z" /> </svg>'
-            ),
             "layer_name": "Left Wing",
-            "vector_name": "B3",
         },
         "right": {
-            "vector": (
-                '<svg xmlns="http://www.w3.org/2000/svg" width="35.5556mm" '
-                'height="35.5556mm" viewBox="0 0 256 256"> <path id="B4" '
-                'fill="none" stroke="black" stroke-width="1" '
-                'd="M 208.52,106.00 C 219.42,119.86 232.48,126.15 241.19,137.00 '
-                "244.04,140.55 252.01,150.02 248.36,154.69 244.08,160.16 "
-                "229.85,150.60 225.00,148.26 225.00,148.26 207.97,141.47 "
-                "207.97,141.47 205.85,139.23 202.69,130.23 201.72,127.00 "
-                "199.18,118.57 193.18,98.92 193.00,91.00 202.89,91.59 "
-                '201.18,96.67 208.52,106.00 Z" /> </svg>'
-            ),
             "layer_name": "Right Wing",
-            "vector_name": "B4",
         },
     }
 
-    pdb.gimp_context_set_foreground((0, 0, 0))
-    new_layer_from_vector(
+    pdb.gimp_context_set_foreground(node.colours["fill"])
+    wing_layer = new_layer_from_vector(
         image,
         wings.get(side).get("layer_name"),
-        wings.get(side).get("vector"),
-        wings.get(side).get("vector_name"),
         "White Patch",
     )
-    wing_layer = pdb.gimp_image_get_layer_by_name(image, wings.get(side).get("layer_name"))
     fill_layer_foreground(image, wing_layer)
 
 
-def draw_foot(image, side):
+def draw_foot(image, node):
+    layers = tux_layers.registry(image)
+    side = node.side
     feet = {
         "left": {
-            "vector": (
-                '<svg xmlns="http://www.w3.org/2000/svg" width="35.5556mm" '
-                'height="35.5556mm" viewBox="0 0 256 256"> <path id="B5" '
-                'fill="none" stroke="black" stroke-width="1" '
-                'd="M 115.83,210.00 C 121.25,216.68 126.19,230.52 115.83,235.69 '
-                '113.03,237.18 109.23,236.99 106.00,237.00 106.00,237.00 '
-                '52.00,237.00 52.00,237.00 48.81,237.00 44.93,237.18 42.18,235.69 '
-                '32.01,230.51 36.74,216.65 42.18,210.01 51.91,198.65 63.42,197.18 '
-                '77.00,195.46 90.59,194.77 106.71,199.28 115.83,210.00 Z" /> </svg>'
-            ),
             "layer_name": "Left Foot",
-            "vector_name": "B5",
             "glow_name": "Left Foot Glow",
             "previous_layer": "Left Wing",
-            "foreground": (240, 244, 0),
-            "background": (248, 192, 0),
         },
         "right": {
-            "vector": (
-                '<svg xmlns="http://www.w3.org/2000/svg" width="35.5556mm" '
-                'height="35.5556mm" viewBox="0 0 256 256"> <path id="B6" '
-                'fill="none" stroke="black" stroke-width="1" '
-                'd="M 215.10,210.09 C 219.88,216.01 224.83,229.49 216.79,234.91 '
-                '213.46,237.16 208.84,236.99 205.00,237.00 205.00,237.00 '
-                '150.00,237.00 150.00,237.00 142.93,236.91 136.28,235.24 '
-                '135.23,227.00 134.75,223.29 136.33,219.31 137.89,216.00 '
-                '145.22,200.51 160.84,197.50 176.00,195.44 188.99,194.40 '
-                '206.72,199.71 215.10,210.09 Z" /> </svg>'
-            ),
             "layer_name": "Right Foot",
-            "vector_name": "B6",
             "glow_name": "Right Foot Glow",
             "previous_layer": "Right Wing",
-            "foreground": (248, 192, 0),
-            "background": (240, 244, 0),
         },
     }
 
-    pdb.gimp_context_set_foreground((223, 186, 0))
-    new_layer_from_vector(
+    pdb.gimp_context_set_foreground(node.colours["fill"])
+    foot_layer = new_layer_from_vector(
         image,
         feet.get(side).get("layer_name"),
-        feet.get(side).get("vector"),
-        feet.get(side).get("vector_name"),
         feet.get(side).get("previous_layer"),
     )
-    foot_layer = pdb.gimp_image_get_layer_by_name(image, feet.get(side).get("layer_name"))
     pdb.gimp_edit_fill(foot_layer, FOREGROUND_FILL)
-    pdb.gimp_selection_shrink(image, 7)
-    foot_glow_layer = gimp.Layer(
-        image,
-        feet.get(side).get("glow_name"),
-        IMAGE_WIDTH,
-        IMAGE_HEIGHT,
-        RGBA_IMAGE,
-        85,
-        NORMAL_MODE,
-    )
-    image.add_layer(foot_glow_layer, -1)
-    pdb.gimp_context_set_foreground(feet.get(side).get("foreground"))
-    pdb.gimp_context_set_background(feet.get(side).get("background"))
-    _, x_1, y_1, x_2, y_2 = pdb.gimp_selection_bounds(image)
+    pdb.gimp_selection_shrink(image, layers.layout("glow_shrink"))
+    glow = tux_geometry.shrink(
+        get_coords_by_name(image, feet.get(side).get("layer_name")),
+        layers.layout("glow_shrink"),
+    )
+    blur = layers.layout("glow_blur")
+    foot_glow_layer = new_layer(
+        image, feet.get(side).get("glow_name"), 85, padded(image, glow, blur), -1
+    )
+    pdb.gimp_context_set_foreground(node.colours["glow_foreground"])
+    pdb.gimp_context_set_background(node.colours["glow_background"])
+    x_1, y_1, x_2, y_2 = selection_box(image) or (0, 0, 0, 0)
+    inset = layers.layout("glow_blend_inset")
     y_pos = y_2 - (y_2 - y_1) / 2
-    pdb.gimp_edit_blend(
-        foot_glow_layer,
-        FG_BG_RGB_MODE,  # Blend-Mode
-        NORMAL_MODE,  # Paint Mode
-        GRADIENT_LINEAR,  # Gradient Type
-        100,  # Opacity
-        0,  # Offset
-        REPEAT_NONE,  # Repeat
-        False,  # Reverse
-        False,  # Super sampling
-        1,  # Super sampling Max-Depth
-        0,  # Super sampling Threshold
-        True,  # Dither
-        x_1 + 7,
-        y_pos,  # Blend X,Y Start point
-        x_2 - 7,
-        y_pos,
-    )  # Blend X,Y Endpoint
+    edit_blend(foot_glow_layer, FG_BG_RGB_MODE, x_1 + inset, y_pos, x_2 - inset, y_pos)
     pdb.gimp_selection_none(image)
-    pdb.plug_in_gauss(image, foot_glow_layer, 10.0, 10.0, 1)
+    pdb.plug_in_gauss(image, foot_glow_layer, blur, blur, 1)
 
 
-def draw_eyelid(image, side):
+def draw_eyelid(image, node):
+    layers = tux_layers.registry(image)
+    side = node.side
     lids = {
         "left": {
-            "vector": (
-                '<svg xmlns="http://www.w3.org/2000/svg" width="35.5556mm" '
-                'height="35.5556mm" viewBox="0 0 256 256"> <path id="B8" '
-                'fill="none" stroke="black" stroke-width="1" '
-                'd="M 133.98,61.00 C 135.28,67.44 135.50,74.50 133.98,81.00 '
-                "133.76,83.14 133.13,86.63 131.30,88.01 129.65,89.26 126.03,89.00 "
-                "124.00,89.00 124.00,89.00 83.00,89.00 83.00,89.00 80.87,89.00 "
-                "77.27,89.23 75.51,87.98 71.51,85.14 71.95,73.52 72.00,69.00 "
-                "72.19,53.54 81.19,37.24 97.00,33.47 116.78,30.70 129.34,42.19 "
-                '133.98,61.00 Z" /> </svg>'
-            ),
             "layer_name": "Left Eyelid",
-            "vector_name": "B8",
             "glow_name": "Left Eyelid Reflection",
             "previous_layer": "Left Foot",
         },
         "right": {
-            "vector": (
-                '<svg xmlns="http://www.w3.org/2000/svg" width="35.5556mm" '
-                'height="35.5556mm" viewBox="0 0 256 256"> <path id="B7" '
-                'fill="none" stroke="black" stroke-width="1" '
-                'd="M 177.00,91.00 C 177.00,91.00 131.00,91.00 131.00,91.00 '
-                "128.60,91.00 124.48,91.24 122.48,89.83 120.13,88.15 "
-                "120.08,84.61 120.01,82.00 119.83,74.96 120.80,68.38 "
-                "123.99,62.00 137.77,34.45 175.22,37.68 185.30,66.00 "
-                "188.96,76.27 187.21,80.30 187.00,90.00 182.16,90.87 "
-                '181.99,90.98 177.00,91.00 Z" /> </svg>'
-            ),
             "layer_name": "Right Eyelid",
-            "vector_name": "B7",
             "glow_name": "Right Eyelid Reflection",
             "previous_layer": "Right Foot",
         },
     }
 
-    pdb.gimp_context_set_foreground((0, 0, 0))
-    new_layer_from_vector(
+    pdb.gimp_context_set_foreground(node.colours["fill"])
+    eyelid_layer = new_layer_from_vector(
         image,
         lids.get(side).get("layer_name"),
-        lids.get(side).get("vector"),
-        lids.get(side).get("vector_name"),
         lids.get(side).get("previous_layer"),
     )
-    eyelid_layer = pdb.gimp_image_get_layer_by_name(image, lids.get(side).get("layer_name"))
     fill_layer_foreground(image, eyelid_layer)
 
     # Right Eyelid Reflection
-    pdb.gimp_context_set_foreground((255, 255, 255))
-    layer_pos = pdb.gimp_image_get_layer_position(
-        image, pdb.gimp_image_get_layer_by_name(image, lids.get(side).get("layer_name"))
-    )
+    pdb.gimp_context_set_foreground(node.colours["reflection"])
+    layer_pos = layers.position(lids.get(side).get("layer_name"))
     x_1, y_1, x_2, y_2 = get_coords_by_name(image, lids.get(side).get("layer_name"))
-    eyelid_reflection_layer = gimp.Layer(
+    blur = layers.layout("eyelid_reflection_blur")
+    eyelid_reflection_layer = new_layer(
         image,
         lids.get(side).get("glow_name"),
-        IMAGE_WIDTH,
-        IMAGE_HEIGHT,
-        RGBA_IMAGE,
         80,
-        NORMAL_MODE,
+        padded(image, (x_1, y_1, x_2, y_2), blur),
+        layer_pos,
     )
-    image.add_layer(eyelid_reflection_layer, layer_pos)
     eyelid_reflection_layer.fill(TRANSPARENT_FILL)
-    pdb.gimp_image_select_item(
-        image,
-        CHANNEL_OP_ADD,
-        pdb.gimp_image_get_layer_by_name(image, lids.get(side).get("layer_name")),
+    select_derived(
+        image, lids.get(side).get("layer_name"), ("shrink", layers.layout("reflection_shrink"))
     )
-    pdb.gimp_selection_shrink(image, 2)
     x_pos = x_2 - ((x_2 - x_1) / 2)
     y_pos = y_2 - ((y_2 - y_1) / 2)
-    pdb.gimp_edit_blend(
-        eyelid_reflection_layer,
-        FG_TRANSPARENT_MODE,  # Blend-Mode
-        NORMAL_MODE,  # Paint Mode
-        GRADIENT_LINEAR,  # Gradient Type
-        100,  # Opacity
-        0,  # Offset
-        REPEAT_NONE,  # Repeat
-        False,  # Reverse
-        False,  # Super sampling
-        1,  # Super sampling Max-Depth
-        0,  # Super sampling Threshold
-        True,  # Dither
-        x_pos,
-        y_1,  # Blend X,Y Start point
-        x_pos,
-        y_pos,
-    )  # Blend X,Y Endpoint
+    edit_blend(eyelid_reflection_layer, FG_TRANSPARENT_MODE, x_pos, y_1, x_pos, y_pos)
 
-    pdb.gimp_selection_translate(image, 0, 3)
+    pdb.gimp_selection_translate(image, *layers.layout("eyelid_reflection_cut"))
     pdb.gimp_edit_cut(eyelid_reflection_layer)
     pdb.gimp_selection_none(image)
-    pdb.plug_in_gauss(image, eyelid_reflection_layer, 2.0, 2.0, 1)
+    pdb.plug_in_gauss(image, eyelid_reflection_layer, blur, blur, 1)
 
 
-def draw_eye_reflections(image, side, eyes):
-    pdb.gimp_context_set_foreground((255, 255, 255))
-    layer_pos = pdb.gimp_image_get_layer_position(
-        image, pdb.gimp_image_get_layer_by_name(image, eyes.get(side).get("glow_name"))
-    )
-    eye_reflection_layer_top = gimp.Layer(
-        image,
-        eyes.get(side).get("reflection_top"),
-        IMAGE_WIDTH,
-        IMAGE_HEIGHT,
-        RGBA_IMAGE,
-        85,
-        NORMAL_MODE,
+def draw_eye_reflections(image, node, eyes):
+    layers = tux_layers.registry(image)
+    side = node.side
+    pdb.gimp_context_set_foreground(node.colours["reflection"])
+    layer_pos = layers.position(eyes.get(side).get("glow_name"))
+    eye = get_coords_by_name(image, eyes.get(side).get("layer_name"))
+    eye_reflection_layer_top = new_layer(
+        image, eyes.get(side).get("reflection_top"), 85, eye, layer_pos
     )
-    image.add_layer(eye_reflection_layer_top, layer_pos)
     eye_reflection_layer_top.fill(TRANSPARENT_FILL)
-    x_1, y_1, x_2, y_2 = get_coords_by_name(image, eyes.get(side).get("layer_name"))
-    pdb.gimp_image_select_item(
-        image,
-        CHANNEL_OP_ADD,
-        pdb.gimp_image_get_layer_by_name(image, eyes.get(side).get("layer_name")),
+    x_1, y_1, x_2, y_2 = eye
+    select_derived(
+        image, eyes.get(side).get("layer_name"), ("shrink", layers.layout("reflection_shrink"))
     )
-    pdb.gimp_selection_shrink(image, 2)
     x_pos = x_2 - ((x_2 - x_1) / 2)
     y_pos = y_2 - ((y_2 - y_1) / 2)
-    pdb.gimp_edit_blend(
-        eye_reflection_layer_top,
-        FG_TRANSPARENT_MODE,  # Blend-Mode
-        NORMAL_MODE,  # Paint Mode
-        GRADIENT_LINEAR,  # Gradient Type
-        100,  # Opacity
-        0,  # Offset
-        REPEAT_NONE,  # Repeat
-        False,  # Reverse
-        False,  # Super sampling
-        1,  # Super sampling Max-Depth
-        0,  # Super sampling Threshold
-        True,  # Dither
-        x_pos,
-        y_1,  # Blend X,Y Start point
-        x_pos,
-        y_pos,
-    )  # Blend X,Y Endpoint
+    edit_blend(eye_reflection_layer_top, FG_TRANSPARENT_MODE, x_pos, y_1, x_pos, y_pos)
 
-    if side == "right":
-        pdb.gimp_selection_translate(image, -11, 5)
-    else:
-        pdb.gimp_selection_translate(image, -15, 4)
+    pdb.gimp_selection_translate(image, *layers.layout("eye_reflection_top_cut", side))
     pdb.gimp_edit_cut(eye_reflection_layer_top)
-    if side == "right":
-        pdb.gimp_selection_translate(image, 15, -22)
-    else:
-        pdb.gimp_selection_translate(image, 20, -28)
+    pdb.gimp_selection_translate(image, *layers.layout("eye_reflection_top_keep", side))
     pdb.gimp_selection_invert(image)
     pdb.gimp_edit_cut(eye_reflection_layer_top)
     pdb.gimp_selection_none(image)
 
     # Reflection for Right Eye Bottom
-    layer_pos = pdb.gimp_image_get_layer_position(
-        image, pdb.gimp_image_get_layer_by_name(image, eyes.get(side).get("glow_name"))
-    )
-    eye_reflection_layer_bottom = gimp.Layer(
-        image,
-        eyes.get(side).get("reflection_bottom"),
-        IMAGE_WIDTH,
-        IMAGE_HEIGHT,
-        RGBA_IMAGE,
-        40,
-        NORMAL_MODE,
+    layer_pos = layers.position(eyes.get(side).get("glow_name"))
+    eye_reflection_layer_bottom = new_layer(
+        image, eyes.get(side).get("reflection_bottom"), 40, eye, layer_pos
     )
-    image.add_layer(eye_reflection_layer_bottom, layer_pos)
     eye_reflection_layer_bottom.fill(TRANSPARENT_FILL)
-    x_1, y_1, x_2, y_2 = get_coords_by_name(image, eyes.get(side).get("layer_name"))
-    pdb.gimp_image_select_item(
-        image,
-        CHANNEL_OP_ADD,
-        pdb.gimp_image_get_layer_by_name(image, eyes.get(side).get("layer_name")),
+    x_1, y_1, x_2, y_2 = eye
+    select_derived(
+        image, eyes.get(side).get("layer_name"), ("shrink", layers.layout("reflection_shrink"))
     )
-    pdb.gimp_selection_shrink(image, 2)
     x_pos = x_2 - ((x_2 - x_1) / 2)
     y_pos = y_2 - ((y_2 - y_1) / 2)
-    pdb.gimp_edit_blend(
-        eye_reflection_layer_bottom,
-        FG_TRANSPARENT_MODE,  # Blend-Mode
-        NORMAL_MODE,  # Paint Mode
-        GRADIENT_LINEAR,  # Gradient Type
-        100,  # Opacity
-        0,  # Offset
-        REPEAT_NONE,  # Repeat
-        False,  # Reverse
-        False,  # Super sampling
-        1,  # Super sampling Max-Depth
-        0,  # Super sampling Threshold
-        True,  # Dither
-        x_pos,
-        y_2,  # Blend X,Y Start point
-        x_pos,
-        y_pos,
-    )  # Blend X,Y Endpoint
-    if side == "right":
-        pdb.gimp_selection_translate(image, 1, -7)
-    else:
-        pdb.gimp_selection_translate(image, 8, -8)
+    edit_blend(eye_reflection_layer_bottom, FG_TRANSPARENT_MODE, x_pos, y_2, x_pos, y_pos)
+    pdb.gimp_selection_translate(image, *layers.layout("eye_reflection_bottom_cut", side))
     pdb.gimp_edit_cut(eye_reflection_layer_bottom)
     pdb.gimp_selection_none(image)
 
 
-def draw_eye(image, side):
+def draw_eye(image, node):
+    layers = tux_layers.registry(image)
+    side = node.side
     eyes = {
         "left": {
-            "vector": (
-                '<svg xmlns="http://www.w3.org/2000/svg" width="35.5556mm" '
-                'height="35.5556mm" viewBox="0 0 256 256"> <path id="B11" '
-                'fill="none" stroke="black" stroke-width="1" '
-                'd="M 109.00,101.61 C 95.35,104.58 85.47,95.43 81.72,83.00 '
-                "76.84,66.81 82.10,46.45 100.00,41.52 133.70,36.28 "
-                '137.02,95.51 109.00,101.61 Z" /> </svg>'
-            ),
             "layer_name": "Left Eye",
-            "vector_name": "B11",
             "glow_name": "Left Eye Glow",
             "reflection_top": "Left Eye Reflection Top",
             "reflection_bottom": "Left Eye Reflection Bottom",
             "previous_layer": "Left Eyelid Reflection",
         },
         "right": {
-            "vector": (
-                '<svg xmlns="http://www.w3.org/2000/svg" width="35.5556mm" '
-                'height="35.5556mm" viewBox="0 0 256 256"> <path id="B9" '
-                'fill="none" stroke="black" stroke-width="1" '
-                'd="M 172.61,61.02 C 183.29,74.38 173.57,91.60 158.00,94.53 '
-                "150.45,95.96 140.85,93.90 135.10,88.67 125.53,79.96 "
-                "125.98,65.66 136.04,57.53 139.82,54.48 143.39,53.49 "
-                '148.00,52.46 157.39,51.17 166.44,53.29 172.61,61.02 Z" /> '
-                "</svg>"
-            ),
             "layer_name": "Right Eye",
-            "vector_name": "B9",
             "glow_name": "Right Eye Glow",
             "reflection_top": "Right Eye Reflection Top",
             "reflection_bottom": "Right Eye Reflection Bottom",
             "previous_layer": "Left Eyelid Reflection",
         },
     }
-    pdb.gimp_context_set_foreground((165, 165, 165))
-    pdb.gimp_context_set_background((148, 148, 148))
-    new_layer_from_vector(
+    pdb.gimp_context_set_foreground(node.colours["top"])
+    pdb.gimp_context_set_background(node.colours["bottom"])
+    eye_layer = new_layer_from_vector(
         image,
         eyes.get(side).get("layer_name"),
-        eyes.get(side).get("vector"),
-        eyes.get(side).get("vector_name"),
         eyes.get(side).get("previous_layer"),
     )
-    eye_layer = pdb.gimp_image_get_layer_by_name(image, eyes.get(side).get("layer_name"))
-    _, x_1, y_1, x_2, y_2 = pdb.gimp_selection_bounds(image)
+    x_1, y_1, x_2, y_2 = get_coords_by_name(image, eyes.get(side).get("layer_name"))
     x_pos = x_2 - ((x_2 - x_1) / 2)
-    pdb.gimp_edit_blend(
-        eye_layer,
-        FG_BG_RGB_MODE,  # Blend-Mode
-        NORMAL_MODE,  # Paint Mode
-        GRADIENT_LINEAR,  # Gradient Type
-        100,  # Opacity
-        0,  # Offset
-        REPEAT_NONE,  # Repeat
-        False,  # Reverse
-        False,  # Super sampling
-        1,  # Super sampling Max-Depth
-        0,  # Super sampling Threshold
-        True,  # Dither
-        x_pos,
-        y_1,  # Blend X,Y Start point
-        x_pos,
-        y_2,
-    )  # Blend X,Y Endpoint
+    edit_blend(eye_layer, FG_BG_RGB_MODE, x_pos, y_1, x_pos, y_2)
 
-    pdb.gimp_selection_shrink(image, 7)
-    eye_glow_layer = gimp.Layer(
-        image,
-        eyes.get(side).get("glow_name"),
-        IMAGE_WIDTH,
-        IMAGE_HEIGHT,
-        RGBA_IMAGE,
-        85,
-        NORMAL_MODE,
+    pdb.gimp_selection_shrink(image, layers.layout("glow_shrink"))
+    glow = tux_geometry.shrink((x_1, y_1, x_2, y_2), layers.layout("glow_shrink"))
+    blur = layers.layout("glow_blur")
+    eye_glow_layer = new_layer(
+        image, eyes.get(side).get("glow_name"), 85, padded(image, glow, blur), -1
     )
-    image.add_layer(eye_glow_layer, -1)
-    pdb.gimp_context_set_foreground((222, 219, 222))
+    pdb.gimp_context_set_foreground(node.colours["glow"])
     fill_layer_foreground(image, eye_glow_layer)
-    pdb.plug_in_gauss(image, eye_glow_layer, 10.0, 10.0, 1)
+    pdb.plug_in_gauss(image, eye_glow_layer, blur, blur, 1)
 
-    draw_eye_reflections(image, side, eyes)
+    draw_eye_reflections(image, node, eyes)
 
 
-def draw_pupil(image, side):
+def draw_pupil(image, node):
+    layers = tux_layers.registry(image)
+    side = node.side
     pupils = {
         "left": {
-            "vector": (
-                '<svg xmlns="http://www.w3.org/2000/svg" width="35.5556mm" '
-                'height="35.5556mm" viewBox="0 0 256 256"> <path id="B12" '
-                'fill="none" stroke="black" stroke-width="1" d="M 120.02,84.34 '
-                "C 113.56,82.45 110.99,70.10 119.05,64.04 132.98,60.36 "
-                '131.00,87.57 120.02,84.34 Z" /> </svg>'
-            ),
             "layer_name": "Left Pupil",
-            "vector_name": "B12",
             "reflection_top": "Left Pupil Reflection Top",
             "reflection_bottom": "Left Pupil Reflection Bottom",
             "previous_layer": "Left Eye Reflection Bottom",
         },
         "right": {
-            "vector": (
-                '<svg xmlns="http://www.w3.org/2000/svg" width="35.5556mm" '
-                'height="35.5556mm" viewBox="0 0 256 256"> <path id="B10" '
-                'fill="none" stroke="black" stroke-width="1" '
-                'd="M 137.79,82.81 C 133.85,84.95 130.45,81.70 129.43,78.00 '
-                "128.10,73.18 129.25,69.10 133.11,66.07 143.33,63.59 "
-                '144.18,79.33 137.79,82.81 Z" /> </svg>'
-            ),
             "layer_name": "Right Pupil",
-            "vector_name": "B10",
             "reflection_top": "Right Pupil Reflection Top",
             "reflection_bottom": "Right Pupil Reflection Bottom",
             "previous_layer": "Right Eye Reflection Bottom",
         },
     }
 
-    pdb.gimp_context_set_foreground((0, 0, 0))
-    new_layer_from_vector(
+    pdb.gimp_context_set_foreground(node.colours["fill"])
+    pupil_layer = new_layer_from_vector(
         image,
         pupils.get(side).get("layer_name"),
-        pupils.get(side).get("vector"),
-        pupils.get(side).get("vector_name"),
         pupils.get(side).get("previous_layer"),
     )
-    pupil_layer = pdb.gimp_image_get_layer_by_name(image, pupils.get(side).get("layer_name"))
     fill_layer_foreground(image, pupil_layer)
 
     # Reflection for Right Pupil Top
-    pdb.gimp_context_set_foreground((255, 255, 255))
-    layer_pos = pdb.gimp_image_get_layer_position(image, pupil_layer)
-    pupil_reflection_layer_top = gimp.Layer(
-        image,
-        pupils.get(side).get("reflection_top"),
-        IMAGE_WIDTH,
-        IMAGE_HEIGHT,
-        RGBA_IMAGE,
-        100,
-        NORMAL_MODE,
+    pdb.gimp_context_set_foreground(node.colours["reflection"])
+    layer_pos = layers.position(pupil_layer)
+    pupil = get_coords_by_name(image, pupils.get(side).get("layer_name"))
+    pupil_reflection_layer_top = new_layer(
+        image, pupils.get(side).get("reflection_top"), 100, pupil, layer_pos
     )
-    image.add_layer(pupil_reflection_layer_top, layer_pos)
     pupil_reflection_layer_top.fill(TRANSPARENT_FILL)
-    x_1, y_1, x_2, y_2 = get_coords_by_name(image, pupils.get(side).get("layer_name"))
-    pdb.gimp_image_select_item(image, CHANNEL_OP_ADD, pupil_layer)
-    pdb.gimp_selection_shrink(image, 1)
+    x_1, y_1, x_2, y_2 = pupil
+    select_derived(
+        image,
+        pupils.get(side).get("layer_name"),
+        ("shrink", layers.layout("pupil_reflection_shrink")),
+    )
     x_pos = x_2 - ((x_2 - x_1) / 2)
-    pdb.gimp_edit_blend(
-        pupil_reflection_layer_top,
-        FG_TRANSPARENT_MODE,  # Blend-Mode
-        NORMAL_MODE,  # Paint Mode
-        GRADIENT_LINEAR,  # Gradient Type
-        100,  # Opacity
-        0,  # Offset
-        REPEAT_NONE,  # Repeat
-        False,  # Reverse
-        False,  # Super sampling
-        1,  # Super sampling Max-Depth
-        0,  # Super sampling Threshold
-        True,  # Dither
-        x_pos,
-        y_1,  # Blend X,Y Start point
-        x_pos,
-        y_2,
-    )  # Blend X,Y Endpoint
+    edit_blend(pupil_reflection_layer_top, FG_TRANSPARENT_MODE, x_pos, y_1, x_pos, y_2)
 
-    pdb.gimp_selection_translate(image, -2, 3)
+    pdb.gimp_selection_translate(image, *layers.layout("pupil_reflection_top_cut"))
     pdb.gimp_edit_cut(pupil_reflection_layer_top)
-    pdb.gimp_selection_translate(image, 4, -14)
+    pdb.gimp_selection_translate(image, *layers.layout("pupil_reflection_top_keep"))
     pdb.gimp_selection_invert(image)
     pdb.gimp_edit_cut(pupil_reflection_layer_top)
     pdb.gimp_selection_none(image)
 
     # Reflection for Right Pupil Bottom
-    layer_pos = pdb.gimp_image_get_layer_position(image, pupil_layer)
-    pupil_reflection_layer_bottom = gimp.Layer(
-        image,
-        pupils.get(side).get("reflection_bottom"),
-        IMAGE_WIDTH,
-        IMAGE_HEIGHT,
-        RGBA_IMAGE,
-        60,
-        NORMAL_MODE,
+    layer_pos = layers.position(pupil_layer)
+    pupil_reflection_layer_bottom = new_layer(
+        image, pupils.get(side).get("reflection_bottom"), 60, pupil, layer_pos
     )
-    image.add_layer(pupil_reflection_layer_bottom, layer_pos)
     pupil_reflection_layer_bottom.fill(TRANSPARENT_FILL)
-    x_1, y_1, x_2, y_2 = get_coords_by_name(image, pupils.get(side).get("layer_name"))
-    pdb.gimp_image_select_item(image, CHANNEL_OP_ADD, pupil_layer)
-    pdb.gimp_selection_shrink(image, 1)
+    x_1, y_1, x_2, y_2 = pupil
+    select_derived(
+        image,
+        pupils.get(side).get("layer_name"),
+        ("shrink", layers.layout("pupil_reflection_shrink")),
+    )
     x_pos = x_2 - ((x_2 - x_1) / 2)
-    pdb.gimp_edit_blend(
-        pupil_reflection_layer_bottom,
-        FG_TRANSPARENT_MODE,  # Blend-Mode
-        NORMAL_MODE,  # Paint Mode
-        GRADIENT_LINEAR,  # Gradient Type
-        100,  # Opacity
-        0,  # Offset
-        REPEAT_NONE,  # Repeat
-        False,  # Reverse
-        False,  # Super sampling
-        1,  # Super sampling Max-Depth
-        0,  # Super sampling Threshold
-        True,  # Dither
-        x_pos,
-        y_2,  # Blend X,Y Start point
-        x_pos,
-        y_1,
-    )  # Blend X,Y Endpoint
-    if side == "right":
-        pdb.gimp_selection_translate(image, 1, -3)
-    else:
-        pdb.gimp_selection_translate(image, 3, -1)
+    edit_blend(pupil_reflection_layer_bottom, FG_TRANSPARENT_MODE, x_pos, y_2, x_pos, y_1)
+    pdb.gimp_selection_translate(image, *layers.layout("pupil_reflection_bottom_cut", side))
     pdb.gimp_edit_cut(pupil_reflection_layer_bottom)
     pdb.gimp_selection_none(image)
 
 
-def draw_beak(image):
-    beak_vector_string = (
-        '<svg xmlns="http://www.w3.org/2000/svg" width="35.5556mm" '
-        'height="35.5556mm" viewBox="0 0 256 256"> <path id="B13" '
-        'fill="none" stroke="black" stroke-width="1" '
-        'd="M 149.50,94.10 C 152.60,100.41 140.50,112.49 '
-        "136.42,116.96 134.53,119.03 132.85,120.89 130.00,121.55 "
-        "123.60,123.04 112.18,109.70 108.33,105.00 106.61,102.90 "
-        "104.35,99.87 104.65,97.00 105.37,90.12 116.52,87.65 "
-        '122.00,86.46 129.20,85.47 145.85,86.67 149.50,94.10 Z" /> '
-        "</svg>"
-    )
-    pdb.gimp_context_set_foreground((220, 160, 14))
-    pdb.gimp_context_set_background((220, 184, 12))
-    new_layer_from_vector(image, "Beak", beak_vector_string, "B13", "Left Pupil Reflection Bottom")
-    beak_layer = pdb.gimp_image_get_layer_by_name(image, "Beak")
-    _, x_1, y_1, x_2, _ = pdb.gimp_selection_bounds(image)
-
-    pdb.gimp_edit_blend(
-        beak_layer,
-        FG_BG_RGB_MODE,  # Blend-Mode
-        NORMAL_MODE,  # Paint Mode
-        GRADIENT_LINEAR,  # Gradient Type
-        100,  # Opacity
-        0,  # Offset
-        REPEAT_NONE,  # Repeat
-        False,  # Reverse
-        False,  # Super sampling
-        1,  # Super sampling Max-Depth
-        0,  # Super sampling Threshold
-        True,  # Dither
-        x_1,
-        y_1,  # Blend X,Y Start point
-        x_2,
-        y_1,
-    )  # Blend X,Y Endpoint
-    pdb.gimp_selection_shrink(image, 7)
-    _, x_1, y_1, x_2, _ = pdb.gimp_selection_bounds(image)
-    beak_glow_layer = gimp.Layer(
-        image, "Beak Glow", IMAGE_WIDTH, IMAGE_HEIGHT, RGBA_IMAGE, 85, NORMAL_MODE
-    )
-    image.add_layer(beak_glow_layer, -1)
-    pdb.gimp_context_set_foreground((240, 244, 0))
-    pdb.gimp_context_set_background((248, 192, 0))
-    pdb.gimp_edit_blend(
-        beak_glow_layer,
-        FG_BG_RGB_MODE,  # Blend-Mode
-        NORMAL_MODE,  # Paint Mode
-        GRADIENT_LINEAR,  # Gradient Type
-        100,  # Opacity
-        0,  # Offset
-        REPEAT_NONE,  # Repeat
-        False,  # Reverse
-        False,  # Super sampling
-        1,  # Super sampling Max-Depth
-        0,  # Super sampling Threshold
-        True,  # Dither
-        x_1,
-        y_1 + 4,  # Blend X,Y Start point
-        x_2,
-        y_1 + 4,
-    )  # Blend X,Y Endpoint
+def draw_beak(image, node):
+    layers = tux_layers.registry(image)
+    pdb.gimp_context_set_foreground(node.colours["left"])
+    pdb.gimp_context_set_background(node.colours["right"])
+    beak_layer = new_layer_from_vector(image, "Beak", "Left Pupil Reflection Bottom")
+    x_1, y_1, x_2, _ = get_coords_by_name(image, "Beak")
+
+    edit_blend(beak_layer, FG_BG_RGB_MODE, x_1, y_1, x_2, y_1)
+    pdb.gimp_selection_shrink(image, layers.layout("glow_shrink"))
+    glow = tux_geometry.shrink(get_coords_by_name(image, "Beak"), layers.layout("glow_shrink"))
+    x_1, y_1, x_2, _ = selection_box(image) or (0, 0, 0, 0)
+    y_pos = y_1 + layers.layout("beak_glow_blend_drop")
+    blur = layers.layout("glow_blur")
+    beak_glow_layer = new_layer(image, "Beak Glow", 85, padded(image, glow, blur), -1)
+    pdb.gimp_context_set_foreground(node.colours["glow_foreground"])
+    pdb.gimp_context_set_background(node.colours["glow_background"])
+    edit_blend(beak_glow_layer, FG_BG_RGB_MODE, x_1, y_pos, x_2, y_pos)
     pdb.gimp_selection_none(image)
-    pdb.plug_in_gauss(image, beak_glow_layer, 10.0, 10.0, 1)
+    pdb.plug_in_gauss(image, beak_glow_layer, blur, blur, 1)
 
     pdb.gimp_selection_none(image)
 
 
-def add_beak_reflections(image):
-    pdb.gimp_context_set_foreground((255, 255, 255))
-    layer_pos = pdb.gimp_image_get_layer_position(
-        image, pdb.gimp_image_get_layer_by_name(image, "Beak Glow")
-    )
-    beak_reflection_layer_top = gimp.Layer(
-        image, "Beak Reflection Top", IMAGE_WIDTH, IMAGE_HEIGHT, RGBA_IMAGE, 100, NORMAL_MODE
-    )
-    image.add_layer(beak_reflection_layer_top, layer_pos)
+def add_beak_reflections(image, node):
+    layers = tux_layers.registry(image)
+    pdb.gimp_context_set_foreground(node.colours["reflection"])
+    layer_pos = layers.position("Beak Glow")
+    beak = get_coords_by_name(image, "Beak")
+    beak_reflection_layer_top = new_layer(image, "Beak Reflection Top", 100, beak, layer_pos)
     beak_reflection_layer_top.fill(TRANSPARENT_FILL)
-    x_1, y_1, x_2, y_2 = get_coords_by_name(image, "Beak")
-    pdb.gimp_image_select_item(
-        image, CHANNEL_OP_ADD, pdb.gimp_image_get_layer_by_name(image, "Beak")
-    )
-    pdb.gimp_selection_shrink(image, 2)
+    x_1, y_1, x_2, y_2 = beak
+    select_derived(image, "Beak", ("shrink", layers.layout("reflection_shrink")))
 
-    pdb.gimp_edit_blend(
-        beak_reflection_layer_top,
-        FG_TRANSPARENT_MODE,  # Blend-Mode
-        NORMAL_MODE,  # Paint Mode
-        GRADIENT_LINEAR,  # Gradient Type
-        100,  # Opacity
-        0,  # Offset
-        REPEAT_NONE,  # Repeat
-        False,  # Reverse
-        False,  # Super sampling
-        1,  # Super sampling Max-Depth
-        0,  # Super sampling Threshold
-        True,  # Dither
-        x_2,
-        y_1,  # Blend X,Y Start point
-        x_1,
-        y_2,
-    )  # Blend X,Y Endpoint
+    edit_blend(beak_reflection_layer_top, FG_TRANSPARENT_MODE, x_2, y_1, x_1, y_2)
     pdb.gimp_selection_none(image)
     x_1, y_1, x_2, y_2 = get_coords_by_name(image, "Right Eye")
-    pdb.gimp_image_select_item(
-        image, CHANNEL_OP_ADD, pdb.gimp_image_get_layer_by_name(image, "Right Eye")
-    )
-    pdb.gimp_selection_translate(image, -42, 40)
+    select_derived(image, "Right Eye", ("translate",) + layers.layout("beak_reflection_cut"))
     pdb.gimp_edit_cut(beak_reflection_layer_top)
     pdb.gimp_selection_none(image)
 
     # Beak Reflection Bottom
-    pdb.gimp_context_set_foreground((255, 255, 255))
-    layer_pos = pdb.gimp_image_get_layer_position(
-        image, pdb.gimp_image_get_layer_by_name(image, "Beak Glow")
-    )
-    beak_reflection_layer_bottom = gimp.Layer(
-        image, "Beak Reflection Bottom", IMAGE_WIDTH, IMAGE_HEIGHT, RGBA_IMAGE, 50, NORMAL_MODE
-    )
-    image.add_layer(beak_reflection_layer_bottom, layer_pos)
+    pdb.gimp_context_set_foreground(node.colours["reflection"])
+    layer_pos = layers.position("Beak Glow")
+    beak_reflection_layer_bottom = new_layer(image, "Beak Reflection Bottom", 50, beak, layer_pos)
     beak_reflection_layer_bottom.fill(TRANSPARENT_FILL)
-    x_1, y_1, x_2, y_2 = get_coords_by_name(image, "Beak")
-    pdb.gimp_image_select_item(
-        image, CHANNEL_OP_ADD, pdb.gimp_image_get_layer_by_name(image, "Beak")
-    )
-    pdb.gimp_selection_shrink(image, 2)
-    pdb.gimp_edit_blend(
-        beak_reflection_layer_bottom,
-        FG_TRANSPARENT_MODE,  # Blend-Mode
-        NORMAL_MODE,  # Paint Mode
-        GRADIENT_LINEAR,  # Gradient Type
-        100,  # Opacity
-        0,  # Offset
-        REPEAT_NONE,  # Repeat
-        False,  # Reverse
-        False,  # Super sampling
-        1,  # Super sampling Max-Depth
-        0,  # Super sampling Threshold
-        True,  # Dither
-        x_1,
-        y_2,  # Blend X,Y Start point
-        x_2,
-        y_1,
-    )  # Blend X,Y Endpoint
-    pdb.gimp_selection_translate(image, 4, -2)
+    x_1, y_1, x_2, y_2 = beak
+    select_derived(image, "Beak", ("shrink", layers.layout("reflection_shrink")))
+    edit_blend(beak_reflection_layer_bottom, FG_TRANSPARENT_MODE, x_1, y_2, x_2, y_1)
+    pdb.gimp_selection_translate(image, *layers.layout("beak_reflection_bottom_cut"))
     pdb.gimp_edit_cut(beak_reflection_layer_bottom)
     pdb.gimp_selection_none(image)
 
 
-def add_white_patch_reflection(image):
-    pdb.gimp_context_set_foreground((255, 255, 255))
-    layer_pos = pdb.gimp_image_get_layer_position(
-        image, pdb.gimp_image_get_layer_by_name(image, "White Patch")
+def add_white_patch_reflection(image, node):
+    layers = tux_layers.registry(image)
+    pdb.gimp_context_set_foreground(node.colours["reflection"])
+    layer_pos = layers.position("White Patch")
+    patch = get_coords_by_name(image, "White Patch")
+    white_patch_reflection_layer_top = new_layer(
+        image, "White Patch Reflection Top", 50, patch, layer_pos
     )
-    white_patch_reflection_layer_top = gimp.Layer(
-        image, "White Patch Reflection Top", IMAGE_WIDTH, IMAGE_HEIGHT, RGBA_IMAGE, 50, NORMAL_MODE
-    )
-    image.add_layer(white_patch_reflection_layer_top, layer_pos)
     white_patch_reflection_layer_top.fill(TRANSPARENT_FILL)
     x_1, foot_y_1, x_2, y_2 = get_coords_by_name(image, "Left Foot")
-    x_1, y_1, x_2, y_2 = get_coords_by_name(image, "White Patch")
+    x_1, y_1, x_2, y_2 = patch
     x_pos = x_2 - ((x_2 - x_1) / 2)
-    pdb.gimp_ellipse_select(image, x_1 + 5, y_1 - 19, 127, 165, CHANNEL_OP_ADD, False, False, 1)
-    pdb.gimp_edit_blend(
-        white_patch_reflection_layer_top,
-        FG_TRANSPARENT_MODE,  # Blend-Mode
-        NORMAL_MODE,  # Paint Mode
-        GRADIENT_LINEAR,  # Gradient Type
-        100,  # Opacity
-        0,  # Offset
-        REPEAT_NONE,  # Repeat
-        False,  # Reverse
-        False,  # Super sampling
-        1,  # Super sampling Max-Depth
-        0,  # Super sampling Threshold
-        True,  # Dither
-        x_pos,
-        y_1,  # Blend X,Y Start point
-        x_pos,
-        foot_y_1,
-    )  # Blend X,Y Endpoint
-    pdb.gimp_selection_none(image)
-    pdb.gimp_image_select_item(
-        image, CHANNEL_OP_ADD, pdb.gimp_image_get_layer_by_name(image, "White Patch")
+    off_x, off_y, width, height = layers.layout("white_patch_reflection")
+    pdb.gimp_ellipse_select(
+        image, x_1 + off_x, y_1 + off_y, width, height, CHANNEL_OP_ADD, False, False, 1
     )
-    pdb.gimp_selection_invert(image)
+    edit_blend(white_patch_reflection_layer_top, FG_TRANSPARENT_MODE, x_pos, y_1, x_pos, foot_y_1)
+    pdb.gimp_selection_none(image)
+    select_derived(image, "White Patch", ("invert",))
     pdb.gimp_edit_cut(white_patch_reflection_layer_top)
     pdb.gimp_selection_none(image)
 
     # White Patch Reflection Layer Bottom
-    pdb.gimp_context_set_foreground((255, 255, 255))
-    layer_pos = pdb.gimp_image_get_layer_position(
-        image, pdb.gimp_image_get_layer_by_name(image, "White Patch")
-    )
-    white_patch_reflection_layer_bottom = gimp.Layer(
-        image,
-        "White Patch Reflection Bottom",
-        IMAGE_WIDTH,
-        IMAGE_HEIGHT,
-        RGBA_IMAGE,
-        40,
-        NORMAL_MODE,
+    pdb.gimp_context_set_foreground(node.colours["reflection"])
+    layer_pos = layers.position("White Patch")
+    white_patch_reflection_layer_bottom = new_layer(
+        image, "White Patch Reflection Bottom", 40, patch, layer_pos
     )
-    image.add_layer(white_patch_reflection_layer_bottom, layer_pos)
     white_patch_reflection_layer_bottom.fill(TRANSPARENT_FILL)
     x_1, foot_y_1, x_2, y_2 = get_coords_by_name(image, "Left Foot")
-    x_1, y_1, x_2, y_2 = get_coords_by_name(image, "White Patch")
+    x_1, y_1, x_2, y_2 = patch
     x_pos = x_2 - ((x_2 - x_1) / 2)
-    pdb.gimp_image_select_item(
-        image, CHANNEL_OP_ADD, pdb.gimp_image_get_layer_by_name(image, "White Patch")
+    select_derived(image, "White Patch", ("shrink", layers.layout("reflection_shrink")))
+    edit_blend(
+        white_patch_reflection_layer_bottom, FG_TRANSPARENT_MODE, x_pos, y_2, x_pos, foot_y_1
     )
-    pdb.gimp_selection_shrink(image, 2)
-    pdb.gimp_edit_blend(
-        white_patch_reflection_layer_bottom,
-        FG_TRANSPARENT_MODE,  # Blend-Mode
-        NORMAL_MODE,  # Paint Mode
-        GRADIENT_LINEAR,  # Gradient Type
-        100,  # Opacity
-        0,  # Offset
-        REPEAT_NONE,  # Repeat
-        False,  # Reverse
-        False,  # Super sampling
-        1,  # Super sampling Max-Depth
-        0,  # Super sampling Threshold
-        True,  # Dither
-        x_pos,
-        y_2,  # Blend X,Y Start point
-        x_pos,
-        foot_y_1,
-    )  # Blend X,Y Endpoint
     pdb.gimp_selection_none(image)
 
 
-def add_foot_reflections(image):
-    pdb.gimp_context_set_foreground((255, 255, 255))
-    layer_pos = pdb.gimp_image_get_layer_position(
-        image, pdb.gimp_image_get_layer_by_name(image, "Left Foot Glow")
-    )
-    left_foot_reflection_layer = gimp.Layer(
-        image, "Left Foot Reflection", IMAGE_WIDTH, IMAGE_HEIGHT, RGBA_IMAGE, 100, NORMAL_MODE
-    )
-    image.add_layer(left_foot_reflection_layer, layer_pos)
-    left_foot_reflection_layer.fill(TRANSPARENT_FILL)
+def add_foot_reflections(image, node):
+    layers = tux_layers.registry(image)
+    pdb.gimp_context_set_foreground(node.colours["reflection"])
+    layer_pos = layers.position("Left Foot Glow")
     x_1, y_1, x_2, y_2 = get_coords_by_name(image, "Left Eye")
     width = y_2 - y_1
     height = x_2 - x_1
     x_pos = y_2 - ((y_2 - y_1) / 2)
     # y_pos = x_2 - ((x_2 - x_1) / 2)
+    off_x, off_y = layers.layout("foot_reflection")
+    steps = layers.layout("foot_reflection_shrink")
+    reflection = tux_geometry.shrink(
+        tux_geometry.ellipse_bounds(x_1 + off_x, y_1 + off_y, width, height, layers.width), steps
+    )
+    left_foot_reflection_layer = new_layer(
+        image, "Left Foot Reflection", 100, reflection, layer_pos
+    )
+    left_foot_reflection_layer.fill(TRANSPARENT_FILL)
     pdb.gimp_ellipse_select(
-        image, x_1 - 41, y_1 + 152, width, height, CHANNEL_OP_ADD, False, False, 1
+        image, x_1 + off_x, y_1 + off_y, width, height, CHANNEL_OP_ADD, False, False, 1
     )
-    pdb.gimp_selection_shrink(image, 5)
-    _, x_1, y_1, x_2, y_2 = pdb.gimp_selection_bounds(image)
+    pdb.gimp_selection_shrink(image, steps)
+    x_1, y_1, x_2, y_2 = selection_box(image) or (0, 0, 0, 0)
     x_pos = x_2 - ((x_2 - x_1) / 2)
-    pdb.gimp_edit_blend(
-        left_foot_reflection_layer,
-        FG_TRANSPARENT_MODE,  # Blend-Mode
-        NORMAL_MODE,  # Paint Mode
-        GRADIENT_LINEAR,  # Gradient Type
-        100,  # Opacity
-        0,  # Offset
-        REPEAT_NONE,  # Repeat
-        False,  # Reverse
-        False,  # Super sampling
-        1,  # Super sampling Max-Depth
-        0,  # Super sampling Threshold
-        True,  # Dither
-        x_pos,
-        y_1,  # Blend X,Y Start point
-        x_pos,
-        y_2,
-    )  # Blend X,Y Endpoint
+    edit_blend(left_foot_reflection_layer, FG_TRANSPARENT_MODE, x_pos, y_1, x_pos, y_2)
     pdb.gimp_selection_none(image)
 
     # Duplicate the Left Foot Reflection and flip it for the Right
-    right_foot_reflection_layer = pdb.gimp_layer_copy(left_foot_reflection_layer, True)
-    layer_pos = pdb.gimp_image_get_layer_position(
-        image, pdb.gimp_image_get_layer_by_name(image, "Right Foot Glow")
-    )
-    image.add_layer(right_foot_reflection_layer, layer_pos)
-    pdb.gimp_item_set_name(right_foot_reflection_layer, "Right Foot Reflection")
-    pdb.gimp_item_transform_flip(
-        right_foot_reflection_layer, image.width / 2, 0, image.width / 2, image.height
-    )
+    mirror_layer(image, "Right Foot Reflection", layers.position("Right Foot Glow"))
 
 
-def add_wing_reflection(image):
-    pdb.gimp_context_set_foreground((255, 255, 255))
-    layer_pos = pdb.gimp_image_get_layer_position(
-        image, pdb.gimp_image_get_layer_by_name(image, "Left Wing")
-    )
-    x_1, y_1, x_2, y_2 = get_coords_by_name(image, "Left Wing")
-    left_wing_reflection_layer_top = gimp.Layer(
-        image, "Left Wing Reflection Top", IMAGE_WIDTH, IMAGE_HEIGHT, RGBA_IMAGE, 70, NORMAL_MODE
+def add_wing_reflection(image, node):
+    layers = tux_layers.registry(image)
+    pdb.gimp_context_set_foreground(node.colours["reflection"])
+    layer_pos = layers.position("Left Wing")
+    wing = get_coords_by_name(image, "Left Wing")
+    x_1, y_1, x_2, y_2 = wing
+    left_wing_reflection_layer_top = new_layer(
+        image, "Left Wing Reflection Top", 70, wing, layer_pos
     )
-    image.add_layer(left_wing_reflection_layer_top, layer_pos)
     left_wing_reflection_layer_top.fill(TRANSPARENT_FILL)
-    pdb.gimp_image_select_item(
-        image, CHANNEL_OP_ADD, pdb.gimp_image_get_layer_by_name(image, "Left Wing")
-    )
-    pdb.gimp_selection_shrink(image, 2)
-    pdb.gimp_edit_blend(
+    select_derived(image, "Left Wing", ("shrink", layers.layout("reflection_shrink")))
+    edit_blend(
         left_wing_reflection_layer_top,
-        FG_TRANSPARENT_MODE,  # Blend-Mode
-        NORMAL_MODE,  # Paint Mode
-        GRADIENT_LINEAR,  # Gradient Type
-        100,  # Opacity
-        0,  # Offset
-        REPEAT_NONE,  # Repeat
-        False,  # Reverse
-        False,  # Super sampling
-        1,  # Super sampling Max-Depth
-        0,  # Super sampling Threshold
-        True,  # Dither
-        x_2 - (x_2 - x_1) / 2,  # Blend X Start point
-        y_2 - (y_2 - y_1) / 2,  # Blend Y Start point
+        FG_TRANSPARENT_MODE,
+        x_2 - (x_2 - x_1) / 2,
+        y_2 - (y_2 - y_1) / 2,
         x_2,
         y_2,
-    )  # Blend X,Y Endpoint
-    pdb.gimp_selection_translate(image, 3, 3)
+    )
+    pdb.gimp_selection_translate(image, *layers.layout("wing_reflection_cut"))
     pdb.gimp_edit_cut(left_wing_reflection_layer_top)
     pdb.gimp_selection_none(image)
 
     # Duplicate the Left Wing Reflection Top and flip it for the Right
-    right_wing_reflection_layer_top = pdb.gimp_layer_copy(left_wing_reflection_layer_top, True)
-    layer_pos = pdb.gimp_image_get_layer_position(
-        image, pdb.gimp_image_get_layer_by_name(image, "Right Wing")
-    )
-    image.add_layer(right_wing_reflection_layer_top, layer_pos)
-    pdb.gimp_item_set_name(right_wing_reflection_layer_top, "Right Wing Reflection Top")
-    pdb.gimp_item_transform_flip(
-        right_wing_reflection_layer_top, image.width / 2, 0, image.width / 2, image.height
-    )
+    mirror_layer(image, "Right Wing Reflection Top", layers.position("Right Wing"))
 
-    pdb.gimp_context_set_foreground((255, 255, 255))
-    layer_pos = pdb.gimp_image_get_layer_position(
-        image, pdb.gimp_image_get_layer_by_name(image, "Left Wing")
-    )
-    left_wing_reflection_layer_bottom = gimp.Layer(
-        image, "Left Wing Reflection Bottom", IMAGE_WIDTH, IMAGE_HEIGHT, RGBA_IMAGE, 70, NORMAL_MODE
+    pdb.gimp_context_set_foreground(node.colours["reflection"])
+    layer_pos = layers.position("Left Wing")
+    left_wing_reflection_layer_bottom = new_layer(
+        image, "Left Wing Reflection Bottom", 70, wing, layer_pos
     )
-    image.add_layer(left_wing_reflection_layer_bottom, layer_pos)
     left_wing_reflection_layer_bottom.fill(TRANSPARENT_FILL)
-    pdb.gimp_image_select_item(
-        image, CHANNEL_OP_ADD, pdb.gimp_image_get_layer_by_name(image, "Left Wing")
-    )
-    pdb.gimp_selection_shrink(image, 1)
-    pdb.gimp_edit_bucket_fill(
-        left_wing_reflection_layer_bottom,
-        FG_BUCKET_FILL,
-        NORMAL_MODE,
-        100,
-        255,
-        False,
-        x_1 + 2,
-        y_1 + 2,
-    )
-    pdb.gimp_selection_shrink(image, 2)
+    select_derived(image, "Left Wing", ("shrink", layers.layout("wing_reflection_bottom_shrink")))
+    seed = layers.layout("fill_seed")
+    bucket_fill(left_wing_reflection_layer_bottom, x_1 + seed, y_1 + seed)
+    pdb.gimp_selection_shrink(image, layers.layout("reflection_shrink"))
     pdb.gimp_edit_cut(left_wing_reflection_layer_bottom)
-    x_1, y_1, x_2, y_2 = get_coords_by_name(image, "Right Eye")
-    pdb.gimp_image_select_item(
-        image, CHANNEL_OP_ADD, pdb.gimp_image_get_layer_by_name(image, "Right Eye")
+    # The part kept is the eye moved from the corner of what is left of
+    # the wing and the eye together
+    x_1, y_1, x_2, y_2 = tux_geometry.union(
+        selection_box(image), get_coords_by_name(image, "Right Eye")
     )
-    pdb.gimp_selection_translate(image, x_1 - 125, y_1 + 36)
+    pdb.gimp_selection_none(image)
+    select_part(image, "Right Eye")
+    off_x, off_y = layers.layout("wing_reflection_bottom_keep")
+    pdb.gimp_selection_translate(image, x_1 + off_x, y_1 + off_y)
     pdb.gimp_selection_invert(image)
     pdb.gimp_edit_cut(left_wing_reflection_layer_bottom)
     pdb.gimp_selection_none(image)
 
-    # Duplicate the Left Wing Reflection Top and flip it for the Right
-    right_wing_reflection_layer_bottom = pdb.gimp_layer_copy(
-        left_wing_reflection_layer_bottom, True
-    )
-    layer_pos = pdb.gimp_image_get_layer_position(
-        image, pdb.gimp_image_get_layer_by_name(image, "Right Wing")
-    )
-    image.add_layer(right_wing_reflection_layer_bottom, layer_pos)
-    pdb.gimp_item_set_name(right_wing_reflection_layer_bottom, "Right Wing Reflection Bottom")
-    pdb.gimp_item_transform_flip(
-        right_wing_reflection_layer_bottom, image.width / 2, 0, image.width / 2, image.height
-    )
+    # Duplicate the Left Wing Reflection Bottom and flip it for the Right
+    mirror_layer(image, "Right Wing Reflection Bottom", layers.position("Right Wing"))
 
 
-def add_body_reflections(image):
+def add_body_reflections(image, node):
+    layers = tux_layers.registry(image)
     # Create new layer and add above the Body layer
-    pdb.gimp_context_set_foreground((255, 255, 255))
-    layer_pos = pdb.gimp_image_get_layer_position(
-        image, pdb.gimp_image_get_layer_by_name(image, "Body")
-    )
-    body_reflection_layer_top = gimp.Layer(
-        image, "Body Reflection Top", IMAGE_WIDTH, IMAGE_HEIGHT, RGBA_IMAGE, 100, NORMAL_MODE
+    pdb.gimp_context_set_foreground(node.colours["reflection"])
+    layer_pos = layers.position("Body")
+    x_1, y_1, x_2, y_2 = get_coords_by_name(image, "Right Eye")
+    off_x, off_y, width, height = layers.layout("body_reflection")
+    reflection = tux_geometry.ellipse_bounds(x_1 + off_x, y_1 + off_y, width, height, layers.width)
+    blur = layers.layout("body_reflection_blur")
+    body_reflection_layer_top = new_layer(
+        image, "Body Reflection Top", 100, padded(image, reflection, blur), layer_pos
     )
-    image.add_layer(body_reflection_layer_top, layer_pos)
     body_reflection_layer_top.fill(TRANSPARENT_FILL)
-    x_1, y_1, x_2, y_2 = get_coords_by_name(image, "Right Eye")
-    pdb.gimp_ellipse_select(image, x_1 - 59, y_1 - 47, 119, 103, CHANNEL_OP_ADD, False, False, 1)
-    _, x_1, y_1, x_2, y_2 = pdb.gimp_selection_bounds(image)
+    pdb.gimp_ellipse_select(
+        image, x_1 + off_x, y_1 + off_y, width, height, CHANNEL_OP_ADD, False, False, 1
+    )
+    x_1, y_1, x_2, y_2 = reflection
     x_pos = x_2 - ((x_2 - x_1) / 2)
-    pdb.gimp_edit_blend(
+    edit_blend(
         body_reflection_layer_top,
-        FG_TRANSPARENT_MODE,  # Blend-Mode
-        NORMAL_MODE,  # Paint Mode
-        GRADIENT_LINEAR,  # Gradient Type
-        100,  # Opacity
-        0,  # Offset
-        REPEAT_NONE,  # Repeat
-        False,  # Reverse
-        False,  # Super sampling
-        1,  # Super sampling Max-Depth
-        0,  # Super sampling Threshold
-        True,  # Dither
+        FG_TRANSPARENT_MODE,
         x_pos,
-        y_1 + 8,  # Blend X,Y Start point
+        y_1 + layers.layout("body_reflection_blend_drop"),
         x_pos,
         y_2,
-    )  # Blend X,Y Endpoint
+    )
     pdb.gimp_selection_none(image)
-    pdb.plug_in_gauss(image, body_reflection_layer_top, 2.0, 2.0, 1)
+    pdb.plug_in_gauss(image, body_reflection_layer_top, blur, blur, 1)
 
-    body_reflection_layer_bottom = gimp.Layer(
-        image, "Body Reflection Bottom", IMAGE_WIDTH, IMAGE_HEIGHT, RGBA_IMAGE, 60, NORMAL_MODE
+    body = get_coords_by_name(image, "Body")
+    body_reflection_layer_bottom = new_layer(
+        image, "Body Reflection Bottom", 60, body, layer_pos + 1
     )
-    image.add_layer(body_reflection_layer_bottom, layer_pos + 1)
     body_reflection_layer_bottom.fill(TRANSPARENT_FILL)
     _, _, _, beak_y_2 = get_coords_by_name(image, "Beak")
-    x_1, y_1, x_2, y_2 = get_coords_by_name(image, "Body")
-    pdb.gimp_image_select_item(
-        image, CHANNEL_OP_ADD, pdb.gimp_image_get_layer_by_name(image, "Body")
-    )
-    pdb.gimp_selection_shrink(image, 2)
+    x_1, y_1, x_2, y_2 = body
+    select_derived(image, "Body", ("shrink", layers.layout("reflection_shrink")))
     x_pos = x_2 - ((x_2 - x_1) / 2)
-    pdb.gimp_edit_blend(
-        body_reflection_layer_bottom,
-        FG_TRANSPARENT_MODE,  # Blend-Mode
-        NORMAL_MODE,  # Paint Mode
-        GRADIENT_LINEAR,  # Gradient Type
-        100,  # Opacity
-        0,  # Offset
-        REPEAT_NONE,  # Repeat
-        False,  # Reverse
-        False,  # Super sampling
-        1,  # Super sampling Max-Depth
-        0,  # Super sampling Threshold
-        True,  # Dither
-        x_pos,
-        y_2,  # Blend X,Y Start point
-        x_pos,
-        beak_y_2,
-    )  # Blend X,Y Endpoint
+    edit_blend(body_reflection_layer_bottom, FG_TRANSPARENT_MODE, x_pos, y_2, x_pos, beak_y_2)
     pdb.gimp_selection_none(image)
     x_1, y_1, x_2, y_2 = get_coords_by_name(image, "White Patch")
-    pdb.gimp_ellipse_select(image, x_1 - 30, y_1 - 45, 200, 160, CHANNEL_OP_ADD, False, False, 1)
+    off_x, off_y, width, height = layers.layout("body_reflection_bottom_cut")
+    pdb.gimp_ellipse_select(
+        image, x_1 + off_x, y_1 + off_y, width, height, CHANNEL_OP_ADD, False, False, 1
+    )
     pdb.gimp_edit_cut(body_reflection_layer_bottom)
     pdb.gimp_selection_none(image)
 
 
-def add_foot_body_shadow(image):
-    pdb.gimp_context_set_foreground((0, 0, 0))
+def add_foot_body_shadow(image, node):
+    layers = tux_layers.registry(image)
+    pdb.gimp_context_set_foreground(node.colours["shadow"])
     pdb.gimp_context_set_background((255, 255, 255))
 
     # Left Foot Body Shadow
-    layer_pos = pdb.gimp_image_get_layer_position(
-        image, pdb.gimp_image_get_layer_by_name(image, "Left Foot")
-    )
-    x_1, y_1, _, _ = get_coords_by_name(image, "Left Foot")
-    left_foot_body_shadow_layer = gimp.Layer(
-        image, "Left Foot Body Shadow", IMAGE_WIDTH, IMAGE_HEIGHT, RGBA_IMAGE, 30, NORMAL_MODE
+    layer_pos = layers.position("Left Foot")
+    foot = get_coords_by_name(image, "Left Foot")
+    x_1, y_1, _, _ = foot
+    blur = layers.layout("shadow_blur")
+    shadow = tux_geometry.translate(foot, *layers.layout("foot_body_shadow"), size=layers.width)
+    left_foot_body_shadow_layer = new_layer(
+        image, "Left Foot Body Shadow", 30, padded(image, shadow, blur), layer_pos + 1
     )
-    image.add_layer(left_foot_body_shadow_layer, layer_pos + 1)
     left_foot_body_shadow_layer.fill(TRANSPARENT_FILL)
-    pdb.gimp_image_select_item(
-        image, CHANNEL_OP_ADD, pdb.gimp_image_get_layer_by_name(image, "Left Foot")
-    )
-    pdb.gimp_selection_translate(image, 10, -1)
-    pdb.gimp_edit_bucket_fill(
-        left_foot_body_shadow_layer, FG_BUCKET_FILL, NORMAL_MODE, 100, 255, False, x_1 + 2, y_1 + 2
-    )
+    select_derived(image, "Left Foot", ("translate",) + layers.layout("foot_body_shadow"))
+    seed = layers.layout("fill_seed")
+    bucket_fill(left_foot_body_shadow_layer, x_1 + seed, y_1 + seed)
     pdb.gimp_selection_none(image)
-    pdb.plug_in_gauss(image, left_foot_body_shadow_layer, 15.0, 15.0, 1)
-    pdb.gimp_image_select_item(
-        image, CHANNEL_OP_ADD, pdb.gimp_image_get_layer_by_name(image, "Body")
-    )
-    pdb.gimp_selection_invert(image)
+    pdb.plug_in_gauss(image, left_foot_body_shadow_layer, blur, blur, 1)
+    select_derived(image, "Body", ("invert",))
     pdb.gimp_edit_cut(left_foot_body_shadow_layer)
     pdb.gimp_selection_none(image)
 
     # Duplicate the Left Foot Shadow for the Right Foot
-    right_foot_body_shadow_layer = pdb.gimp_layer_copy(left_foot_body_shadow_layer, True)
-    layer_pos = pdb.gimp_image_get_layer_position(
-        image, pdb.gimp_image_get_layer_by_name(image, "Right Foot")
-    )
-    image.add_layer(right_foot_body_shadow_layer, layer_pos + 1)
-    pdb.gimp_item_set_name(right_foot_body_shadow_layer, "Right Wing Reflection Bottom")
-    pdb.gimp_item_transform_flip(
-        right_foot_body_shadow_layer, image.width / 2, 0, image.width / 2, image.height
-    )
+    mirror_layer(image, "Right Foot Body Shadow", layers.position("Right Foot") + 1)
 
 
-def add_foot_shadows(image):
-    pdb.gimp_context_set_foreground((0, 0, 0))
+def add_foot_shadows(image, node):
+    layers = tux_layers.registry(image)
+    pdb.gimp_context_set_foreground(node.colours["shadow"])
     pdb.gimp_context_set_background((255, 255, 255))
 
     # Left On Foot Shadow
-    layer_pos = pdb.gimp_image_get_layer_position(
-        image, pdb.gimp_image_get_layer_by_name(image, "Left Foot Reflection")
-    )
-    left_on_foot_shadow_layer = gimp.Layer(
-        image, "On Left Foot Shadow", IMAGE_WIDTH, IMAGE_HEIGHT, RGBA_IMAGE, 20, NORMAL_MODE
-    )
-    image.add_layer(left_on_foot_shadow_layer, layer_pos)
-    pdb.gimp_image_select_item(
-        image, CHANNEL_OP_ADD, pdb.gimp_image_get_layer_by_name(image, "Left Foot")
-    )
-    pdb.gimp_selection_grow(image, 5)
-    _, x_1, y_1, _, _ = pdb.gimp_selection_bounds(image)
-    pdb.gimp_edit_bucket_fill(
-        left_on_foot_shadow_layer, FG_BUCKET_FILL, NORMAL_MODE, 100, 255, False, x_1 + 2, y_1 + 2
-    )
-    pdb.gimp_selection_translate(image, -20, 5)
+    layer_pos = layers.position("Left Foot Reflection")
+    steps = layers.layout("foot_shadow_grow")
+    shadow = tux_geometry.grow(get_coords_by_name(image, "Left Foot"), steps, layers.width)
+    blur = layers.layout("shadow_blur")
+    left_on_foot_shadow_layer = new_layer(
+        image, "On Left Foot Shadow", 20, padded(image, shadow, blur), layer_pos
+    )
+    select_derived(image, "Left Foot", ("grow", steps))
+    x_1, y_1, _, _ = shadow
+    seed = layers.layout("fill_seed")
+    bucket_fill(left_on_foot_shadow_layer, x_1 + seed, y_1 + seed)
+    pdb.gimp_selection_translate(image, *layers.layout("foot_shadow_cut"))
     pdb.gimp_edit_cut(left_on_foot_shadow_layer)
     pdb.gimp_selection_none(image)
-    pdb.plug_in_gauss(image, left_on_foot_shadow_layer, 15.0, 15.0, 1)
-    pdb.gimp_image_select_item(
-        image, CHANNEL_OP_ADD, pdb.gimp_image_get_layer_by_name(image, "Left Foot")
-    )
-    pdb.gimp_selection_invert(image)
+    pdb.plug_in_gauss(image, left_on_foot_shadow_layer, blur, blur, 1)
+    select_derived(image, "Left Foot", ("invert",))
     pdb.gimp_edit_cut(left_on_foot_shadow_layer)
     pdb.gimp_selection_none(image)
 
     # Duplicate the Left On Foot Shadow for the Right Foot
-    right_on_foot_shadow_layer = pdb.gimp_layer_copy(left_on_foot_shadow_layer, True)
-    layer_pos = pdb.gimp_image_get_layer_position(
-        image, pdb.gimp_image_get_layer_by_name(image, "Right Foot Reflection")
-    )
-    image.add_layer(right_on_foot_shadow_layer, layer_pos)
-    pdb.gimp_item_set_name(right_on_foot_shadow_layer, "On Right Foot Shadow")
-    pdb.gimp_item_transform_flip(
-        right_on_foot_shadow_layer, image.width / 2, 0, image.width / 2, image.height
-    )
+    mirror_layer(image, "On Right Foot Shadow", layers.position("Right Foot Reflection"))
 
 
-def add_other_shadows(image):
-    pdb.gimp_context_set_foreground((0, 0, 0))
+def add_other_shadows(image, node):
+    layers = tux_layers.registry(image)
     pdb.gimp_context_set_background((255, 255, 255))
+    blur = layers.layout("drop_shadow_blur")
 
-    # Beak Drop Shadow
-    pdb.script_fu_drop_shadow(
-        image, pdb.gimp_image_get_layer_by_name(image, "Beak"), 2, 8, 15, (0, 0, 0), 63, False
-    )
-    shadow_layer = pdb.gimp_image_get_layer_by_name(image, "Drop Shadow")
-    pdb.gimp_item_set_name(shadow_layer, "Beak Drop Shadow")
-
-    # Left Eye Drop Shadow
-    pdb.script_fu_drop_shadow(
-        image, pdb.gimp_image_get_layer_by_name(image, "Left Eye"), 4, 4, 15, (0, 0, 0), 63, False
-    )
-    shadow_layer = pdb.gimp_image_get_layer_by_name(image, "Drop Shadow")
-    pdb.gimp_item_set_name(shadow_layer, "Left Eye Drop Shadow")
-    pdb.gimp_image_select_item(
-        image, CHANNEL_OP_ADD, pdb.gimp_image_get_layer_by_name(image, "Beak")
-    )
-    pdb.gimp_edit_cut(shadow_layer)
-    pdb.gimp_selection_none(image)
-
-    # Right Eye Drop Shadow
-    pdb.script_fu_drop_shadow(
-        image, pdb.gimp_image_get_layer_by_name(image, "Right Eye"), 4, 4, 15, (0, 0, 0), 63, False
-    )
-    shadow_layer = pdb.gimp_image_get_layer_by_name(image, "Drop Shadow")
-    pdb.gimp_item_set_name(shadow_layer, "Right Eye Drop Shadow")
-    pdb.gimp_image_select_item(
-        image, CHANNEL_OP_ADD, pdb.gimp_image_get_layer_by_name(image, "Beak")
-    )
-    pdb.gimp_edit_cut(shadow_layer)
-    pdb.gimp_selection_none(image)
+    # Beak and Eye Drop Shadows, each right below its part
+    eye_offset = layers.layout("eye_drop_shadow")
+    shadows = add_drop_shadows(
+        image,
+        [
+            ("Beak Drop Shadow", ["Beak"], layers.layout("beak_drop_shadow"), "Beak"),
+            ("Left Eye Drop Shadow", ["Left Eye"], eye_offset, "Left Eye"),
+            ("Right Eye Drop Shadow", ["Right Eye"], eye_offset, "Right Eye"),
+        ],
+        blur,
+        node.colours["shadow"],
+    )
+    for shadow_layer in shadows[1:]:
+        select_part(image, "Beak")
+        pdb.gimp_edit_cut(shadow_layer)
+        pdb.gimp_selection_none(image)
 
     # Tux Drop Shadow
-    pdb.gimp_image_select_item(
-        image, CHANNEL_OP_ADD, pdb.gimp_image_get_layer_by_name(image, "Body")
-    )
-    pdb.gimp_image_select_item(
-        image, CHANNEL_OP_ADD, pdb.gimp_image_get_layer_by_name(image, "Left Foot")
-    )
-    pdb.gimp_image_select_item(
-        image, CHANNEL_OP_ADD, pdb.gimp_image_get_layer_by_name(image, "Right Foot")
-    )
-    pdb.script_fu_drop_shadow(
-        image, pdb.gimp_image_get_layer_by_name(image, "Background"), 2, 8, 15, (0, 0, 0), 63, False
+    add_drop_shadows(
+        image,
+        [
+            (
+                "Drop Shadow",
+                ["Body", "Left Foot", "Right Foot"],
+                layers.layout("tux_drop_shadow"),
+                "Background",
+            ),
+        ],
+        blur,
+        node.colours["shadow"],
     )
-    pdb.gimp_selection_none(image)
 
 
-def draw_tux():
-    # Save User's Settings
-    pdb.gimp_context_push()
-
-    # Create the image canvas set PPI to 72
-    image = gimp.Image(IMAGE_WIDTH, IMAGE_HEIGHT, RGB)
+def new_tux_image(size, crop=False, window=None, nodes=None):
+    # Create the image canvas set PPI to 72; every stage scales to its size
+    image = gimp.Image(size, size, RGB)
     pdb.gimp_image_set_resolution(image, 72.0, 72.0)
 
     # Disable undo
     pdb.gimp_image_undo_disable(image)
+    layers = tux_layers.registry(image)
+    layers.crop = crop
+    layers.window = window
+    layers.mirrors = tux_scene.mirrors(nodes, layers.layout)
+    import_part_vectors(image)
+    return image
+
+
+STAGES = dict(
+    (stage.__name__, stage)
+    for stage in [
+        draw_background,
+        draw_body,
+        draw_tummy,
+        draw_wing,
+        draw_foot,
+        draw_eyelid,
+        draw_eye,
+        draw_pupil,
+        draw_beak,
+        add_body_reflections,
+        add_beak_reflections,
+        add_white_patch_reflection,
+        add_foot_reflections,
+        add_wing_reflection,
+        add_foot_body_shadow,
+        add_foot_shadows,
+        add_other_shadows,
+    ]
+)
+
+
+def mirror_node(image, node):
+    # The right node of a symmetric stage (tux_scene.symmetric): its
+    # layers are the left node's, flipped
+    for layer_name, _ in node.mirror[1]:
+        mirror_layer(image, layer_name)
 
-    # Background Layer
-    background_layer = gimp.Layer(
-        image, "Background", IMAGE_WIDTH, IMAGE_HEIGHT, RGBA_IMAGE, 100, NORMAL_MODE
-    )
-    pdb.gimp_image_insert_layer(image, background_layer, None, -1)
-    background_layer.fill(TRANSPARENT_FILL)
 
-    # Draw the main body parts
-    draw_body(image)
-    draw_tummy(image)
-    for side in ["left", "right"]:
-        draw_wing(image, side)
-        draw_foot(image, side)
-        draw_eyelid(image, side)
-        draw_eye(image, side)
-        draw_pupil(image, side)
-    draw_beak(image)
-    add_body_reflections(image)
-    add_beak_reflections(image)
-    add_white_patch_reflection(image)
-    add_foot_reflections(image)
-    add_wing_reflection(image)
-    add_foot_body_shadow(image)
-    add_foot_shadows(image)
-    add_other_shadows(image)
+def draw_node(image, node):
+    if node.mirror is not None:
+        mirror_node(image, node)
+    else:
+        STAGES[node.stage](image, node)
+
+
+def reuse_from(previous):
+    # Copies a node's layers from ``previous`` when it drew them from the
+    # same inputs (see tux_scene.node_keys) instead of drawing them again
+    keys = tux_scene.RENDERED.get(previous.ID, {})
+    by_name = dict((layer.name, layer) for layer in previous.layers)
+
+    def reuse(image, node, key):
+        if keys.get(node.name) != key or any(name not in by_name for name in node.produces):
+            return False
+        layers = tux_layers.registry(image)
+        for name in node.produces:
+            layer = pdb.gimp_layer_new_from_drawable(by_name[name], image)
+            tux_scene.stack_layer(image, layers.rename(layer, name))
+        return True
+
+    return reuse
+
+
+def restack(image):
+    # Layers reused next to newly drawn ones can end up out of order
+    layers = tux_layers.registry(image)
+    names = [name for name in tux_scene.STACK if name in layers]
+    for position, name in enumerate(names):
+        if layers.order[position].name != name:
+            pdb.gimp_image_reorder_item(image, layers[name], None, position)
+            layers.order.remove(layers[name])
+            layers.order.insert(position, layers[name])
+
+
+def draw_tux_image(
+    size=DEFAULT_SIZE, crop=False, nodes=None, previous=None, cache=None, window=None
+):
+    # ``nodes`` is a variant of tux_scene.SCENE; only the stages whose
+    # inputs differ from the ``previous`` image or the tux_scene.LayerCache
+    # ``cache`` are drawn again.  With a ``window`` the layers only hold
+    # what lies inside it.
+    image = new_tux_image(size, crop, window, nodes)
+    layers = tux_layers.registry(image)
+
+    # Draw every part, reflection and shadow in dependency order; stand-ins
+    # that can move layers between processes draw independent ones at once
+    tux_scene.execute(
+        image,
+        draw_node,
+        nodes,
+        new_image=lambda: new_tux_image(size, crop, window, nodes),
+        processes=getattr(gimp, "processes", 1),
+        gimp=gimp,
+        reuse=reuse_from(previous) if previous is not None else None,
+        cache=cache,
+    )
+    if previous is not None or cache is not None:
+        restack(image)
 
     # change to the background layer before finishing.
-    active_layer = pdb.gimp_image_get_layer_by_name(image, "Background")
+    active_layer = layers["Background"]
     pdb.gimp_image_set_active_layer(image, active_layer)
+    remove_selections(image)
+    remove_part_vectors(image)
+    tux_layers.release(image)
 
     # Re-Enable The Undo option
     pdb.gimp_image_undo_enable(image)
+    return image
+
+
+@pdb_profiler.entry_point
+def draw_tux(size=DEFAULT_SIZE, crop=False, symmetric=False):
+    # Save User's Settings
+    pdb.gimp_context_push()
+
+    # Symmetric: the paired parts are drawn once and flipped for the right
+    nodes = tux_scene.symmetric(tux_scene.SCENE) if symmetric else None
+    image = draw_tux_image(size, crop, nodes)
 
     # Restore the User's Settings
     pdb.gimp_context_pop()
@@ -1312,6 +1015,130 @@ def draw_tux():
     gimp.displays_flush()
 
 
+@pdb_profiler.entry_point
+def report_tux_memory(image, _drawable, filename):
+    # What each layer of an open image costs; "-" for stderr, .json for JSON.
+    layer_memory.emit(image, filename)
+
+
+@pdb_profiler.entry_point
+def draw_tux_memory(size, crop, symmetric, filename):
+    # The same for a fresh Crystal Tux, drawn as draw_tux would, without a display.
+    pdb.gimp_context_push()
+    nodes = tux_scene.symmetric(tux_scene.SCENE) if symmetric else None
+    image = draw_tux_image(size, crop, nodes)
+    layer_memory.emit(image, filename)
+    pdb.gimp_image_delete(image)
+    pdb.gimp_context_pop()
+
+
+def parse_icon_sizes(sizes):
+    return sorted(set(int(size) for size in sizes.replace(",", " ").split()))
+
+
+@pdb_profiler.entry_point
+def draw_tux_icons(sizes, output_dir):
+    # Render every size natively and save it flattened; no displays.
+    pdb.gimp_context_push()
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+
+    for size in parse_icon_sizes(sizes):
+        # Layers are merged right away, so size them to their content
+        icon = draw_tux_image(size, crop=True)
+        pdb.gimp_image_merge_visible_layers(icon, CLIP_TO_IMAGE)
+        filename = os.path.join(output_dir, ICON_FILENAME % (size, size))
+        pdb.file_png_save_defaults(icon, icon.layers[0], filename, filename)
+        pdb.gimp_image_delete(icon)
+
+    pdb.gimp_context_pop()
+
+
+def load_palettes(path):
+    # {"name": {"draw_beak": {"left": [r, g, b], ...}, ...}, ...}, see tux_scene.SCENE
+    with open(path) as palettes:
+        return sorted(json.load(palettes).items())
+
+
+@pdb_profiler.entry_point
+def draw_tux_variants(palettes, size, output_dir):
+    # One flattened PNG per palette. The layers are only drawn for the base
+    # image and for the recoloured stages; the NumPy stand-in composites
+    # every palette from those in one pass, GIMP redraws the recoloured
+    # stages per palette and copies everything else.
+    pdb.gimp_context_push()
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+
+    palettes = load_palettes(palettes)
+    variants = [tux_scene.apply_palette(tux_scene.SCENE, palette) for _, palette in palettes]
+    if getattr(gimp, "numpy_pixels", False):
+        import tux_variants
+
+        batch = tux_variants.Variants(variants)
+        images = []
+        for scene in batch.scenes():
+            images.append(draw_tux_image(size, True, scene, images[0] if images else None))
+        batch.add(images)
+        for image in images:
+            pdb.gimp_image_delete(image)
+        outputs = (tux_variants.to_image(gimp, pixels) for pixels in batch.pixels())
+    else:
+        base = draw_tux_image(size, True)
+        outputs = (draw_tux_image(size, True, variant, base) for variant in variants)
+
+    for (name, _), image in zip(palettes, outputs):
+        pdb.gimp_image_merge_visible_layers(image, CLIP_TO_IMAGE)
+        filename = os.path.join(output_dir, VARIANT_FILENAME % name)
+        pdb.file_png_save_defaults(image, image.layers[0], filename, filename)
+        pdb.gimp_image_delete(image)
+    if not getattr(gimp, "numpy_pixels", False):
+        pdb.gimp_image_delete(base)
+
+    pdb.gimp_context_pop()
+
+
+def draw_tux_tile(size, tile, halo):
+    # Straight RGBA bytes of one tile of a size x size Crystal Tux: every
+    # layer is drawn only inside the tile and the ``halo`` around it that
+    # the blurs spread in from, then cropped to the tile and merged.
+    x_1, y_1, x_2, y_2 = tile
+    image = draw_tux_image(size, True, window=tux_geometry.grow(tile, halo, size))
+    pdb.gimp_image_crop(image, x_2 - x_1, y_2 - y_1, x_1, y_1)
+    merged = pdb.gimp_image_merge_visible_layers(image, CLIP_TO_IMAGE)
+    pixels = merged.get_pixel_rgn(0, 0, merged.width, merged.height, False, False)
+    data = pixels[0 : merged.width, 0 : merged.height]
+    pdb.gimp_image_delete(image)
+    return data
+
+
+@pdb_profiler.entry_point
+def draw_tux_poster(size, tile_size, filename):
+    # A size x size PNG drawn tile by tile: only one tile's layers and one
+    # row of finished tiles are held at a time, whatever the size.
+    pdb.gimp_context_push()
+    gimp.progress_init("Crystal Tux poster")
+
+    # Twice the widest blur: GIMP's IIR blur reaches a little past its radius
+    halo = 2 * tux_layout.Layout(size).blur_extent()
+    starts = range(0, size, tile_size)
+    done = 0
+    with png_writer.PNGWriter(filename, size, size) as writer:
+        for y_1 in starts:
+            y_2 = min(y_1 + tile_size, size)
+            band = []
+            for x_1 in starts:
+                x_2 = min(x_1 + tile_size, size)
+                band.append((draw_tux_tile(size, (x_1, y_1, x_2, y_2), halo), (x_2 - x_1) * 4))
+                done += 1
+                gimp.progress_update(float(done) / len(starts) ** 2)
+            # The tiles' rows side by side
+            for y_pos in range(y_2 - y_1):
+                writer.write(b"".join(data[y_pos * row : (y_pos + 1) * row] for data, row in band))
+
+    pdb.gimp_context_pop()
+
+
 register(
     "python_fu_G2_Tux",  # Name
     "Create Crystal Tux G2",  # Blurb
@@ -1327,4 +1154,116 @@ register(
     menu="<Image>/File/Create",
 )  # Menu Location
 
+register(
+    "python_fu_G2_Tux_custom",  # Name
+    "Create Crystal Tux G2 at any size",  # Blurb
+    "Create Crystal Tux G2 at any size, optionally with cropped layers or a mirrored right side",
+    "Mike Watters",  # Author
+    "Mile Watters",  # Copyright
+    "2018",  # Date
+    "Crystal Tux G2 (custom)...",  # Menu Name
+    "",  # Image Types "" for new
+    [
+        (PF_INT, "size", "Size (px)", DEFAULT_SIZE),
+        (PF_TOGGLE, "crop", "Crop layers to their content", False),
+        (PF_TOGGLE, "symmetric", "Draw the right side as the mirrored left", False),
+    ],  # User Inputs
+    [],  # Results
+    draw_tux,  # Function
+    menu="<Image>/File/Create",
+)  # Menu Location
+
+register(
+    "python_fu_G2_Tux_icons",  # Name
+    "Export Crystal Tux G2 icons",  # Blurb
+    "Render Crystal Tux G2 at every size and export a PNG per size, without displays",  # Help
+    "Mike Watters",  # Author
+    "Mile Watters",  # Copyright
+    "2018",  # Date
+    "",  # Menu Name, none: batch only
+    "",  # Image Types "" for new
+    [
+        (PF_STRING, "sizes", "Sizes (px)", DEFAULT_ICON_SIZES),
+        (PF_DIRNAME, "output_dir", "Output folder", os.getcwd()),
+    ],  # User Inputs
+    [],  # Results
+    draw_tux_icons,  # Function
+)
+
+
+register(
+    "python_fu_G2_Tux_variants",  # Name
+    "Export Crystal Tux G2 colour variants",  # Blurb
+    "Render Crystal Tux G2 once and export a PNG per palette of a JSON file, without displays",
+    "Mike Watters",  # Author
+    "Mile Watters",  # Copyright
+    "2018",  # Date
+    "",  # Menu Name, none: batch only
+    "",  # Image Types "" for new
+    [
+        (PF_FILE, "palettes", "Palettes (JSON)", ""),
+        (PF_INT, "size", "Size (px)", DEFAULT_SIZE),
+        (PF_DIRNAME, "output_dir", "Output folder", os.getcwd()),
+    ],  # User Inputs
+    [],  # Results
+    draw_tux_variants,  # Function
+)
+
+register(
+    "python_fu_G2_Tux_poster",  # Name
+    "Export a poster-size Crystal Tux G2",  # Blurb
+    "Render Crystal Tux G2 tile by tile straight into a PNG, for sizes too large to hold",
+    "Mike Watters",  # Author
+    "Mile Watters",  # Copyright
+    "2018",  # Date
+    "",  # Menu Name, none: batch only
+    "",  # Image Types "" for new
+    [
+        (PF_INT, "size", "Size (px)", DEFAULT_POSTER_SIZE),
+        (PF_INT, "tile_size", "Tile size (px)", DEFAULT_TILE_SIZE),
+        (PF_STRING, "filename", "PNG file", os.path.join(os.getcwd(), POSTER_FILENAME)),
+    ],  # User Inputs
+    [],  # Results
+    draw_tux_poster,  # Function
+)
+
+register(
+    "python_fu_G2_Tux_memory_report",  # Name
+    "Report the memory of each layer",  # Blurb
+    "List every layer with its size, bytes per pixel, bytes and visible share, and flag "
+    "mostly empty full-canvas layers",  # Help
+    "Mike Watters",  # Author
+    "Mile Watters",  # Copyright
+    "2018",  # Date
+    "Layer memory report...",  # Menu Name
+    "*",  # Image Types
+    [
+        (PF_IMAGE, "image", "Image", None),
+        (PF_DRAWABLE, "drawable", "Drawable", None),
+        (PF_STRING, "filename", "Report file (- for stderr, .json for JSON)", MEMORY_REPORT),
+    ],  # User Inputs
+    [],  # Results
+    report_tux_memory,  # Function
+    menu="<Image>/Image",
+)  # Menu Location
+
+register(
+    "python_fu_G2_Tux_memory",  # Name
+    "Report the layer memory of Crystal Tux G2",  # Blurb
+    "Render Crystal Tux G2 without a display and report the memory of each of its layers",
+    "Mike Watters",  # Author
+    "Mile Watters",  # Copyright
+    "2018",  # Date
+    "",  # Menu Name, none: batch only
+    "",  # Image Types "" for new
+    [
+        (PF_INT, "size", "Size (px)", DEFAULT_SIZE),
+        (PF_TOGGLE, "crop", "Crop layers to their content", False),
+        (PF_TOGGLE, "symmetric", "Draw the right side as the mirrored left", False),
+        (PF_STRING, "filename", "Report file (- for stderr, .json for JSON)", MEMORY_REPORT),
+    ],  # User Inputs
+    [],  # Results
+    draw_tux_memory,  # Function
+)
+
 main()
@@ -12,7 +12,15 @@
     '''
 
 from gimpfu import *
+import pdb_context
+import pdb_profiler
 
+# Time every PDB call when GIMP_PDB_PROFILE is set (see pdb_profiler.py)
+pdb = pdb_profiler.instrument(pdb)
+# Skip colour sets the context already holds (see pdb_context.py)
+pdb = pdb_context.shadow(pdb)
+
+@pdb_profiler.entry_point
 def generate_ball(size, ball, font):
     '''Generate the Ball'''
     # Double the size for the width
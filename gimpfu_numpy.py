@@ -0,0 +1,1035 @@
+# vim: expandtab:ts=4:sw=4
+# pylint: disable=C0103,R0201,R0913,W0401,W0614,W0212
+''' gimpfu_numpy.py
+
+    A NumPy stand-in for ``gimpfu`` that actually paints, so the Crystal
+    Tux recipe renders without GIMP.  It extends gimpfu_recorder.py: the
+    layer stack, vectors and registrations work the same, and layers get
+    an RGBA pixel array and the image a selection mask on top.
+
+    Modelled primitives, the ones Crystal_Tux.py uses: filled Bezier
+    paths (gimp_image_select_item on imported vectors), ellipse and
+    rectangle selections, alpha to selection, selection shrink / grow /
+    translate / invert, saved selections, foreground and bucket fills, linear blends in
+    FG_BG_RGB_MODE and FG_TRANSPARENT_MODE, edit clear / cut, Gaussian
+    blur, flips, layer copies, script_fu_drop_shadow, image crops, merging
+    and flattening, and reading and writing pixel regions; and graph_paper.py's
+    1-pixel pencil lines, drawn one by one or as a stroked path.
+    Everything composites in NORMAL mode on sRGB values like
+    GIMP's legacy layer modes.  Other procedures are only recorded.
+
+    Pixels are float32 premultiplied RGBA in 0..1, selections float32
+    coverage in 0..1 (None when nothing is selected, which like in GIMP
+    means "everything" to the painting procedures).
+
+    Usage:
+        python gimpfu_numpy.py Crystal_Tux.py [proc] [args] [--output tux]
+    writes tux.ora (every layer, opens in GIMP) and tux.png (flattened)
+    for each image the procedure displays.  --mask-cache DIR keeps filled
+    paths, shrunk / grown selections and blurs on disk (mask_cache.py).
+'''
+
+from __future__ import print_function
+
+import math
+import os
+import struct
+import sys
+import zipfile
+import zlib
+from xml.sax.saxutils import quoteattr
+
+import numpy as np
+
+import gimpfu_recorder
+from gimpfu_recorder import *
+
+# Sub-rows per pixel row when filling paths; columns are covered exactly.
+PATH_SAMPLES = 4
+# Line segments each cubic segment is flattened to on a 256 px canvas.
+CURVE_STEPS = 16
+
+DISPLAYED = []
+
+# A mask_cache.MaskCache for rasterized masks and blurs, see use_mask_cache
+MASK_CACHE = None
+
+
+def use_mask_cache(root, max_bytes=None):
+    ''' Keep rasterized masks and blurs in ``root`` across runs. '''
+    global MASK_CACHE
+    import mask_cache
+
+    MASK_CACHE = mask_cache.MaskCache(root, max_bytes or mask_cache.MAX_BYTES)
+    return MASK_CACHE
+
+
+def cached(size, compute, *inputs):
+    ''' compute(), through MASK_CACHE when there is one; the result must
+        only depend on ``inputs`` and must not be modified.  The inputs are
+        what the result is made from, such as the Image.mask_key or
+        Layer.key of an operand, not the operand's pixels.
+    '''
+    if MASK_CACHE is None:
+        return compute()
+    return MASK_CACHE.cached(size, compute, *inputs)
+
+
+def _colour(value):
+    ''' An RGB triple in 0..1 from GIMP's 0..255 ints or 0..1 floats. '''
+    value = tuple(value)[:3]
+    if any(isinstance(channel, int) for channel in value) or max(value) > 1.0:
+        return np.array(value, np.float32) / 255.0
+    return np.array(value, np.float32)
+
+
+def to_rgba8(pixels):
+    ''' Straight 8-bit RGBA from premultiplied float pixels. '''
+    alpha = pixels[..., 3:4]
+    rgb = np.where(alpha > 0, pixels[..., :3] / np.maximum(alpha, 1e-12), 0.0)
+    straight = np.concatenate([rgb, alpha], axis=-1)
+    return (np.clip(straight, 0.0, 1.0) * 255.0 + 0.5).astype(np.uint8)
+
+
+def png_bytes(rgba8):
+    ''' Encode an (height, width, 4) uint8 array as an RGBA PNG. '''
+    height, width = rgba8.shape[:2]
+    raw = np.zeros((height, width * 4 + 1), np.uint8)  # filter byte 0 per row
+    raw[:, 1:] = rgba8.reshape(height, width * 4)
+
+    def chunk(tag, data):
+        return (struct.pack(">I", len(data)) + tag + data
+                + struct.pack(">I", zlib.crc32(tag + data) & 0xffffffff))
+
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw.tobytes(), 6))
+            + chunk(b"IEND", b""))
+
+
+def write_png(path, rgba8):
+    with open(path, "wb") as stream:
+        stream.write(png_bytes(rgba8))
+
+
+# Rasterizing
+
+def flatten_path(points, steps=CURVE_STEPS):
+    ''' Polygon (n, 2) of a flat "M x y C ..." point list. '''
+    points = np.asarray(points, np.float64)
+    start = points[:2]
+    segments = points[2:].reshape(-1, 3, 2)
+    if not len(segments):
+        return start.reshape(1, 2)
+    starts = np.vstack([start, segments[:-1, 2]])
+    t = np.linspace(0.0, 1.0, steps + 1)[1:][None, :, None]
+    u = 1.0 - t
+    curve = (u * u * u * starts[:, None] + 3 * u * u * t * segments[:, None, 0]
+             + 3 * u * t * t * segments[:, None, 1] + t * t * t * segments[:, None, 2])
+    return np.vstack([start[None], curve.reshape(-1, 2)])
+
+
+def fill_polygons(polygons, width, height, samples=PATH_SAMPLES):
+    ''' Anti-aliased coverage of closed polygons, non-zero winding.
+
+        Each edge adds its winding direction where it crosses a sample
+        row, split between the two pixels around the crossing; a running
+        sum along the row then gives the winding number per pixel.
+    '''
+    x_0 = np.concatenate([polygon[:, 0] for polygon in polygons])
+    y_0 = np.concatenate([polygon[:, 1] for polygon in polygons])
+    x_1 = np.concatenate([np.roll(polygon[:, 0], -1) for polygon in polygons])
+    y_1 = np.concatenate([np.roll(polygon[:, 1], -1) for polygon in polygons])
+    keep = y_0 != y_1
+    x_0, y_0, x_1, y_1 = x_0[keep], y_0[keep], x_1[keep], y_1[keep]
+    mask = np.zeros((height, width), np.float32)
+    # Sample row k sits at y = (k + 0.5) / samples; an edge owns [low, high).
+    first = np.clip(np.ceil(np.minimum(y_0, y_1) * samples - 0.5), 0, height * samples)
+    last = np.clip(np.ceil(np.maximum(y_0, y_1) * samples - 0.5), 0, height * samples)
+    counts = (last - first).astype(np.int64)
+    if not counts.sum():
+        return mask
+    # Only the pixel rows the polygons span are accumulated.
+    top = int(first[counts > 0].min()) // samples
+    bottom = -(-int(last[counts > 0].max()) // samples)
+    rows = (bottom - top) * samples
+    first = first.astype(np.int64) - top * samples
+    edges = np.repeat(np.arange(len(counts)), counts)
+    row = first[edges] + np.arange(len(edges)) - np.repeat(np.cumsum(counts) - counts, counts)
+    y_pos = (row + top * samples + 0.5) / samples
+    x_pos = x_0[edges] + (y_pos - y_0[edges]) * (
+        (x_1[edges] - x_0[edges]) / (y_1[edges] - y_0[edges]))
+    direction = np.where(y_1[edges] > y_0[edges], 1.0, -1.0)
+    x_pos = np.clip(x_pos, 0.0, width)
+    column = np.floor(x_pos).astype(np.int64)
+    fraction = x_pos - column
+    stride = width + 2
+    index = row * stride + column
+    winding = np.bincount(index, direction * (1.0 - fraction), rows * stride)
+    winding += np.bincount(index + 1, direction * fraction, rows * stride)
+    winding = np.cumsum(winding.reshape(rows, stride), axis=1)[:, :width]
+    coverage = np.minimum(np.abs(winding), 1.0).reshape(bottom - top, samples, width)
+    mask[top:bottom] = coverage.mean(axis=1)
+    return mask
+
+
+def polygons_window(polygons, width, height):
+    ''' Row and column slices of the canvas fill_polygons can cover. '''
+    points = np.concatenate(polygons)
+    x_1, y_1 = np.floor(points.min(axis=0)).astype(int)
+    x_2, y_2 = np.ceil(points.max(axis=0)).astype(int)
+    x_1, y_1 = max(x_1, 0), max(y_1, 0)
+    x_2, y_2 = min(x_2, width), min(y_2, height)
+    if x_2 <= x_1 or y_2 <= y_1:
+        return None
+    return slice(y_1, y_2), slice(x_1, x_2)
+
+
+def ellipse_mask(width, height, x_pos, y_pos, ellipse_width, ellipse_height, antialias):
+    samples = PATH_SAMPLES if antialias else 1
+    offsets = (np.arange(samples) + 0.5) / samples
+    mask = np.zeros((height, width), np.float32)
+    # Only the ellipse's box is sampled
+    x_1, x_2 = max(int(math.floor(x_pos)), 0), min(int(math.ceil(x_pos + ellipse_width)), width)
+    y_1, y_2 = max(int(math.floor(y_pos)), 0), min(int(math.ceil(y_pos + ellipse_height)), height)
+    if x_2 <= x_1 or y_2 <= y_1:
+        return mask
+    x_s = ((np.arange(x_1, x_2)[:, None] + offsets[None, :]).ravel() - x_pos) / ellipse_width
+    y_s = ((np.arange(y_1, y_2)[:, None] + offsets[None, :]).ravel() - y_pos) / ellipse_height
+    inside = ((2 * x_s[None, :] - 1) ** 2 + (2 * y_s[:, None] - 1) ** 2) <= 1.0
+    inside = inside.reshape(y_2 - y_1, samples, x_2 - x_1, samples)
+    mask[y_1:y_2, x_1:x_2] = inside.mean(axis=(1, 3))
+    return mask
+
+
+def morph(mask, steps, operation, key=None):
+    ''' Erode (np.minimum) or dilate (np.maximum) ``mask`` by ``steps``
+        pixels, alternating 3x3 cross and square steps: an octagon close
+        to the disc GIMP uses.  Outside the canvas counts as unselected.
+        With the mask's ``key`` (Image.mask_key) the part around the
+        selection goes through MASK_CACHE.
+    '''
+    steps = int(steps)
+    window = _bbox(mask)
+    if steps <= 0 or window is None:
+        return mask
+    if operation is np.maximum:
+        rows, columns = window
+        window = (slice(max(rows.start - steps, 0), min(rows.stop + steps, mask.shape[0])),
+                  slice(max(columns.start - steps, 0), min(columns.stop + steps, mask.shape[1])))
+    compute = lambda: _morph(mask[window], steps, operation)
+    result = np.zeros_like(mask)
+    if key is None:
+        result[window] = compute()
+    else:
+        result[window] = cached(mask.shape[::-1], compute, "morph", key, steps,
+                                operation.__name__)
+    return result
+
+
+def _morph(window, steps, operation):
+    for step in range(steps):
+        padded = np.pad(window, 1, "constant")
+        window = operation(padded[1:-1, 1:-1], padded[:-2, 1:-1])
+        for neighbour in (padded[2:, 1:-1], padded[1:-1, :-2], padded[1:-1, 2:]):
+            window = operation(window, neighbour)
+        if step % 2:
+            for neighbour in (padded[:-2, :-2], padded[:-2, 2:], padded[2:, :-2],
+                              padded[2:, 2:]):
+                window = operation(window, neighbour)
+    return window
+
+
+def shift(array, off_x, off_y):
+    ''' ``array`` moved by whole pixels, zeros shifted in. '''
+    off_x, off_y = int(round(off_x)), int(round(off_y))
+    height, width = array.shape[:2]
+    result = np.zeros_like(array)
+    if abs(off_x) >= width or abs(off_y) >= height:
+        return result
+    result[max(off_y, 0):height + min(off_y, 0), max(off_x, 0):width + min(off_x, 0)] = \
+        array[max(-off_y, 0):height + min(-off_y, 0), max(-off_x, 0):width + min(-off_x, 0)]
+    return result
+
+
+def resample(array, height, width):
+    ''' ``array`` scaled to ``height`` x ``width`` by nearest neighbour. '''
+    rows = np.minimum((np.arange(height) + 0.5) * array.shape[0] // height,
+                      array.shape[0] - 1).astype(int)
+    columns = np.minimum((np.arange(width) + 0.5) * array.shape[1] // width,
+                         array.shape[1] - 1).astype(int)
+    return array[rows][:, columns]
+
+
+def gauss_kernel(radius):
+    # Same radius to standard deviation mapping as GIMP's plug_in_gauss
+    std_dev = math.sqrt(-(radius * radius) / (2 * math.log(1.0 / 255.0)))
+    half = int(math.ceil(radius))
+    kernel = np.exp(-np.arange(-half, half + 1) ** 2 / (2.0 * std_dev * std_dev))
+    return kernel / kernel.sum()
+
+
+def _convolve(array, kernel, axis):
+    size, half = array.shape[axis], len(kernel) // 2
+    length = size + len(kernel) - 1
+    shape = [1] * array.ndim
+    shape[axis] = length // 2 + 1
+    spectrum = np.fft.rfft(array, length, axis=axis) * np.fft.rfft(kernel, length).reshape(shape)
+    result = np.fft.irfft(spectrum, length, axis=axis)
+    return np.take(result, np.arange(half, half + size), axis=axis).astype(np.float32)
+
+
+def gauss(pixels, horizontal, vertical, key=None):
+    ''' Blur premultiplied pixels, only around what is painted; through
+        MASK_CACHE when the pixels' ``key`` (Layer.key) is known.
+    '''
+    ys, xs = np.nonzero(pixels[..., 3] > 0)
+    if not len(ys):
+        return pixels
+    pad_x, pad_y = int(math.ceil(horizontal)), int(math.ceil(vertical))
+    y_1, y_2 = max(ys.min() - pad_y, 0), min(ys.max() + 1 + pad_y, pixels.shape[0])
+    x_1, x_2 = max(xs.min() - pad_x, 0), min(xs.max() + 1 + pad_x, pixels.shape[1])
+    window = pixels[y_1:y_2, x_1:x_2]
+    compute = lambda: _gauss_window(window, horizontal, vertical)
+    result = pixels.copy()
+    if key is None:
+        result[y_1:y_2, x_1:x_2] = compute()
+    else:
+        result[y_1:y_2, x_1:x_2] = cached(pixels.shape[1::-1], compute, "gauss", key,
+                                          float(horizontal), float(vertical))
+    return result
+
+
+def _gauss_window(window, horizontal, vertical):
+    if horizontal > 0:
+        window = _convolve(window, gauss_kernel(horizontal), 1)
+    if vertical > 0:
+        window = _convolve(window, gauss_kernel(vertical), 0)
+    return np.clip(window, 0.0, 1.0)
+
+
+def _bbox(mask):
+    ''' Row and column slices around the non-zero part of ``mask``. '''
+    rows, columns = np.nonzero(mask.any(axis=1))[0], np.nonzero(mask.any(axis=0))[0]
+    if not len(rows):
+        return None
+    return slice(rows[0], rows[-1] + 1), slice(columns[0], columns[-1] + 1)
+
+
+def _overlap(layer, width, height):
+    ''' Slices of the layer and of the canvas where the two overlap. '''
+    off_x, off_y = layer.offsets
+    x_1, y_1 = max(off_x, 0), max(off_y, 0)
+    x_2, y_2 = min(off_x + layer.width, width), min(off_y + layer.height, height)
+    if x_2 <= x_1 or y_2 <= y_1:
+        return None, None
+    return ((slice(y_1 - off_y, y_2 - off_y), slice(x_1 - off_x, x_2 - off_x)),
+            (slice(y_1, y_2), slice(x_1, x_2)))
+
+
+def composite(image, layers=None, background=None):
+    ''' Layers (top first, visible layers of ``image`` by default) composited
+        over ``background``, as premultiplied (height, width, 4) pixels.
+    '''
+    result = np.zeros((image.height, image.width, 4), np.float32)
+    if background is not None:
+        result[...] = np.append(_colour(background), 1.0)
+    for layer in reversed(image.layers if layers is None else layers):
+        pixels = getattr(layer, "pixels", None)
+        if pixels is None or not getattr(layer, "visible", True):
+            continue
+        source, target = _overlap(layer, image.width, image.height)
+        if source is None:
+            continue
+        painted = pixels[source] * (layer.opacity / 100.0)
+        result[target] = painted + result[target] * (1.0 - painted[..., 3:4])
+    return result
+
+
+# Images and layers
+
+class Layer(gimpfu_recorder.Layer):
+    ''' A recorder layer with premultiplied RGBA ``pixels``, and ``key``:
+        the operations that painted them, for MASK_CACHE, or None when
+        they are not known.
+    '''
+
+    def __init__(self, image, name, width, height, layer_type=RGBA_IMAGE,
+                 opacity=100, mode=NORMAL_MODE):
+        gimpfu_recorder.Layer.__init__(self, image, name, width, height, layer_type,
+                                       opacity, mode)
+        self.visible = True
+        self.pixels = np.zeros((self.height, self.width, 4), np.float32)
+        self.key = ("new", self.width, self.height)
+
+    def fill(self, fill_type):
+        gimpfu_recorder.Layer.fill(self, fill_type)
+        pdb._fill(self, fill_type, False)
+
+    def copy(self):
+        duplicate = Layer(self.image, self.name + " copy", self.width, self.height,
+                          self.type, self.opacity, self.mode)
+        duplicate.offsets = self.offsets
+        duplicate.content = self.content
+        duplicate.pixels = self.pixels.copy()
+        duplicate.key = self.key
+        return duplicate
+
+    def get_pixel_rgn(self, x_pos, y_pos, width, height, dirty=True, shadow=False):
+        return PixelRgn(self, x_pos, y_pos, width, height, dirty, shadow)
+
+
+class PixelRgn(gimpfu_recorder.PixelRgn):
+    ''' Reads and writes straight 8-bit bytes, like GIMP's for an 8-bit
+        image: RGB(A), grey (and alpha) or colormap indices (and alpha).
+    '''
+
+    def _read(self, x_1, y_1, x_2, y_2):
+        rgba8 = to_rgba8(self.drawable.pixels[y_1:y_2, x_1:x_2])
+        if self.drawable.type in (GRAY_IMAGE, GRAYA_IMAGE):
+            rgba8 = rgba8[..., [0, 3]]
+        elif self.drawable.type in (INDEXED_IMAGE, INDEXEDA_IMAGE):
+            colormap = self.drawable.image.colormap * 255.0
+            distance = ((rgba8[..., None, :3] - colormap) ** 2).sum(axis=-1)
+            rgba8 = np.stack([distance.argmin(axis=-1), rgba8[..., 3]], axis=-1).astype(np.uint8)
+        return rgba8[..., :self.bpp].tobytes()
+
+    def _write(self, x_1, y_1, x_2, y_2, data):
+        raw = np.frombuffer(data, np.uint8).reshape(y_2 - y_1, x_2 - x_1, self.bpp)
+        values = raw.astype(np.float32) / 255.0
+        alpha = values[..., -1:] if self.bpp in (2, 4) else np.ones_like(values[..., :1])
+        if self.drawable.type in (GRAY_IMAGE, GRAYA_IMAGE):
+            colour = np.repeat(values[..., :1], 3, axis=-1)
+        elif self.drawable.type in (INDEXED_IMAGE, INDEXEDA_IMAGE):
+            colour = self.drawable.image.colormap[raw[..., 0]]
+        else:
+            colour = values[..., :3]
+        self.drawable.pixels[y_1:y_2, x_1:x_2] = np.concatenate([colour * alpha, alpha], axis=-1)
+        self.drawable.key = None
+
+
+class Image(gimpfu_recorder.Image):
+    ''' A recorder image with a selection ``mask``, and ``mask_key``: how
+        the selection was made, for MASK_CACHE; () for none, None when it
+        is not known.
+    '''
+
+    def __init__(self, width, height, base_type=RGB):
+        gimpfu_recorder.Image.__init__(self, width, height, base_type)
+        self.mask = None
+        self.mask_key = ()
+        # (n, 3) colours in 0..1 of an INDEXED image
+        self.colormap = None
+
+    def layer_window(self, layer, canvas):
+        ''' The part of a canvas-sized (height, width) array under ``layer``. '''
+        window = np.zeros((layer.height, layer.width), np.float32)
+        source, target = _overlap(layer, self.width, self.height)
+        if source is not None:
+            window[source] = canvas[target]
+        return window
+
+    def layer_alpha(self, layer):
+        ''' The layer's alpha on the canvas. '''
+        alpha = np.zeros((self.height, self.width), np.float32)
+        source, target = _overlap(layer, self.width, self.height)
+        if source is not None:
+            alpha[target] = layer.pixels[source][..., 3]
+        return alpha
+
+    def coverage(self, layer):
+        ''' How much of each pixel of ``layer`` the selection lets through. '''
+        if self.mask is None or not self.mask.any():
+            return np.ones((layer.height, layer.width), np.float32)
+        return self.layer_window(layer, self.mask)
+
+
+class NumpyPDB(gimpfu_recorder.RecordingPDB):
+    ''' ``pdb`` stand-in that paints on Layer.pixels as well as recording. '''
+
+    def __init__(self):
+        self.foreground = _colour((0, 0, 0))
+        self.background = _colour((255, 255, 255))
+        self.context_stack = []
+
+    # Context
+    def _gimp_context_set_foreground(self, colour):
+        self.foreground = _colour(colour)
+
+    def _gimp_context_set_background(self, colour):
+        self.background = _colour(colour)
+
+    def _gimp_context_get_foreground(self):
+        return tuple(int(round(channel * 255)) for channel in self.foreground)
+
+    def _gimp_context_get_background(self):
+        return tuple(int(round(channel * 255)) for channel in self.background)
+
+    def _gimp_context_push(self):
+        self.context_stack.append((self.foreground, self.background))
+
+    def _gimp_context_pop(self):
+        self.foreground, self.background = self.context_stack.pop()
+
+    def _gimp_image_set_colormap(self, image, num_bytes, colormap):
+        image.colormap = np.array(colormap[:num_bytes], np.float32).reshape(-1, 3) / 255.0
+
+    # Painting
+    def _paint_pixels(self, drawable, shade, opacity=100):
+        ''' Paint over the drawable through the selection, only inside the
+            selection's bounding box.  ``shade(x, y)`` gets the pixel centre
+            coordinates there, a row and a column, and returns a colour (a
+            triple or per pixel) and an alpha (a number or per pixel).
+        '''
+        coverage = self._coverage(drawable)
+        window = _bbox(coverage)
+        if window is None:
+            return
+        rows, columns = window
+        x_pos = np.arange(columns.start, columns.stop, dtype=np.float32)[None, :] + 0.5
+        y_pos = np.arange(rows.start, rows.stop, dtype=np.float32)[:, None] + 0.5
+        colour, alpha = shade(x_pos, y_pos)
+        amount = coverage[window] * np.float32(alpha * (opacity / 100.0))
+        amount = amount[..., None]
+        pixels = drawable.pixels[window]
+        pixels *= 1.0 - amount
+        pixels[..., :3] += colour * amount
+        pixels[..., 3:] += amount
+        gimpfu_recorder.RecordingPDB._paint(self, drawable)
+
+    def _coverage(self, drawable):
+        image = drawable.image
+        if image is None:
+            return np.ones(drawable.pixels.shape[:2], np.float32)
+        return image.coverage(drawable)
+
+    @staticmethod
+    def _painted(drawable, *operation):
+        ''' Add ``operation``, done through the selection, to drawable.key. '''
+        mask_key = () if drawable.image is None else drawable.image.mask_key
+        if drawable.key is None or mask_key is None:
+            drawable.key = None
+        else:
+            drawable.key = (drawable.key, operation, drawable.offsets, mask_key)
+
+    def _fill(self, drawable, fill_type, selected):
+        ''' Fill with a colour, or clear for TRANSPARENT_FILL; through the
+            selection when ``selected``.
+        '''
+        colour = {FOREGROUND_FILL: self.foreground, BACKGROUND_FILL: self.background,
+                  WHITE_FILL: _colour((255, 255, 255))}.get(fill_type)
+        if selected and colour is None:
+            self._clear(drawable)
+        elif selected:
+            self._paint_pixels(drawable, lambda x, y: (colour, 1.0))
+            self._painted(drawable, "fill", colour)
+        elif colour is None:
+            drawable.pixels[...] = 0.0
+            drawable.key = ("new", drawable.width, drawable.height)
+        else:
+            drawable.pixels[...] = np.append(colour, 1.0)
+            drawable.key = ("fill", colour, drawable.width, drawable.height)
+
+    def _clear(self, drawable):
+        coverage = self._coverage(drawable)
+        window = _bbox(coverage)
+        if window is not None:
+            drawable.pixels[window] *= (1.0 - coverage[window])[..., None]
+        self._painted(drawable, "clear")
+
+    def _gimp_edit_fill(self, drawable, fill_type):
+        self._fill(drawable, fill_type, True)
+
+    def _gimp_drawable_fill(self, drawable, fill_type):
+        gimpfu_recorder.RecordingPDB._gimp_drawable_fill(self, drawable, fill_type)
+        self._fill(drawable, fill_type, False)
+
+    def _gimp_edit_bucket_fill(self, drawable, fill_mode, _paint_mode, opacity, _threshold,
+                               _sample_merged, _x_pos, _y_pos):
+        # With a threshold of 255, the only one used, the seed fill covers
+        # the whole selection (or drawable) whatever the seed point.
+        colour = self.background if fill_mode == BG_BUCKET_FILL else self.foreground
+        self._paint_pixels(drawable, lambda x, y: (colour, 1.0), opacity)
+        self._painted(drawable, "fill", colour, opacity)
+
+    def _gimp_edit_blend(self, drawable, blend_mode, _paint_mode, _gradient_type, opacity,
+                         _offset, _repeat, reverse, _supersample, _max_depth, _threshold,
+                         _dither, x_1, y_1, x_2, y_2):
+        d_x, d_y = float(x_2 - x_1), float(y_2 - y_1)
+        length = d_x * d_x + d_y * d_y or 1.0
+        foreground, background = self.foreground, self.background
+
+        def shade(x_pos, y_pos):
+            t = np.clip((x_pos - x_1) * (d_x / length) + (y_pos - y_1) * (d_y / length), 0, 1)
+            if reverse:
+                t = 1.0 - t
+            if blend_mode == FG_TRANSPARENT_MODE:
+                return foreground, 1.0 - t
+            t = t[..., None]
+            return foreground * (1.0 - t) + background * t, 1.0
+
+        self._paint_pixels(drawable, shade, opacity)
+        self._painted(drawable, "blend", blend_mode, opacity, reverse, x_1, y_1, x_2, y_2,
+                      foreground, background)
+
+    def _gimp_edit_clear(self, drawable):
+        gimpfu_recorder.RecordingPDB._gimp_edit_clear(self, drawable)
+        self._clear(drawable)
+
+    _gimp_edit_cut = _gimp_edit_clear
+
+    def _pencil(self, drawable, polylines):
+        ''' A hard 1-pixel pencil in the foreground colour along polylines
+            ((n, 2) image coordinates), through the selection; each point
+            on the way paints the pixel it falls in.
+        '''
+        height, width = drawable.pixels.shape[:2]
+        hit = np.zeros((height, width), bool)
+        for line in polylines:
+            line = np.asarray(line, np.float64).reshape(-1, 2) - drawable.offsets
+            for start, end in zip(line, line[1:] if len(line) > 1 else line):
+                steps = int(math.ceil(2 * np.abs(end - start).max())) + 1
+                t = np.linspace(0.0, 1.0, steps)[:, None]
+                # (flattened curves land a rounding error short of whole pixels)
+                points = np.floor(start + (end - start) * t + 1e-6).astype(np.int64)
+                inside = ((points >= 0) & (points < (width, height))).all(axis=1)
+                hit[points[inside, 1], points[inside, 0]] = True
+        window = _bbox(hit)
+        if window is None:
+            return
+        amount = (self._coverage(drawable)[window] * hit[window])[..., None]
+        pixels = drawable.pixels[window]
+        pixels *= 1.0 - amount
+        pixels[..., :3] += self.foreground * amount
+        pixels[..., 3:] += amount
+        drawable.key = None
+        gimpfu_recorder.RecordingPDB._paint(self, drawable)
+
+    def _gimp_pencil(self, drawable, num_strokes, strokes):
+        self._pencil(drawable, [list(strokes)[:num_strokes]])
+
+    def _gimp_drawable_edit_stroke_item(self, drawable, item):
+        # The stroke method is taken to be the pencil ("1. Pixel", as graph_paper.py sets)
+        self._pencil(drawable, getattr(item, "polygons", []))
+
+    def _plug_in_gauss(self, image, drawable, horizontal, vertical, method):
+        gimpfu_recorder.RecordingPDB._plug_in_gauss(self, image, drawable, horizontal,
+                                                    vertical, method)
+        blurred = gauss(drawable.pixels, horizontal, vertical, drawable.key)
+        if image.mask is None or not image.mask.any():
+            drawable.pixels = blurred
+        else:
+            coverage = self._coverage(drawable)[..., None]
+            drawable.pixels = blurred * coverage + drawable.pixels * (1.0 - coverage)
+        self._painted(drawable, "gauss", float(horizontal), float(vertical))
+
+    _plug_in_gauss_rle = _plug_in_gauss
+    _plug_in_gauss_iir = _plug_in_gauss
+
+    # Layers
+    def _gimp_layer_new(self, image, width, height, layer_type, name, opacity, mode):
+        return Layer(image, name, width, height, layer_type, opacity, mode)
+
+    def _gimp_item_transform_flip(self, item, x_0, y_0, x_1, y_1):
+        if x_0 == x_1:
+            gimpfu_recorder.RecordingPDB._gimp_item_transform_flip(self, item, x_0, y_0, x_1,
+                                                                   y_1)
+            item.pixels = item.pixels[:, ::-1].copy()
+        else:
+            item.pixels = item.pixels[::-1].copy()
+            axis2 = 2 * y_0
+            item.offsets = (item.offsets[0], int(axis2 - item.offsets[1] - item.height))
+        item.key = None
+        return item
+
+    def _gimp_image_merge_visible_layers(self, image, _merge_type):
+        pixels = composite(image)
+        merged = Layer(image, image.layers[-1].name if image.layers else "Merged",
+                       image.width, image.height, RGBA_IMAGE)
+        merged.pixels = pixels
+        merged.key = None
+        self._release(image.layers)
+        image.layers = []
+        image.insert_layer(merged, 0)
+        return merged
+
+    @staticmethod
+    def _release(layers):
+        ''' Drop the pixels of layers GIMP deletes: CALLS keeps every layer. '''
+        for layer in layers:
+            layer.pixels = None
+
+    def _gimp_image_delete(self, image):
+        self._release(image.layers)
+        image.mask = None
+        for item in image.vectors + image.channels:
+            item.coverage = None
+
+    def _gimp_image_flatten(self, image):
+        pixels = composite(image, background=self._gimp_context_get_background())
+        flattened = self._gimp_image_merge_visible_layers(image, CLIP_TO_IMAGE)
+        flattened.pixels = pixels
+        flattened.type = RGB_IMAGE
+        return flattened
+
+    def _gimp_image_duplicate(self, image):
+        duplicate = Image(image.width, image.height, image.base_type)
+        duplicate.layers = [layer.copy() for layer in image.layers]
+        for layer in duplicate.layers:
+            layer.image = duplicate
+        duplicate.mask = None if image.mask is None else image.mask.copy()
+        duplicate.mask_key = image.mask_key
+        return duplicate
+
+    def _gimp_image_scale(self, image, width, height):
+        # Nearest neighbour, not GIMP's interpolation: plug-ins render at
+        # their final size, this only keeps the ones that scale running
+        scale_x, scale_y = float(width) / image.width, float(height) / image.height
+        gimpfu_recorder.RecordingPDB._gimp_image_scale(self, image, width, height)
+        for layer in image.layers:
+            if layer.pixels is not None:
+                layer.pixels = resample(layer.pixels, layer.height, layer.width)
+                layer.key = None
+        if image.mask is not None:
+            image.mask = resample(image.mask, image.height, image.width)
+            image.mask_key = None
+        if image.selection is not None:
+            x_1, y_1, x_2, y_2 = image.selection
+            image.selection = image.clip((int(x_1 * scale_x), int(y_1 * scale_y),
+                                          int(math.ceil(x_2 * scale_x)),
+                                          int(math.ceil(y_2 * scale_y))))
+
+    def _gimp_image_crop(self, image, new_width, new_height, off_x, off_y):
+        layers = list(image.layers)
+        gimpfu_recorder.RecordingPDB._gimp_image_crop(self, image, new_width, new_height,
+                                                      off_x, off_y)
+        self._release(layer for layer in layers if layer not in image.layers)
+        if image.mask is not None:
+            mask = np.zeros((image.height, image.width), np.float32)
+            kept = image.mask[max(off_y, 0):off_y + new_height, max(off_x, 0):off_x + new_width]
+            mask[max(-off_y, 0):max(-off_y, 0) + kept.shape[0],
+                 max(-off_x, 0):max(-off_x, 0) + kept.shape[1]] = kept
+            image.mask = mask
+            image.mask_key = None
+
+    def _crop_layer(self, layer, kept, off_x, off_y):
+        x_1, y_1, x_2, y_2 = kept
+        left, top = layer.offsets
+        layer.pixels = layer.pixels[y_1 - top:y_2 - top, x_1 - left:x_2 - left].copy()
+        layer.key = None
+        gimpfu_recorder.RecordingPDB._crop_layer(self, layer, kept, off_x, off_y)
+
+    # Vectors
+    def _gimp_vectors_import_from_string(self, image, svg, length, merge, scale):
+        count, vectors_ids = gimpfu_recorder.RecordingPDB._gimp_vectors_import_from_string(
+            self, image, svg, length, merge, scale)
+        imported = [gimpfu_recorder.Vectors.from_id(vectors_id) for vectors_id in vectors_ids]
+        viewbox, paths = parse_svg_paths(svg)
+        factor = np.array([1.0, 1.0])
+        if scale and viewbox:
+            factor = np.array([image.width / float(viewbox[2]), image.height / float(viewbox[3])])
+        steps = max(CURVE_STEPS, int(CURVE_STEPS * max(image.width, image.height) / 256))
+        polygons = [flatten_path(points, steps) * factor for _, points in paths]
+        if merge:
+            imported[0].polygons = polygons
+        else:
+            for vectors, polygon in zip(imported, polygons):
+                vectors.polygons = [polygon]
+        return count, vectors_ids
+
+    # Selection
+    def _select(self, image, operation, mask, key):
+        ''' Combine ``mask``, made as ``key`` says (see Image.mask_key),
+            with the selection.
+        '''
+        current = image.mask
+        if operation == CHANNEL_OP_REPLACE or current is None:
+            if operation in (CHANNEL_OP_SUBTRACT, CHANNEL_OP_INTERSECT):
+                return
+            image.mask, image.mask_key = mask, key
+            return
+        if operation == CHANNEL_OP_ADD:
+            image.mask = np.maximum(current, mask)
+        elif operation == CHANNEL_OP_SUBTRACT:
+            image.mask = np.maximum(current - mask, 0.0)
+        elif operation == CHANNEL_OP_INTERSECT:
+            image.mask = np.minimum(current, mask)
+        if image.mask_key is not None and key is not None:
+            image.mask_key = (image.mask_key, operation, key)
+        else:
+            image.mask_key = None
+
+    @staticmethod
+    def _operated(image, *operation):
+        ''' Add a gimp_selection_* ``operation`` to image.mask_key. '''
+        if image.mask_key is not None:
+            image.mask_key = (image.mask_key,) + operation
+
+    def _gimp_image_select_item(self, image, operation, item):
+        if isinstance(item, gimpfu_recorder.Vectors):
+            mask = self._vectors_mask(image, item)
+            key = ("polygons", item.polygons, PATH_SAMPLES)
+        elif isinstance(item, gimpfu_recorder.Channel):
+            mask = np.zeros((image.height, image.width), np.float32)
+            if item.coverage is not None:
+                mask[item.coverage[0]] = item.coverage[1]
+            key = getattr(item, "mask_key", None)
+        else:
+            mask = image.layer_alpha(item)
+            key = None if item.key is None else ("alpha", item.key, item.offsets)
+        self._select(image, operation, mask, key)
+
+    def _gimp_image_remove_vectors(self, image, vectors):
+        gimpfu_recorder.RecordingPDB._gimp_image_remove_vectors(self, image, vectors)
+        vectors.coverage = None
+
+    @staticmethod
+    def _vectors_mask(image, vectors):
+        ''' The filled path; paths are selected again and again, so the
+            part around the shape is kept on the vectors.
+        '''
+        size = (image.width, image.height)
+        kept = getattr(vectors, "coverage", None)
+        mask = np.zeros((image.height, image.width), np.float32)
+        if kept is None or kept[0] != size:
+            frame = polygons_window(vectors.polygons, *size)
+            window = filled = None
+            if frame is not None:
+                filled = cached(size, lambda: fill_polygons(vectors.polygons, *size)[frame],
+                                "polygons", vectors.polygons, PATH_SAMPLES)
+                window = _bbox(filled)
+            if window is not None:
+                filled = filled[window].copy()
+                window = tuple(slice(outer.start + inner.start, outer.start + inner.stop)
+                               for outer, inner in zip(frame, window))
+            kept = vectors.coverage = (size, window, filled)
+        if kept[1] is not None:
+            mask[kept[1]] = kept[2]
+        return mask
+
+    def _gimp_ellipse_select(self, image, x_pos, y_pos, width, height, operation, antialias,
+                             *_args):
+        self._select(image, operation, ellipse_mask(image.width, image.height, x_pos, y_pos,
+                                                    width, height, antialias),
+                     ("ellipse", x_pos, y_pos, width, height, bool(antialias)))
+
+    def _gimp_rect_select(self, image, x_pos, y_pos, width, height, operation, *_args):
+        mask = np.zeros((image.height, image.width), np.float32)
+        mask[max(int(y_pos), 0):max(int(y_pos + height), 0),
+             max(int(x_pos), 0):max(int(x_pos + width), 0)] = 1.0
+        self._select(image, operation, mask, ("rectangle", x_pos, y_pos, width, height))
+
+    def _gimp_selection_all(self, image):
+        image.mask = np.ones((image.height, image.width), np.float32)
+        image.mask_key = ("all",)
+
+    def _gimp_selection_none(self, image):
+        image.mask = None
+        image.mask_key = ()
+
+    def _gimp_selection_bounds(self, image):
+        if image.mask is None or not image.mask.any():
+            return False, 0, 0, image.width, image.height
+        ys, xs = np.nonzero(image.mask > 0)
+        return True, int(xs.min()), int(ys.min()), int(xs.max()) + 1, int(ys.max()) + 1
+
+    def _gimp_selection_is_empty(self, image):
+        return image.mask is None or not image.mask.any()
+
+    def _gimp_selection_save(self, image):
+        # Only the part around the selection is kept
+        channel = gimpfu_recorder.RecordingPDB._gimp_selection_save(self, image)
+        window = None if image.mask is None else _bbox(image.mask)
+        channel.coverage = None if window is None else (window, image.mask[window].copy())
+        channel.mask_key = image.mask_key
+        return channel
+
+    def _gimp_image_remove_channel(self, image, channel):
+        gimpfu_recorder.RecordingPDB._gimp_image_remove_channel(self, image, channel)
+        channel.coverage = None
+
+    def _gimp_selection_shrink(self, image, steps):
+        if image.mask is not None:
+            image.mask = morph(image.mask, steps, np.minimum, image.mask_key)
+            self._operated(image, "shrink", int(steps))
+
+    def _gimp_selection_grow(self, image, steps):
+        if image.mask is not None:
+            image.mask = morph(image.mask, steps, np.maximum, image.mask_key)
+            self._operated(image, "grow", int(steps))
+
+    def _gimp_selection_translate(self, image, off_x, off_y):
+        if image.mask is not None:
+            image.mask = shift(image.mask, off_x, off_y)
+            self._operated(image, "translate", int(round(off_x)), int(round(off_y)))
+
+    def _gimp_selection_invert(self, image):
+        if image.mask is None:
+            self._gimp_selection_all(image)
+        else:
+            image.mask = 1.0 - image.mask
+            self._operated(image, "invert")
+
+    # Script-Fu and files
+    def _script_fu_drop_shadow(self, image, drawable, off_x, off_y, blur, colour, opacity,
+                               _allow_resize):
+        # The selection when there is one, else the drawable's alpha
+        source, key = image.mask, image.mask_key
+        if source is None or not source.any():
+            source = image.layer_alpha(drawable)
+            key = None if drawable.key is None else ("alpha", drawable.key, drawable.offsets)
+        # Blurred with room around it, then moved: the blur may reach past
+        # the canvas and be brought back in by the offset
+        pad = int(math.ceil(max(blur, 0)))
+        source = np.pad(source, pad, "constant")
+        shadow = Layer(image, "Drop Shadow", image.width + 2 * pad, image.height + 2 * pad,
+                       RGBA_IMAGE, opacity)
+        shadow.pixels = np.concatenate([source[..., None] * _colour(colour), source[..., None]],
+                                       axis=-1)
+        shadow.key = None if key is None else ("shadow", key, _colour(colour))
+        if blur > 0:
+            shadow.pixels = gauss(shadow.pixels, blur, blur, shadow.key)
+            shadow.key = None if key is None else (shadow.key, "gauss", float(blur))
+        shadow.offsets = (int(off_x) - pad, int(off_y) - pad)
+        active = image.active_layer
+        image.insert_layer(shadow, image.layers.index(drawable) + 1)
+        image.active_layer = active
+
+    def _file_png_save_defaults(self, image, drawable, filename, _raw_filename):
+        if drawable is image.layers[0] and len(image.layers) == 1 and drawable.offsets == (0, 0):
+            pixels = drawable.pixels
+        else:
+            pixels = composite(image, [drawable])
+        write_png(filename, to_rgba8(pixels))
+
+    _file_png_save = _file_png_save_defaults
+
+
+def layer_state(layer):
+    ''' What it takes to rebuild ``layer`` in another image or process. '''
+    return (layer.name, layer.width, layer.height, layer.opacity, layer.offsets, layer.visible,
+            layer.content, layer.pixels)
+
+
+def layer_from_state(image, state):
+    ''' A new layer of ``image`` (not inserted yet) rebuilt from layer_state. '''
+    name, width, height, opacity, offsets, visible, content, pixels = state
+    layer = Layer(image, name, width, height, RGBA_IMAGE, opacity)
+    layer.offsets = offsets
+    layer.visible = visible
+    layer.content = content
+    layer.pixels = pixels.copy()
+    layer.key = None
+    return layer
+
+
+class _Namespace(gimpfu_recorder._Namespace):
+    ''' Stand-in for the ``gimp`` module, remembering displayed images. '''
+
+    Image = Image
+    Layer = Layer
+    PixelRgn = PixelRgn
+
+    # Not in GIMP: layers hold NumPy pixels (tux_variants.py), and plug-ins
+    # (tux_scene.py) may draw on a process pool
+    numpy_pixels = True
+    processes = 1
+    layer_state = staticmethod(layer_state)
+    layer_from_state = staticmethod(layer_from_state)
+
+    @staticmethod
+    def Display(image):
+        gimpfu_recorder._Namespace.Display(image)
+        DISPLAYED.append(image)
+
+
+gimp = _Namespace()
+pdb = NumpyPDB()
+
+
+# Output
+
+def flatten(image):
+    ''' The visible layers of ``image`` as straight 8-bit RGBA. '''
+    return to_rgba8(composite(image))
+
+
+def write_ora(image, path):
+    ''' Save every layer as an OpenRaster file, which GIMP opens layered. '''
+    stack = []
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(zipfile.ZipInfo("mimetype"), "image/openraster")
+        for index, layer in enumerate(image.layers):
+            src = "data/layer%03d.png" % index
+            archive.writestr(src, png_bytes(to_rgba8(layer.pixels)))
+            stack.append('<layer name=%s src="%s" x="%d" y="%d" opacity="%.3f" '
+                         'visibility="%s"/>' % (quoteattr(layer.name), src, layer.offsets[0],
+                                                layer.offsets[1], layer.opacity / 100.0,
+                                                "visible" if layer.visible else "hidden"))
+        archive.writestr("stack.xml",
+                         '<?xml version="1.0" encoding="UTF-8"?>\n'
+                         '<image version="0.0.3" w="%d" h="%d"><stack>\n%s\n</stack></image>\n'
+                         % (image.width, image.height, "\n".join(stack)))
+        archive.writestr("mergedimage.png", png_bytes(flatten(image)))
+
+
+def run(plugin_path, proc_name=None, args=None):
+    ''' Run a registered procedure of a plug-in on this backend and return
+        the images it displayed.
+    '''
+    del DISPLAYED[:]
+    plugin = gimpfu_recorder.load_plugin(plugin_path, sys.modules[__name__])
+    proc_name = proc_name or sorted(plugin_procedures(plugin))[0]
+    if args is None:
+        args = gimpfu_recorder.default_args(proc_name)
+    REGISTERED[proc_name]["function"](*args)
+    # The recorded calls hold every layer; nothing here needs them.
+    del CALLS[:]
+    images = list(DISPLAYED)
+    del DISPLAYED[:]
+    return images
+
+
+def plugin_procedures(plugin):
+    return [name for name, registration in REGISTERED.items()
+            if getattr(registration["function"], "__module__", None) == plugin.__name__]
+
+
+def command_line(argv=None):
+    ''' Render a plug-in with NumPy: a layered .ora and a flattened .png per
+        displayed image.
+    '''
+    import argparse
+    import pdb_profiler
+
+    parser = argparse.ArgumentParser(description=command_line.__doc__)
+    parser.add_argument("plugin", help="plug-in file, e.g. Crystal_Tux.py")
+    parser.add_argument("procedure", nargs="?", help="registered name (default: the first)")
+    parser.add_argument("args", nargs="*", help="arguments (default: registered defaults)")
+    parser.add_argument("--output", metavar="PREFIX",
+                        help="output path without extension (default: the plug-in name)")
+    parser.add_argument("--processes", type=int, default=1, metavar="N",
+                        help="worker processes plug-ins may draw with (default: 1)")
+    parser.add_argument("--mask-cache", metavar="DIR",
+                        help="keep rasterized masks and blurs in DIR across runs")
+    options = parser.parse_args(argv)
+    gimp.processes = options.processes
+    if options.mask_cache:
+        use_mask_cache(options.mask_cache)
+
+    sys.modules.setdefault("gimpfu_numpy", sys.modules[__name__])
+    args = [pdb_profiler._parse_arg(arg) for arg in options.args] or None
+    images = run(options.plugin, options.procedure, args)
+    prefix = options.output or os.path.splitext(os.path.basename(options.plugin))[0]
+    for index, image in enumerate(images):
+        name = prefix if len(images) == 1 else "%s-%d" % (prefix, index + 1)
+        write_ora(image, name + ".ora")
+        write_png(name + ".png", flatten(image))
+        print("%s.ora %s.png %dx%d, %d layers" % (name, name, image.width, image.height,
+                                                  len(image.layers)))
+    if MASK_CACHE is not None:
+        print("mask cache: %d hits, %d misses" % (MASK_CACHE.hits, MASK_CACHE.misses))
+
+
+if __name__ == "__main__":
+    command_line()
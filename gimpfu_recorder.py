@@ -0,0 +1,734 @@
+# vim: expandtab:ts=4:sw=4
+# pylint: disable=C0103,R0902,R0903,R0913
+''' gimpfu_recorder.py
+
+    A recording stand-in for the ``gimpfu`` module, so the plug-ins in this
+    directory can be imported and run without GIMP (for example in CI).
+
+    Every ``pdb.*`` procedure and every ``gimp.*`` / image / layer method is
+    appended to ``CALLS``.  Images, layers, vectors and the selection are
+    modelled just enough to return plausible values: the layer stack keeps
+    GIMP's insertion rules and the selection (saved ones as channels) is
+    tracked as a bounding box.
+    No pixels are touched.
+
+    Usage:
+        import gimpfu_recorder
+        plugin = gimpfu_recorder.load_plugin("Crystal_Tux.py")
+        plugin.draw_tux()
+        for call in gimpfu_recorder.CALLS: ...
+'''
+
+import os
+import re
+import sys
+import types
+
+# Image base types / drawable types
+RGB, GRAY, INDEXED = 0, 1, 2
+RGB_IMAGE, RGBA_IMAGE, GRAY_IMAGE, GRAYA_IMAGE, INDEXED_IMAGE, INDEXEDA_IMAGE = range(6)
+# Layer modes
+NORMAL_MODE = 0
+# Fill types
+FOREGROUND_FILL, BACKGROUND_FILL, WHITE_FILL, TRANSPARENT_FILL, PATTERN_FILL = range(5)
+# Channel operations
+CHANNEL_OP_ADD, CHANNEL_OP_SUBTRACT, CHANNEL_OP_REPLACE, CHANNEL_OP_INTERSECT = range(4)
+# Blend modes, gradients, repeats, bucket fills
+FG_BG_RGB_MODE, FG_BG_HSV_MODE, FG_TRANSPARENT_MODE, CUSTOM_MODE = range(4)
+GRADIENT_LINEAR = 0
+REPEAT_NONE = 0
+FG_BUCKET_FILL, BG_BUCKET_FILL, PATTERN_BUCKET_FILL = range(3)
+# Merge types, units
+EXPAND_AS_NECESSARY, CLIP_TO_IMAGE, CLIP_TO_BOTTOM_LAYER = range(3)
+PIXELS = 0
+# Stroke methods
+STROKE_LINE, STROKE_PAINT_METHOD = range(2)
+# Run modes
+RUN_INTERACTIVE, RUN_NONINTERACTIVE, RUN_WITH_LAST_VALS = range(3)
+# Plug-in parameter types
+PF_INT, PF_FLOAT, PF_STRING, PF_COLOR = 0, 3, 4, 10
+PF_COLOUR = PF_COLOR
+PF_INT8, PF_INT16, PF_INT32 = 2, 1, 0
+(PF_TOGGLE, PF_SLIDER, PF_SPINNER, PF_FONT, PF_FILE, PF_BRUSH, PF_PATTERN, PF_GRADIENT,
+ PF_RADIO, PF_TEXT, PF_PALETTE, PF_FILENAME, PF_DIRNAME, PF_OPTION) = range(1000, 1014)
+PF_BOOL = PF_TOGGLE
+PF_IMAGE, PF_LAYER, PF_CHANNEL, PF_DRAWABLE = range(13, 17)
+
+CALLS = []
+REGISTERED = {}
+# Called with every Call as it is recorded, before the stand-in answers
+# it, so they see the state the operation starts from (pdb_explain.py)
+OBSERVERS = []
+
+
+class Call(object):
+    ''' One recorded operation: ``name`` is "pdb.<proc>", "gimp.<func>"
+        or "<Class>.<method>"; ``result`` is what the stand-in returned.
+    '''
+
+    __slots__ = ("name", "args", "kwargs", "result")
+
+    def __init__(self, name, args, kwargs):
+        self.name = name
+        self.args = args
+        self.kwargs = kwargs
+        self.result = None
+
+    def __repr__(self):
+        return "%s%r" % (self.name, self.args)
+
+
+def reset():
+    ''' Forget all recorded calls and registrations. '''
+    del CALLS[:]
+    REGISTERED.clear()
+
+
+def _record(name, args, kwargs=None):
+    call = Call(name, tuple(args), dict(kwargs or {}))
+    CALLS.append(call)
+    for observer in OBSERVERS:
+        observer(call)
+    return call
+
+
+def _clip(bounds, width, height):
+    ''' Clip (x1, y1, x2, y2) to the canvas, None when empty. '''
+    if bounds is None:
+        return None
+    x_1, y_1 = max(0, int(bounds[0])), max(0, int(bounds[1]))
+    x_2, y_2 = min(width, int(bounds[2])), min(height, int(bounds[3]))
+    if x_2 <= x_1 or y_2 <= y_1:
+        return None
+    return x_1, y_1, x_2, y_2
+
+
+def _union(first, second):
+    if first is None:
+        return second
+    if second is None:
+        return first
+    return (min(first[0], second[0]), min(first[1], second[1]),
+            max(first[2], second[2]), max(first[3], second[3]))
+
+
+def _intersect(first, second):
+    if first is None or second is None:
+        return None
+    bounds = (max(first[0], second[0]), max(first[1], second[1]),
+              min(first[2], second[2]), min(first[3], second[3]))
+    if bounds[2] <= bounds[0] or bounds[3] <= bounds[1]:
+        return None
+    return bounds
+
+
+class Item(object):
+    ''' Common base for layers and vectors. '''
+
+    _next_id = [1]
+
+    def __init__(self, name):
+        self.ID = Item._next_id[0]
+        Item._next_id[0] += 1
+        self.name = name
+        self.image = None
+
+    def __repr__(self):
+        return "<%s %r>" % (type(self).__name__, self.name)
+
+
+class Layer(Item):
+    ''' A layer; ``content`` is the bounding box (image coordinates) of
+        everything painted on it so far, or None when it is empty.
+    '''
+
+    def __init__(self, image, name, width, height, layer_type=RGBA_IMAGE,
+                 opacity=100, mode=NORMAL_MODE):
+        Item.__init__(self, name)
+        _record("gimp.Layer", (image, name, width, height, layer_type, opacity, mode))
+        self.image = image
+        self.width = int(width)
+        self.height = int(height)
+        self.type = layer_type
+        self.opacity = opacity
+        self.mode = mode
+        self.offsets = (0, 0)
+        self.content = None
+
+    @property
+    def bpp(self):
+        return {RGB_IMAGE: 3, RGBA_IMAGE: 4, GRAY_IMAGE: 1, GRAYA_IMAGE: 2,
+                INDEXED_IMAGE: 1, INDEXEDA_IMAGE: 2}.get(self.type, 4)
+
+    @property
+    def extents(self):
+        return (self.offsets[0], self.offsets[1],
+                self.offsets[0] + self.width, self.offsets[1] + self.height)
+
+    def fill(self, fill_type):
+        _record("Layer.fill", (self, fill_type))
+        self.content = None if fill_type == TRANSPARENT_FILL else self.extents
+
+    def set_offsets(self, off_x, off_y):
+        _record("Layer.set_offsets", (self, off_x, off_y))
+        shift_x, shift_y = off_x - self.offsets[0], off_y - self.offsets[1]
+        self.offsets = (int(off_x), int(off_y))
+        if self.content is not None:
+            self.content = (self.content[0] + shift_x, self.content[1] + shift_y,
+                            self.content[2] + shift_x, self.content[3] + shift_y)
+
+    def copy(self):
+        duplicate = Layer(self.image, self.name + " copy", self.width, self.height,
+                          self.type, self.opacity, self.mode)
+        duplicate.offsets = self.offsets
+        duplicate.content = self.content
+        return duplicate
+
+    def get_pixel_rgn(self, x_pos, y_pos, width, height, dirty=True, shadow=False):
+        return PixelRgn(self, x_pos, y_pos, width, height, dirty, shadow)
+
+    def flush(self):
+        _record("Layer.flush", (self,))
+
+    def update(self, x_pos, y_pos, width, height):
+        _record("Layer.update", (self, x_pos, y_pos, width, height))
+
+
+class PixelRgn(object):
+    ''' gimp.PixelRgn: ``region[x1:x2, y1:y2]`` (or ``[x, y]``) is a string
+        of the drawable's bytes there, rows top first, and can be assigned
+        one.  No pixels are modelled, so they read as zeros (transparent).
+    '''
+
+    def __init__(self, drawable, x_pos, y_pos, width, height, dirty=True, shadow=False):
+        _record("gimp.PixelRgn", (drawable, x_pos, y_pos, width, height, dirty, shadow))
+        self.drawable = drawable
+        self.x = x_pos
+        self.y = y_pos
+        self.w = width
+        self.h = height
+        self.bpp = drawable.bpp
+
+    def __getitem__(self, key):
+        (x_1, x_2), (y_1, y_2) = [_span(index) for index in key]
+        return self._read(x_1, y_1, x_2, y_2)
+
+    def _read(self, x_1, y_1, x_2, y_2):
+        return b"\0" * ((x_2 - x_1) * (y_2 - y_1) * self.bpp)
+
+    def __setitem__(self, key, data):
+        (x_1, x_2), (y_1, y_2) = [_span(index) for index in key]
+        _record("PixelRgn.__setitem__", (self.drawable, (x_1, y_1, x_2, y_2)))
+        if len(data) != (x_2 - x_1) * (y_2 - y_1) * self.bpp:
+            raise ValueError("string is the wrong length")
+        self._write(x_1, y_1, x_2, y_2, data)
+        off_x, off_y = self.drawable.offsets
+        self.drawable.content = _union(self.drawable.content,
+                                       (x_1 + off_x, y_1 + off_y, x_2 + off_x, y_2 + off_y))
+
+    def _write(self, x_1, y_1, x_2, y_2, data):
+        pass
+
+
+def _span(index):
+    ''' (start, stop) of a PixelRgn index, a slice or a single position. '''
+    if isinstance(index, slice):
+        return index.start, index.stop
+    return index, index + 1
+
+
+class Vectors(Item):
+    ''' An imported path, reduced to the bounding box of its points.  The
+        PDB hands out its ID, as GIMP does; from_id() gives it back.
+    '''
+
+    _by_id = {}
+
+    def __init__(self, image, name, bounds):
+        Item.__init__(self, name)
+        self.image = image
+        self.bounds = bounds
+        Vectors._by_id[self.ID] = self
+
+    @classmethod
+    def from_id(cls, vectors_id):
+        return cls._by_id[vectors_id]
+
+
+class Channel(Item):
+    ''' A saved selection, reduced to its bounding box. '''
+
+    def __init__(self, image, name, bounds):
+        Item.__init__(self, name)
+        self.image = image
+        self.bounds = bounds
+
+
+class Image(object):
+    ''' An image with a GIMP-like layer stack (index 0 is the top). '''
+
+    _next_id = [1]
+
+    def __init__(self, width, height, base_type=RGB):
+        _record("gimp.Image", (width, height, base_type))
+        self.ID = Image._next_id[0]
+        Image._next_id[0] += 1
+        self.width = int(width)
+        self.height = int(height)
+        self.base_type = base_type
+        self.layers = []
+        self.vectors = []
+        self.channels = []
+        self.active_layer = None
+        self.selection = None
+        self.resolution = (72.0, 72.0)
+
+    def __repr__(self):
+        return "<Image %d %dx%d>" % (self.ID, self.width, self.height)
+
+    def add_layer(self, layer, position=-1):
+        _record("Image.add_layer", (self, layer, position))
+        self.insert_layer(layer, position)
+
+    def insert_layer(self, layer, position=-1):
+        ''' Insert following GIMP's rules: -1 means above the active layer. '''
+        if position is None or position < 0:
+            if self.active_layer in self.layers:
+                position = self.layers.index(self.active_layer)
+            else:
+                position = 0
+        position = min(int(position), len(self.layers))
+        layer.image = self
+        self.layers.insert(position, layer)
+        self.active_layer = layer
+
+    def remove_layer(self, layer):
+        self.layers.remove(layer)
+        if self.active_layer is layer:
+            self.active_layer = self.layers[0] if self.layers else None
+
+    def layer_by_name(self, name):
+        for layer in self.layers:
+            if layer.name == name:
+                return layer
+        return None
+
+    def clip(self, bounds):
+        return _clip(bounds, self.width, self.height)
+
+
+_NUMBER = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+_PATH = re.compile(r"<path\b[^>]*?\bid=\"([^\"]+)\"[^>]*?\bd=\"([^\"]+)\"", re.S)
+_VIEWBOX = re.compile(r"viewBox=\"([^\"]+)\"")
+
+
+def parse_svg_paths(svg):
+    ''' Return (viewbox, [(path id, [x, y, x, y, ...])]) from an SVG string. '''
+    viewbox = None
+    match = _VIEWBOX.search(svg)
+    if match:
+        viewbox = tuple(float(value) for value in _NUMBER.findall(match.group(1)))
+    paths = []
+    for path_id, data in _PATH.findall(svg):
+        paths.append((path_id, [float(value) for value in _NUMBER.findall(data)]))
+    return viewbox, paths
+
+
+class Procedure(object):
+    ''' Callable returned for ``pdb.<name>``. '''
+
+    def __init__(self, owner, name):
+        self.owner = owner
+        self.proc_name = name
+
+    def __call__(self, *args, **kwargs):
+        call = _record("pdb." + self.proc_name, args, kwargs)
+        handler = getattr(self.owner, "_" + self.proc_name, None)
+        if handler is not None:
+            call.result = handler(*args)
+        return call.result
+
+
+class RecordingPDB(object):
+    ''' ``pdb`` stand-in: records every procedure, answers the ones the
+        plug-ins read results from.
+    '''
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        procedure = Procedure(self, name)
+        setattr(self, name, procedure)
+        return procedure
+
+    def __getitem__(self, name):
+        return getattr(self, name.replace("-", "_"))
+
+    # Layers and the stack
+    def _gimp_image_get_layer_by_name(self, image, name):
+        return image.layer_by_name(name)
+
+    def _gimp_image_get_layer_position(self, image, layer):
+        return image.layers.index(layer)
+
+    def _gimp_image_insert_layer(self, image, layer, _parent, position):
+        image.insert_layer(layer, position)
+
+    def _gimp_image_remove_layer(self, image, layer):
+        image.remove_layer(layer)
+
+    def _gimp_image_set_active_layer(self, image, layer):
+        image.active_layer = layer
+
+    def _gimp_image_get_active_layer(self, image):
+        return image.active_layer
+
+    def _gimp_image_reorder_item(self, image, item, _parent, position):
+        image.layers.remove(item)
+        image.layers.insert(min(position, len(image.layers)), item)
+
+    def _gimp_layer_copy(self, layer, _add_alpha):
+        return layer.copy()
+
+    def _gimp_layer_new_from_drawable(self, drawable, dest_image):
+        layer = drawable.copy()
+        layer.name = drawable.name
+        layer.image = dest_image
+        return layer
+
+    def _gimp_layer_new(self, image, width, height, layer_type, name, opacity, mode):
+        return Layer(image, name, width, height, layer_type, opacity, mode)
+
+    def _gimp_item_set_name(self, item, name):
+        item.name = name
+
+    def _gimp_item_get_name(self, item):
+        return item.name
+
+    def _gimp_item_transform_flip(self, item, x_0, _y_0, _x_1, _y_1):
+        # Only the vertical-axis flips used by the plug-ins are modelled.
+        axis2 = 2 * x_0
+        item.offsets = (int(axis2 - item.offsets[0] - item.width), item.offsets[1])
+        if item.content is not None:
+            item.content = (axis2 - item.content[2], item.content[1],
+                            axis2 - item.content[0], item.content[3])
+        return item
+
+    def _gimp_layer_set_offsets(self, layer, off_x, off_y):
+        layer.set_offsets(off_x, off_y)
+
+    def _gimp_layer_set_opacity(self, layer, opacity):
+        layer.opacity = opacity
+
+    def _plug_in_autocrop_layer(self, _image, layer):
+        if layer.content is not None:
+            layer.width = int(layer.content[2] - layer.content[0])
+            layer.height = int(layer.content[3] - layer.content[1])
+            layer.offsets = (int(layer.content[0]), int(layer.content[1]))
+
+    def _gimp_text_fontname(self, image, _drawable, x_pos, y_pos, text, border, _antialias,
+                            size, _unit, _font):
+        text = str(text)
+        layer = Layer(image, text, int(len(text) * size * 0.6) + 2 * border + 1,
+                      int(size * 1.2) + 2 * border + 1, RGBA_IMAGE)
+        layer.offsets = (int(x_pos), int(y_pos))
+        layer.content = layer.extents
+        image.insert_layer(layer, 0)
+        return layer
+
+    def _gimp_image_merge_visible_layers(self, image, _merge_type):
+        merged = Layer(image, image.layers[-1].name if image.layers else "Merged",
+                       image.width, image.height, RGBA_IMAGE)
+        for layer in image.layers:
+            merged.content = _union(merged.content, layer.content)
+        image.layers = []
+        image.insert_layer(merged, 0)
+        return merged
+
+    def _gimp_image_flatten(self, image):
+        flattened = self._gimp_image_merge_visible_layers(image, CLIP_TO_IMAGE)
+        flattened.type = RGB_IMAGE
+        return flattened
+
+    def _gimp_image_scale(self, image, width, height):
+        scale_x, scale_y = float(width) / image.width, float(height) / image.height
+        image.width, image.height = int(width), int(height)
+        for layer in image.layers:
+            layer.width = max(1, int(round(layer.width * scale_x)))
+            layer.height = max(1, int(round(layer.height * scale_y)))
+            layer.offsets = (int(layer.offsets[0] * scale_x), int(layer.offsets[1] * scale_y))
+            if layer.content is not None:
+                layer.content = (layer.content[0] * scale_x, layer.content[1] * scale_y,
+                                 layer.content[2] * scale_x, layer.content[3] * scale_y)
+
+    def _gimp_image_crop(self, image, new_width, new_height, off_x, off_y):
+        # Layers are cut to the new canvas, and dropped when nothing is left
+        canvas = (off_x, off_y, off_x + new_width, off_y + new_height)
+        image.width, image.height = int(new_width), int(new_height)
+        for layer in list(image.layers):
+            kept = _intersect(layer.extents, canvas)
+            if kept is None:
+                image.remove_layer(layer)
+            else:
+                self._crop_layer(layer, kept, off_x, off_y)
+        if image.selection is not None:
+            x_1, y_1, x_2, y_2 = image.selection
+            image.selection = image.clip((x_1 - off_x, y_1 - off_y, x_2 - off_x, y_2 - off_y))
+
+    def _crop_layer(self, layer, kept, off_x, off_y):
+        ''' Cut ``layer`` to ``kept`` (old image coordinates), then move the
+            origin to (off_x, off_y).
+        '''
+        x_1, y_1, x_2, y_2 = kept
+        content = _intersect(layer.content, kept)
+        layer.width, layer.height = x_2 - x_1, y_2 - y_1
+        layer.offsets = (x_1 - off_x, y_1 - off_y)
+        if content is not None:
+            content = (content[0] - off_x, content[1] - off_y,
+                       content[2] - off_x, content[3] - off_y)
+        layer.content = content
+
+    def _gimp_image_width(self, image):
+        return image.width
+
+    def _gimp_image_height(self, image):
+        return image.height
+
+    def _gimp_image_duplicate(self, image):
+        duplicate = Image(image.width, image.height, image.base_type)
+        duplicate.layers = [layer.copy() for layer in image.layers]
+        for layer in duplicate.layers:
+            layer.image = duplicate
+        return duplicate
+
+    # Vectors
+    def _gimp_vectors_import_from_string(self, image, svg, _length, merge, scale):
+        viewbox, paths = parse_svg_paths(svg)
+        scale_x = scale_y = 1.0
+        if scale and viewbox:
+            scale_x = image.width / float(viewbox[2])
+            scale_y = image.height / float(viewbox[3])
+        imported = []
+        for path_id, points in paths:
+            xs, ys = points[0::2], points[1::2]
+            bounds = (min(xs) * scale_x, min(ys) * scale_y,
+                      max(xs) * scale_x, max(ys) * scale_y)
+            imported.append(Vectors(image, path_id, bounds))
+        if merge and len(imported) > 1:
+            bounds = None
+            for vectors in imported:
+                bounds = _union(bounds, vectors.bounds)
+            imported = [Vectors(image, imported[0].name, bounds)]
+        image.vectors.extend(imported)
+        # An INT32ARRAY of IDs, like GIMP's
+        return len(imported), tuple(vectors.ID for vectors in imported)
+
+    def _gimp_image_get_vectors_by_name(self, image, name):
+        for vectors in image.vectors:
+            if vectors.name == name:
+                return vectors
+        return None
+
+    def _gimp_image_remove_vectors(self, image, vectors):
+        image.vectors.remove(vectors)
+
+    # Selection
+    def _select(self, image, operation, bounds):
+        bounds = image.clip(bounds)
+        if operation == CHANNEL_OP_REPLACE:
+            image.selection = bounds
+        elif operation == CHANNEL_OP_INTERSECT:
+            image.selection = _intersect(image.selection, bounds)
+        elif operation == CHANNEL_OP_ADD:
+            image.selection = _union(image.selection, bounds)
+
+    def _gimp_image_select_item(self, image, operation, item):
+        bounds = item.bounds if isinstance(item, (Vectors, Channel)) else item.content
+        if bounds is not None:
+            # Anti-aliased edges touch every pixel the shape crosses.
+            bounds = (int(bounds[0]), int(bounds[1]),
+                      int(-(-bounds[2] // 1)), int(-(-bounds[3] // 1)))
+        self._select(image, operation, bounds)
+
+    def _gimp_ellipse_select(self, image, x_pos, y_pos, width, height, operation, *_args):
+        self._select(image, operation, (x_pos, y_pos, x_pos + width, y_pos + height))
+
+    def _gimp_rect_select(self, image, x_pos, y_pos, width, height, operation, *_args):
+        self._select(image, operation, (x_pos, y_pos, x_pos + width, y_pos + height))
+
+    def _gimp_selection_all(self, image):
+        image.selection = (0, 0, image.width, image.height)
+
+    def _gimp_selection_none(self, image):
+        image.selection = None
+
+    def _gimp_selection_bounds(self, image):
+        if image.selection is None:
+            return False, 0, 0, image.width, image.height
+        return (True,) + tuple(int(value) for value in image.selection)
+
+    def _gimp_selection_is_empty(self, image):
+        return image.selection is None
+
+    def _gimp_selection_save(self, image):
+        channel = Channel(image, "Selection Mask copy", image.selection)
+        image.channels.insert(0, channel)
+        return channel
+
+    def _gimp_image_remove_channel(self, image, channel):
+        image.channels.remove(channel)
+
+    def _gimp_selection_shrink(self, image, steps):
+        if image.selection is not None:
+            x_1, y_1, x_2, y_2 = image.selection
+            image.selection = image.clip((x_1 + steps, y_1 + steps, x_2 - steps, y_2 - steps))
+
+    def _gimp_selection_grow(self, image, steps):
+        if image.selection is not None:
+            x_1, y_1, x_2, y_2 = image.selection
+            image.selection = image.clip((x_1 - steps, y_1 - steps, x_2 + steps, y_2 + steps))
+
+    def _gimp_selection_translate(self, image, off_x, off_y):
+        if image.selection is not None:
+            x_1, y_1, x_2, y_2 = image.selection
+            image.selection = image.clip((x_1 + off_x, y_1 + off_y, x_2 + off_x, y_2 + off_y))
+
+    def _gimp_selection_invert(self, image):
+        # The complement of a bounded shape practically always spans the canvas.
+        image.selection = (0, 0, image.width, image.height)
+
+    # Painting
+    def _paint(self, drawable):
+        image = drawable.image
+        area = drawable.extents
+        if image is not None and image.selection is not None:
+            area = _intersect(area, image.selection)
+        drawable.content = _union(drawable.content, area)
+
+    def _gimp_edit_fill(self, drawable, fill_type):
+        if fill_type != TRANSPARENT_FILL:
+            self._paint(drawable)
+
+    def _gimp_drawable_fill(self, drawable, fill_type):
+        drawable.content = None if fill_type == TRANSPARENT_FILL else drawable.extents
+
+    def _gimp_edit_blend(self, drawable, *_args):
+        self._paint(drawable)
+
+    def _gimp_edit_bucket_fill(self, drawable, *_args):
+        self._paint(drawable)
+
+    def _gimp_pencil(self, drawable, _num_strokes, _strokes):
+        self._paint(drawable)
+
+    def _gimp_drawable_edit_stroke_item(self, drawable, _item):
+        self._paint(drawable)
+
+    def _gimp_edit_clear(self, drawable):
+        image = drawable.image
+        if image is None or image.selection is None:
+            drawable.content = None
+
+    _gimp_edit_cut = _gimp_edit_clear
+
+    def _plug_in_gauss(self, _image, drawable, horizontal, vertical, _method):
+        if drawable.content is not None:
+            x_1, y_1, x_2, y_2 = drawable.content
+            drawable.content = _intersect(
+                drawable.extents, (x_1 - horizontal, y_1 - vertical, x_2 + horizontal,
+                                   y_2 + vertical))
+
+    def _script_fu_drop_shadow(self, image, drawable, off_x, off_y, blur, _colour, opacity,
+                               _allow_resize):
+        source = image.selection if image.selection is not None else drawable.content
+        shadow = Layer(image, "Drop Shadow", image.width, image.height, RGBA_IMAGE, opacity)
+        if source is not None:
+            shadow.content = image.clip((source[0] + off_x - blur, source[1] + off_y - blur,
+                                         source[2] + off_x + blur, source[3] + off_y + blur))
+        active = image.active_layer
+        image.insert_layer(shadow, image.layers.index(drawable) + 1)
+        image.active_layer = active
+
+
+class _Namespace(object):
+    ''' Stand-in for the ``gimp`` module. '''
+
+    Image = Image
+    Layer = Layer
+    PixelRgn = PixelRgn
+    Vectors = Vectors
+
+    @staticmethod
+    def Display(image):
+        _record("gimp.Display", (image,))
+
+    @staticmethod
+    def displays_flush():
+        _record("gimp.displays_flush", ())
+
+    @staticmethod
+    def progress_init(message=""):
+        _record("gimp.progress_init", (message,))
+
+    @staticmethod
+    def progress_update(percentage):
+        _record("gimp.progress_update", (percentage,))
+
+    @staticmethod
+    def delete(item):
+        _record("gimp.delete", (item,))
+
+    @staticmethod
+    def message(text):
+        _record("gimp.message", (text,))
+
+
+gimp = _Namespace()
+pdb = RecordingPDB()
+
+
+def register(proc_name, blurb, help_text, author, copyright_text, date, label, imagetypes,
+             params, results, function, menu=None, domain=None, on_query=None, on_run=None):
+    ''' Remember the registration so runners can find the entry point. '''
+    REGISTERED[proc_name] = {
+        "blurb": blurb, "help": help_text, "author": author, "copyright": copyright_text,
+        "date": date, "label": label, "imagetypes": imagetypes, "params": params,
+        "results": results, "function": function, "menu": menu, "domain": domain,
+        "on_query": on_query, "on_run": on_run,
+    }
+
+
+def main():
+    ''' The plug-in main loop: nothing to do outside GIMP. '''
+
+
+def default_args(proc_name):
+    ''' The default argument values of a registered procedure. '''
+    return [param[3] for param in REGISTERED[proc_name]["params"]]
+
+
+def load_plugin(path, gimpfu_module=None):
+    ''' Execute the plug-in at ``path`` with ``gimpfu_module`` (this module
+        by default) standing in for ``gimpfu`` and return it as a module.
+    '''
+    gimpfu_module = gimpfu_module or sys.modules[__name__]
+    path = os.path.abspath(path)
+    directory = os.path.dirname(path)
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+    previous = sys.modules.get("gimpfu")
+    sys.modules["gimpfu"] = gimpfu_module
+    try:
+        name = os.path.splitext(os.path.basename(path))[0]
+        module = types.ModuleType(name)
+        module.__file__ = path
+        with open(path) as source:
+            code = compile(source.read(), path, "exec")
+        sys.modules[name] = module
+        exec(code, module.__dict__)  # pylint: disable=W0122
+    finally:
+        if previous is None:
+            del sys.modules["gimpfu"]
+        else:
+            sys.modules["gimpfu"] = previous
+    return module
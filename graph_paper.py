@@ -5,9 +5,108 @@
     User defined size of image, and user defined size of Grid
 '''
 
+import os
+
 from gimpfu import *
+import graph_sheet
+import grid_engine
+import pdb_context
+import pdb_profiler
+
+## Time every PDB call when GIMP_PDB_PROFILE is set (see pdb_profiler.py)
+pdb = pdb_profiler.instrument(pdb)
+## Skip brush and colour sets the context already holds (see pdb_context.py)
+pdb = pdb_context.shadow(pdb)
+
+## How the grid lines are drawn
+PENCIL_LINES, STROKED_PATH, PIXEL_REGIONS = range(3)
+METHODS = ("Pencil, one call per line", "One stroked path", "Pixel regions")
+## Rows written to the layer at a time, one row of GIMP tiles
+BAND_ROWS = 64
+## What the sheet is made of: Image type, Layer type and graph_sheet pixel
+## format, and the graph_sheet format files are written in.  Black and
+## white is Indexed on a white, black colormap, which exports as 1 bit.
+RGB_SHEET, GRAY_SHEET, BITMAP_SHEET = range(3)
+COLOURS = ("RGB", "Grayscale", "Black and white (1 bit)")
+IMAGE_TYPES = ((RGB, RGB_IMAGE, graph_sheet.RGB),
+               (GRAY, GRAY_IMAGE, graph_sheet.GRAY),
+               (INDEXED, INDEXED_IMAGE, graph_sheet.INDEXED))
+FILE_FORMATS = (graph_sheet.RGB, graph_sheet.GRAY, graph_sheet.BITMAP)
+BLACK_AND_WHITE = [255, 255, 255, 0, 0, 0]
+## Grid Paper: the kinds of grid grid_engine.py draws, and the mm in an inch
+GRID_KINDS = (grid_engine.SQUARE, grid_engine.DOTS, grid_engine.ISOMETRIC, grid_engine.HEX)
+GRID_NAMES = ("Square", "Dots", "Isometric", "Hex")
+MM_PER_INCH = 25.4
+
+def grid_svg(width, height, vpoints, hpoints):
+    ''' SVG with a straight path per grid line, in image coordinates;
+        imported merged, they make a single path to stroke
+    '''
+    lines = [(x, 0, x, height) for x in vpoints]
+    lines += [(0, y, width, y) for y in hpoints]
+    paths = "".join(
+        '<path id="grid-%d" d="M %r,%r C %r,%r %r,%r %r,%r" />'
+        % ((index,) + line[:2] + line[:2] + line[2:] + line[2:])
+        for index, line in enumerate(lines))
+    return ('<svg xmlns="http://www.w3.org/2000/svg" width="%dpx" height="%dpx" '
+            'viewBox="0 0 %d %d">%s</svg>' % (width, height, width, height, paths))
+
+def draw_pencil_lines(background, width, height, vpoints, hpoints):
+    ''' One gimp_pencil call and progress update per line '''
+    progress = 1
+    for vpoint in vpoints:
+        pdb.gimp_pencil(background, 4, [vpoint, 0, vpoint, height])
+        gimp.progress_update(float(progress)/(len(vpoints)+len(hpoints)))
+        progress += 1
+    for hpoint in hpoints:
+        pdb.gimp_pencil(background, 4, [0, hpoint, width, hpoint])
+        gimp.progress_update(float(progress)/(len(vpoints)+len(hpoints)))
+        progress += 1
+
+def draw_stroked_path(img, background, width, height, vpoints, hpoints):
+    ''' Every line as a stroke of one path, stroked once with the pencil:
+        the same PDB calls for any number of lines
+    '''
+    svg = grid_svg(width, height, vpoints, hpoints)
+    gimp.progress_update(0.25)
+    if not vpoints and not hpoints:
+        return
+    _, vectors_ids = pdb.gimp_vectors_import_from_string(img, svg, -1, True, False)
+    ## The PDB hands back the ID of the path, not the path
+    grid = gimp.Vectors.from_id(vectors_ids[0])
+    gimp.progress_update(0.5)
+    pdb.gimp_context_set_paint_method("gimp-pencil")
+    pdb.gimp_context_set_stroke_method(STROKE_PAINT_METHOD)
+    pdb.gimp_drawable_edit_stroke_item(background, grid)
+    pdb.gimp_image_remove_vectors(img, grid)
+
+def write_rows(background, sheet):
+    ''' Write the rows of ``sheet`` (a graph_sheet.Sheet or grid_engine.Raster,
+        in the Layer's own pixel format) into the layer, a band at a time
+    '''
+    width, height = sheet.width, sheet.height
+    for y_1 in range(0, height, BAND_ROWS):
+        y_2 = min(y_1 + BAND_ROWS, height)
+        band = b"".join(sheet.rows(y_1, y_2))
+        region = background.get_pixel_rgn(0, y_1, width, y_2 - y_1, True, False)
+        region[0:width, y_1:y_2] = band
+        gimp.progress_update(float(y_2)/height)
+
+    background.flush()
+    background.update(0, 0, width, height)
+
+def draw_pixel_regions(background, width, height, grid_size, pixel_format):
+    ''' Write the lines straight into the layer, a band of rows at a time.
+        Only two rows exist: a blank row crossed by the Virtical lines and
+        a line row (see graph_sheet.py), so each is built once as bytes, in
+        the Layer's own pixel format, and every band is those rows joined.
+        The pencil's 1 pixel lines are whole pixel rows and columns, so the
+        result is the same.
+    '''
+    write_rows(background, graph_sheet.Sheet(width, height, grid_size, pixel_format))
 
-def generate_graph_paper(width, height, grid_size):
+@pdb_profiler.entry_point
+def generate_graph_paper(width, height, grid_size, method=PENCIL_LINES, colours=RGB_SHEET):
     ''' Generate a new Image containing the Graph Paper
         with the user supplied parameters, and display the new image
 
@@ -15,7 +114,11 @@ def generate_graph_paper(width, height, grid_size):
         width:     The width of the canvas in px
         height:    The height of the canvas in px
         grid_size: Spacing for the grid lines in px
+        method:    PENCIL_LINES, STROKED_PATH or PIXEL_REGIONS, see METHODS
+        colours:   RGB_SHEET, GRAY_SHEET or BITMAP_SHEET, see COLOURS
     '''
+    base_type, layer_type, pixel_format = IMAGE_TYPES[colours]
+
     ## Init the progress bar:
     gimp.progress_init("Generating Grid Lines")
 
@@ -23,15 +126,17 @@ def generate_graph_paper(width, height, grid_size):
     pdb.gimp_context_push()
 
     ## Create the Image, Set the Resolution to 72ppi
-    img = gimp.Image(width, height, RGB)
+    img = gimp.Image(width, height, base_type)
     pdb.gimp_image_set_resolution(img, 72.0, 72.0)
+    if base_type == INDEXED:
+        pdb.gimp_image_set_colormap(img, len(BLACK_AND_WHITE), BLACK_AND_WHITE)
 
     ## We are creating a new image: Disable UNDO
     pdb.gimp_image_undo_disable(img)
 
     ## Create the Drawable Layer and Add to the Image
     background = gimp.Layer(img, "Grid", width, height,
-                            RGB_IMAGE, 100, NORMAL_MODE)
+                            layer_type, 100, NORMAL_MODE)
     background.fill(WHITE_FILL)
     img.add_layer(background, -1)
 
@@ -40,39 +145,17 @@ def generate_graph_paper(width, height, grid_size):
     pdb.gimp_context_set_brush_size(1.0)
     pdb.gimp_context_set_foreground((0, 0, 0))
 
-    ## Number of Horizontal and Vertical lines
-    vlines = round(width/grid_size)
-    hlines = round(height/grid_size)
+    ## Virtical and Horizontal lines, centered on the Canvas
+    vpoints = graph_sheet.grid_lines(width, grid_size)
+    hpoints = graph_sheet.grid_lines(height, grid_size)
 
-    ## Init Progress
-    progress = 1
-
-    ## Add Virtical Lines
-    i = 0
-    ## We want the Grids to be centered on the Canvas
-    vpoint = round((width-(grid_size*vlines))/2)
-
-    while i <= vlines:
-        ## Do not draw line if along the edge of Canvas
-        if (vpoint > 0) & (vpoint < width):
-            pdb.gimp_pencil(background, 4, [vpoint, 0, vpoint, height])
-            gimp.progress_update(progress/(vlines+hlines))
-        i += 1
-        progress += 1
-        vpoint += grid_size
-
-    ## Add Horizontal Lines
-    i = 0
-    ## We want the Grids to be centered on the Canvas
-    hpoint = round((height-(grid_size*hlines))/2)
-    while i <= hlines:
-        ## Do not draw line if along the edge of Canvas
-        if (hpoint > 0) & (hpoint < height):
-            pdb.gimp_pencil(background, 4, [0, hpoint, width, hpoint])
-            gimp.progress_update(progress/(vlines+hlines))
-        i += 1
-        progress += 1
-        hpoint += grid_size
+    if method == PENCIL_LINES:
+        draw_pencil_lines(background, width, height, vpoints, hpoints)
+    elif method == PIXEL_REGIONS:
+        draw_pixel_regions(background, width, height, grid_size, pixel_format)
+    else:
+        draw_stroked_path(img, background, width, height, vpoints, hpoints)
+    gimp.progress_update(1.0)
 
     ## ReEnable UNDO
     pdb.gimp_image_undo_enable(img)
@@ -84,6 +167,24 @@ def generate_graph_paper(width, height, grid_size):
     gimp.Display(img)
     gimp.displays_flush()
 
+@pdb_profiler.entry_point
+def generate_graph_paper_file(width, height, grid_size, filename, processes,
+                              colours=RGB_SHEET):
+    ''' Write the Graph Paper straight to a PNG or tiled TIFF file, band by
+        band, without an Image: for sheets too large to hold
+
+    Parameters:
+        width:     The width of the sheet in px
+        height:    The height of the sheet in px
+        grid_size: Spacing for the grid lines in px
+        filename:  .png, or .tif / .tiff for a tiled TIFF
+        processes: Bands compressed at once on a process pool
+        colours:   RGB_SHEET, GRAY_SHEET or BITMAP_SHEET (1 bit), see COLOURS
+    '''
+    gimp.progress_init("Writing Graph Paper")
+    graph_sheet.write(filename, width, height, grid_size, processes, gimp.progress_update,
+                      FILE_FORMATS[colours])
+
 register(
         "python_fu_generate_graph_paper",
         "Graph Paper Generator",
@@ -101,4 +202,136 @@ register(
         [],
         generate_graph_paper, menu="<Image>/File/Create")
 
+register(
+        "python_fu_generate_graph_paper_custom",
+        "Graph Paper Generator",
+        "Generate Graph Paper, choosing how the lines are drawn and what the sheet is made of",
+        "Mike Watters",
+        "Mike Watters",
+        "2018",
+        "Graph Paper (custom)...",
+        " ",
+        [
+            (PF_INT, "width", "Width (px)", 612), ## default 8.5"
+            (PF_INT, "height", "Height (px)", 792), ## default 11"
+            (PF_INT, "grid_size", "Size of Grid (px)", 72), ## default 1" square
+            (PF_OPTION, "method", "Drawing", STROKED_PATH, METHODS),
+            (PF_OPTION, "colours", "Colours", RGB_SHEET, COLOURS)
+        ],
+        [],
+        generate_graph_paper, menu="<Image>/File/Create")
+
+def rgb(colour):
+    ''' (r, g, b) of 0-255 from a PF_COLOR argument: a gimpcolor.RGB,
+        whose channels are 0.0-1.0, or a tuple
+    '''
+    if hasattr(colour, "r"):
+        return tuple(int(round(value * 255)) for value in (colour.r, colour.g, colour.b))
+    return tuple(colour[:3])
+
+@pdb_profiler.entry_point
+def generate_grid_paper(width, height, resolution, kind, spacing, major_every,
+                        minor_weight, minor_colour, major_weight, major_colour,
+                        paper_colour, colours=RGB_SHEET):
+    ''' Generate a new Image with a square, dot, isometric or hex grid of
+        minor and major lines, at any spacing, and display the new image.
+        The grid is drawn antialiased by grid_engine.py and written into
+        the layer through pixel regions, so dense sheets take the same few
+        PDB calls as sparse ones.
+
+    Parameters:
+        width:        The width of the canvas in px
+        height:       The height of the canvas in px
+        resolution:   Resolution of the image in ppi, spacing is in mm at it
+        kind:         Index in GRID_KINDS
+        spacing:      Spacing of the minor lines in mm (1 mm at 300ppi is 11.811px)
+        major_every:  A major line every this many minor lines, 0 for none
+        minor_weight: Width of the minor lines (diameter of the dots) in px
+        minor_colour: Colour of the minor lines
+        major_weight: Width of the major lines in px
+        major_colour: Colour of the major lines
+        paper_colour: Colour of the paper
+        colours:      RGB_SHEET or GRAY_SHEET, see COLOURS
+    '''
+    levels = [grid_engine.Level(1, minor_weight, rgb(minor_colour))]
+    if major_every > 1:
+        levels.append(grid_engine.Level(major_every, major_weight, rgb(major_colour)))
+    grid = grid_engine.Grid(GRID_KINDS[kind], spacing * resolution / MM_PER_INCH,
+                            levels, rgb(paper_colour))
+    base_type, layer_type, _ = IMAGE_TYPES[colours]
+
+    ## Init the progress bar:
+    gimp.progress_init("Generating Grid")
+
+    ## Create the Image at the Resolution the spacing is measured in
+    img = gimp.Image(width, height, base_type)
+    pdb.gimp_image_set_resolution(img, resolution, resolution)
+
+    ## We are creating a new image: Disable UNDO
+    pdb.gimp_image_undo_disable(img)
+
+    ## Create the Drawable Layer and Add to the Image; every pixel of it
+    ## is written, paper included, so it needs no fill
+    background = gimp.Layer(img, "Grid", width, height,
+                            layer_type, 100, NORMAL_MODE)
+    img.add_layer(background, -1)
+
+    write_rows(background, grid_engine.Raster(grid, width, height,
+                                              3 if base_type == RGB else 1))
+    gimp.progress_update(1.0)
+
+    ## ReEnable UNDO
+    pdb.gimp_image_undo_enable(img)
+
+    ## Show New Image
+    gimp.Display(img)
+    gimp.displays_flush()
+
+register(
+        "python_fu_generate_graph_paper_file",
+        "Graph Paper File Writer",
+        "Write Graph Paper straight to a PNG or tiled TIFF, for sheets too large to hold",
+        "Mike Watters",
+        "Mike Watters",
+        "2018",
+        "",
+        "",
+        [
+            (PF_INT, "width", "Width (px)", 612),
+            (PF_INT, "height", "Height (px)", 792),
+            (PF_INT, "grid_size", "Size of Grid (px)", 72),
+            (PF_STRING, "filename", "PNG or TIFF file",
+             os.path.join(os.getcwd(), "graph-paper.png")),
+            (PF_INT, "processes", "Processes", 1),
+            (PF_OPTION, "colours", "Colours", RGB_SHEET, COLOURS)
+        ],
+        [],
+        generate_graph_paper_file)
+
+register(
+        "python_fu_generate_grid_paper",
+        "Grid Paper Generator",
+        "Generate square, dot, isometric or hex paper with minor and major lines",
+        "Mike Watters",
+        "Mike Watters",
+        "2018",
+        "Grid Paper...",
+        " ",
+        [
+            (PF_INT, "width", "Width (px)", 2480), ## default A4 at 300ppi
+            (PF_INT, "height", "Height (px)", 3508),
+            (PF_FLOAT, "resolution", "Resolution (ppi)", 300.0),
+            (PF_OPTION, "kind", "Grid", 0, GRID_NAMES),
+            (PF_FLOAT, "spacing", "Spacing (mm)", 1.0),
+            (PF_INT, "major_every", "Major line every (lines, 0 for none)", 10),
+            (PF_FLOAT, "minor_weight", "Minor line width (px)", 1.0),
+            (PF_COLOR, "minor_colour", "Minor line colour", (150, 190, 230)),
+            (PF_FLOAT, "major_weight", "Major line width (px)", 2.0),
+            (PF_COLOR, "major_colour", "Major line colour", (40, 90, 170)),
+            (PF_COLOR, "paper_colour", "Paper colour", (255, 255, 255)),
+            (PF_OPTION, "colours", "Colours", RGB_SHEET, COLOURS[:2])
+        ],
+        [],
+        generate_grid_paper, menu="<Image>/File/Create")
+
 main()
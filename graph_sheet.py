@@ -0,0 +1,230 @@
+# vim: expandtab:ts=4:sw=4
+''' graph_sheet.py
+
+    Graph paper written straight to a file, without a GIMP image, for
+    sheets too large to hold (wall charts, plotter output).  A sheet has
+    only two distinct rows, a blank row crossed by the vertical lines and
+    a line row, so only those two are built and memory follows the width,
+    not the area.  PNGs are written a band of rows at a time, tiled TIFFs
+    a row of tiles at a time.  With processes > 1 the bands are compressed
+    on a process pool and written in order.
+
+    The lines are where generate_graph_paper (graph_paper.py) puts them,
+    see grid_lines(): black 1 pixel lines on white, as 8-bit RGB, 8-bit
+    grey or 1-bit pixels (FORMATS).  The rows also come as indices into a
+    white, black colormap, for GIMP's indexed layers.
+
+    Plain Python, so GIMP's Python 2 runs it too.
+
+    Usage:
+        python graph_sheet.py sheet.png 20000 30000 72 [--processes 4]
+        python graph_sheet.py sheet.tif 20000 30000 72 [--format bitmap]
+'''
+
+from __future__ import print_function
+
+import multiprocessing
+import os
+
+import png_writer
+import tiff_writer
+
+# Rows compressed at a time (or by one pool task) for a PNG
+BAND_ROWS = 256
+# Pixel formats: bytes a pixel (0: 8 pixels a byte) and the ink and
+# paper values; the lines are black on white
+RGB, GRAY, INDEXED, BITMAP = "rgb", "gray", "indexed", "bitmap"
+FORMATS = {
+    RGB: (3, 0, 255),
+    GRAY: (1, 0, 255),
+    INDEXED: (1, 1, 0),
+    BITMAP: (0, 0, 1),
+}
+# What the files are written as: PNG colour type and TIFF samples, bits
+FILE_FORMATS = {
+    RGB: (png_writer.RGB, 3, 8),
+    GRAY: (png_writer.GRAY, 1, 8),
+    BITMAP: (png_writer.GRAY, 1, 1),
+}
+
+
+def grid_lines(length, grid_size):
+    ''' Positions of the grid lines across ``length`` px, centred on it,
+        leaving out lines along the edges of the canvas.  In whole pixels,
+        as GIMP's Python 2 placed them (whole squares, the margin halved
+        and rounded up), on either interpreter.
+    '''
+    lines = length // grid_size
+    point = (length - grid_size * lines + 1) // 2
+    positions = []
+    i = 0
+    while i <= lines:
+        if 0 < point < length:
+            positions.append(point)
+        i += 1
+        point += grid_size
+    return positions
+
+
+class Sheet(object):
+    ''' The two rows of a ``width`` x ``height`` sheet with ``grid_size``
+        squares in ``pixel_format`` (see FORMATS), and which rows are lines.
+    '''
+
+    def __init__(self, width, height, grid_size, pixel_format=RGB):
+        self.width = width
+        self.height = height
+        self.grid_size = grid_size
+        self.pixel_format = pixel_format
+        bpp, ink, paper = FORMATS[pixel_format]
+        vpoints = [int(vpoint) for vpoint in grid_lines(width, grid_size)]
+        if bpp:
+            self.paper = paper
+            blank = bytearray([paper]) * (width * bpp)
+            for vpoint in vpoints:
+                blank[vpoint * bpp:(vpoint + 1) * bpp] = bytearray([ink]) * bpp
+            line = bytearray([ink]) * (width * bpp)
+        else:
+            # Bits past the last pixel of a row are paper too
+            self.paper = 0xff if paper else 0
+            blank = bytearray([self.paper]) * ((width + 7) // 8)
+            for vpoint in vpoints:
+                blank[vpoint >> 3] ^= 0x80 >> (vpoint & 7)
+            line = bytearray([0xff - self.paper]) * ((width + 7) // 8)
+        self.blank = bytes(blank)
+        self.line = bytes(line)
+        self.hpoints = set(int(hpoint) for hpoint in grid_lines(height, grid_size))
+
+    def span(self, pixels):
+        ''' Bytes of ``pixels`` pixels of a row (a multiple of 8 for BITMAP). '''
+        bpp = FORMATS[self.pixel_format][0]
+        return pixels * bpp if bpp else pixels // 8
+
+    def row(self, y_pos):
+        return self.line if y_pos in self.hpoints else self.blank
+
+    def rows(self, y_1, y_2):
+        return [self.row(y_pos) for y_pos in range(y_1, y_2)]
+
+
+_SHEET = []
+
+
+def _sheet(width, height, grid_size, pixel_format):
+    ''' The Sheet, built once per process for all the bands it does. '''
+    key = (width, height, grid_size, pixel_format)
+    if not _SHEET or _SHEET[0][0] != key:
+        _SHEET[:] = [(key, Sheet(*key))]
+    return _SHEET[0][1]
+
+
+def _png_band(job):
+    key, y_1, y_2 = job
+    return png_writer.deflate_rows(_sheet(*key).rows(y_1, y_2))
+
+
+def _tiff_tiles(job):
+    ''' The compressed tiles of one row of tiles, padded with paper. '''
+    key, tile_size, y_1 = job
+    sheet = _sheet(*key)
+    padded = sheet.span(tile_size)
+    paper = bytes(bytearray([sheet.paper]) * padded)
+    rows = [sheet.row(y_pos) if y_pos < sheet.height else None
+            for y_pos in range(y_1, y_1 + tile_size)]
+    tiles = []
+    for x_1 in range(0, len(sheet.blank), padded):
+        tile = b"".join(paper if row is None else row[x_1:x_1 + padded].ljust(padded, paper[:1])
+                        for row in rows)
+        tiles.append(tiff_writer.deflate_tile(tile))
+    return tiles
+
+
+def _fork_pool(processes):
+    ''' A pool of forked workers, or None where processes cannot be forked:
+        spawned ones would import the plug-in, and gimpfu, all over again.
+    '''
+    if os.name == "nt":
+        return None
+    try:
+        context = multiprocessing.get_context("fork")
+    except AttributeError:
+        # Python 2 always forks on POSIX
+        context = multiprocessing
+    return context.Pool(processes)
+
+
+def _results(function, jobs, processes):
+    ''' function(job) for every job, in order, on a pool if processes > 1
+        and they can be forked.
+    '''
+    pool = _fork_pool(processes) if processes > 1 else None
+    if pool is None:
+        for job in jobs:
+            yield function(job)
+        return
+    try:
+        for result in pool.imap(function, jobs):
+            yield result
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+
+def write_png(path, width, height, grid_size, processes=1, progress=None, pixel_format=RGB):
+    key = (width, height, grid_size, pixel_format)
+    colour_type, _, bits = FILE_FORMATS[pixel_format]
+    jobs = [(key, y_1, min(y_1 + BAND_ROWS, height)) for y_1 in range(0, height, BAND_ROWS)]
+    with png_writer.PNGWriter(path, width, height, colour_type, bit_depth=bits) as writer:
+        for done, band in enumerate(_results(_png_band, jobs, processes)):
+            writer.write_deflated(*band)
+            if progress is not None:
+                progress(float(done + 1) / len(jobs))
+
+
+def write_tiff(path, width, height, grid_size, processes=1, progress=None, pixel_format=RGB,
+               tile_size=tiff_writer.TILE_SIZE):
+    key = (width, height, grid_size, pixel_format)
+    _, samples, bits = FILE_FORMATS[pixel_format]
+    jobs = [(key, tile_size, y_1) for y_1 in range(0, height, tile_size)]
+    with tiff_writer.TIFFWriter(path, width, height, samples, tile_size, bits=bits) as writer:
+        for done, tiles in enumerate(_results(_tiff_tiles, jobs, processes)):
+            for tile in tiles:
+                writer.write_tile(tile, compressed=True)
+            if progress is not None:
+                progress(float(done + 1) / len(jobs))
+
+
+def write(path, width, height, grid_size, processes=1, progress=None, pixel_format=RGB):
+    ''' Write the sheet to ``path``: a tiled TIFF for .tif / .tiff, a PNG
+        otherwise, as RGB, GRAY or BITMAP; ``progress(fraction)`` is called
+        as bands are written.
+    '''
+    if path.lower().endswith((".tif", ".tiff")):
+        write_tiff(path, width, height, grid_size, processes, progress, pixel_format)
+    else:
+        write_png(path, width, height, grid_size, processes, progress, pixel_format)
+
+
+def main(argv=None):
+    ''' Write a graph paper sheet to a PNG or tiled TIFF without GIMP. '''
+    import argparse
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("path", help="sheet.png, or sheet.tif for a tiled TIFF")
+    parser.add_argument("width", type=int, help="width (px)")
+    parser.add_argument("height", type=int, help="height (px)")
+    parser.add_argument("grid_size", type=int, help="size of grid (px)")
+    parser.add_argument("--format", choices=sorted(FILE_FORMATS), default=RGB,
+                        help="8-bit RGB (default), 8-bit gray or 1-bit bitmap")
+    parser.add_argument("--processes", type=int, default=1, metavar="N",
+                        help="compress bands on N processes (default: 1)")
+    options = parser.parse_args(argv)
+    write(options.path, options.width, options.height, options.grid_size, options.processes,
+          pixel_format=options.format)
+
+
+if __name__ == "__main__":
+    main()
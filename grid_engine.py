@@ -0,0 +1,431 @@
+# vim: expandtab:ts=4:sw=4
+''' grid_engine.py
+
+    Ruled paper beyond graph_paper.py's one square grid: square grids with
+    minor and major lines of their own weight and colour (engineering
+    paper), dot grids, isometric grids and hex grids, at any spacing,
+    fractional ones included (1 mm at 300 ppi is 11.811 px).
+
+    Positions are in pixels, a line or dot at x is centred on pixel column
+    x, and grids are centred on the sheet the way graph_sheet.grid_lines()
+    centres them, so whole spacings give crisp lines where it puts them.
+    Pixels are antialiased: a pixel takes the share of it a line covers,
+    exactly for the straight lines of a square grid, and with the usual
+    distance estimate for slanted lines and dots.  Levels are drawn in
+    order over the paper, so major lines paint over minor ones.
+
+    Raster builds the sheet a row at a time, as bytes for a pixel region
+    or png_writer, so a sheet is drawn with the same few PDB calls however
+    many lines, dots or cells it has.
+
+    Plain Python, so GIMP's Python 2 runs it too.
+
+    Usage:
+        grid = Grid(SQUARE, 11.811, [Level(1, 1.0, (150, 190, 230)),
+                                     Level(10, 2.0, (40, 90, 170))])
+        raster = Raster(grid, 2480, 3508)
+        raster.rows(0, 64)  # RGB bytes of the first 64 rows
+    or
+        python grid_engine.py sheet.png 2480 3508 11.811 --kind hex
+'''
+
+from __future__ import division, print_function
+
+import math
+
+import png_writer
+
+SQUARE, DOTS, ISOMETRIC, HEX = "square", "dots", "isometric", "hex"
+KINDS = (SQUARE, DOTS, ISOMETRIC, HEX)
+# Rows written to a PNG at a time
+BAND_ROWS = 64
+# Rows of the sheet whose stamps are sorted together
+BUCKET_ROWS = 8
+# Rows a Raster keeps built, for grids whose line rows repeat
+ROW_CACHE = 64
+# Weights of R, G and B in the grey of a colour (GIMP's luminance)
+LUMINANCE = (0.2126, 0.7152, 0.0722)
+SQRT_3 = math.sqrt(3.0)
+
+
+class Level(object):
+    ''' Every ``every``-th line (or dot) of a grid, ``weight`` px wide (the
+        diameter of a dot) in ``colour``, an (r, g, b) of 0-255.
+    '''
+
+    def __init__(self, every=1, weight=1.0, colour=(0, 0, 0)):
+        if weight <= 0:
+            raise ValueError("line weight %r is not positive" % (weight,))
+        self.every = max(1, int(every))
+        self.weight = float(weight)
+        self.colour = tuple(int(value) for value in colour[:3])
+
+    def __repr__(self):
+        return "Level(%d, %r, %r)" % (self.every, self.weight, self.colour)
+
+
+def origin(length, period):
+    ''' Where a line every ``period`` px falls so the grid is centred on
+        ``length`` px, as graph_sheet.grid_lines() centres it: whole periods,
+        and the margin left halved and rounded up to a whole pixel, alike on
+        Python 2 and 3.
+    '''
+    margin = length - period * math.floor(length / period)
+    return int(math.floor((margin + 1) / 2))
+
+
+def positions(length, spacing, period=None):
+    ''' (position, index) of the lines ``spacing`` px apart across
+        ``length`` px, leaving out lines along the edges; index 0 is on a
+        line every ``period`` px (the coarsest level's) centred on it.
+    '''
+    first = origin(length, period or spacing)
+    index = int(math.ceil(-first / spacing))
+    lines = []
+    while first + index * spacing < length:
+        position = first + index * spacing
+        if position > 0:
+            lines.append((position, index))
+        index += 1
+    return lines
+
+
+def coverage(distance, radius, peak):
+    ''' Share of a pixel covered by a line (or dot) ``radius`` px wide each
+        side of its centre, ``distance`` px from the pixel's; at most
+        ``peak``, the share of a pixel the thinnest lines and dots fill.
+    '''
+    return min(peak, radius + 0.5 - distance, 1.0)
+
+
+class Grid(object):
+    ''' A ``kind`` of grid (see KINDS) ``spacing`` px apart, drawn with
+        ``levels``, Levels from the finest up, on ``paper`` (r, g, b).
+
+        Spacing is between neighbouring lines for SQUARE and DOTS, between
+        parallel lines for ISOMETRIC (vertical ones and both diagonals at
+        30 degrees), and between the centres of neighbouring cells for HEX
+        (pointy-topped, the cell's width across the flats).  Hex cells
+        share their edges, so a HEX grid is drawn with its first level.
+    '''
+
+    def __init__(self, kind, spacing, levels=None, paper=(255, 255, 255)):
+        if kind not in KINDS:
+            raise ValueError("unknown grid %r, not one of %s" % (kind, ", ".join(KINDS)))
+        if spacing <= 0:
+            raise ValueError("grid spacing %r is not positive" % (spacing,))
+        self.kind = kind
+        self.spacing = float(spacing)
+        self.levels = list(levels or [Level()])
+        self.paper = tuple(int(value) for value in paper[:3])
+
+    @property
+    def period(self):
+        ''' Spacing of the coarsest level's lines. '''
+        return self.spacing * max(level.every for level in self.levels)
+
+    def level(self, *indices):
+        ''' Number of the last level all ``indices`` are multiples of. '''
+        for number in range(len(self.levels) - 1, -1, -1):
+            if all(index % self.levels[number].every == 0 for index in indices):
+                return number
+        return None
+
+    def lines(self, length):
+        ''' (position, level number) of the lines of a SQUARE grid across
+            ``length`` px, the columns or rows of its dots.
+        '''
+        return [(position, self.level(index))
+                for position, index in positions(length, self.spacing, self.period)]
+
+    def cells(self, width, height):
+        ''' Centres of the HEX cells on a ``width`` x ``height`` sheet. '''
+        return [point for _, point, centre in self._lattice(width, height) if centre]
+
+    def stamps(self, width, height):
+        ''' Everything the grid draws on a ``width`` x ``height`` sheet:
+            segments (x_1, y_1, x_2, y_2, radius, peak, level number), dots
+            being segments that start where they end.
+        '''
+        stamps = []
+        if self.kind == DOTS:
+            rows = positions(height, self.spacing, self.period)
+            for x_pos, x_index in positions(width, self.spacing, self.period):
+                for y_pos, y_index in rows:
+                    self._stamp(stamps, (x_pos, y_pos, x_pos, y_pos), self.level(x_index, y_index),
+                                dot=True)
+        elif self.kind == SQUARE:
+            for x_pos, number in self.lines(width):
+                self._stamp(stamps, (x_pos, -1, x_pos, height), number)
+            for y_pos, number in self.lines(height):
+                self._stamp(stamps, (-1, y_pos, width, y_pos), number)
+        elif self.kind == ISOMETRIC:
+            self._isometric(stamps, width, height)
+        else:
+            self._hex(stamps, width, height)
+        return stamps
+
+    def _stamp(self, stamps, segment, number, dot=False):
+        if number is None:
+            return
+        radius = self.levels[number].weight / 2
+        peak = min(1.0, math.pi * radius * radius if dot else 2 * radius)
+        stamps.append(tuple(segment) + (radius, peak, number))
+
+    def _isometric(self, stamps, width, height):
+        ''' Vertical lines ``spacing`` apart, and the two families of lines
+            at 30 degrees through the points where the triangles meet.
+        '''
+        spacing = self.spacing
+        side = 2 * spacing / SQRT_3
+        every = max(level.every for level in self.levels)
+        for x_pos, index in positions(width, spacing, spacing * every):
+            self._stamp(stamps, (x_pos, -1, x_pos, height), self.level(index))
+        x_0 = origin(width, spacing * every)
+        y_0 = origin(height, side * every)
+        slope = side / 2 / spacing
+        left, right = -1, width
+        rise = slope * (right - left)
+        first = int(math.floor((-1 - y_0 - rise) / side)) - 1
+        last = int(math.ceil((height - y_0 + rise) / side)) + 1
+        for index in range(first, last + 1):
+            y_pos = y_0 + index * side
+            self._stamp(stamps, (left, y_pos + slope * (left - x_0),
+                                 right, y_pos + slope * (right - x_0)), self.level(index))
+            self._stamp(stamps, (left, y_pos - slope * (left - x_0),
+                                 right, y_pos - slope * (right - x_0)), self.level(index))
+
+    def _lattice(self, width, height):
+        ''' ((index, step), (x, y), is a cell centre) of the points of the
+            triangular lattice under a HEX grid, with a margin of one cell:
+            columns half a cell apart, points a side apart down a column
+            and shifted half a side from one column to the next.
+        '''
+        column = self.spacing / 2
+        side = 2 * column / SQRT_3
+        x_0 = origin(width, self.spacing)
+        y_0 = origin(height, side * 3)
+        points = []
+        for index in range(int(math.floor((-x_0 - self.spacing) / column)),
+                           int(math.ceil((width - x_0 + self.spacing) / column)) + 1):
+            for step in range(int(math.floor((-y_0 - 2 * side) / side - index / 2)),
+                              int(math.ceil((height - y_0 + 2 * side) / side - index / 2)) + 1):
+                points.append(((index, step),
+                               (x_0 + index * column, y_0 + (step + index / 2) * side),
+                               (index - step) % 3 == 0))
+        return points
+
+    def _hex(self, stamps, width, height):
+        ''' The edges of the triangular lattice that join two corners of
+            cells: every third point is a cell's centre.
+        '''
+        points = self._lattice(width, height)
+        where = dict((key, point) for key, point, _ in points)
+        number = 0
+        for (index, step), point, centre in points:
+            if centre:
+                continue
+            for d_index, d_step in ((1, 0), (0, 1), (-1, 1)):
+                end = where.get((index + d_index, step + d_step))
+                if end is not None and (index + d_index - step - d_step) % 3:
+                    self._stamp(stamps, point + end, number)
+
+
+class Raster(object):
+    ''' The rows of ``grid`` on a ``width`` x ``height`` sheet, 3 bytes a
+        pixel (RGB) or 1 (grey), built as they are asked for.  Square grids
+        are separable: the columns' and each row's coverage are worked out
+        once and a row only sets the pixels where a line is.  Other grids
+        sort their stamps by the rows they reach and stamp each row with
+        its own.
+    '''
+
+    def __init__(self, grid, width, height, channels=3):
+        if channels not in (1, 3):
+            raise ValueError("%d channels is neither grey nor RGB" % channels)
+        self.grid = grid
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.inks = [self._colour(level.colour) for level in grid.levels]
+        self.paper = self._colour(grid.paper)
+        self._pixels = {}
+        self.blank = self._pixel((0,) * len(grid.levels)) * width
+        self._built = {}
+        if grid.kind == SQUARE:
+            self._columns = self._profiles(width)
+            self._rows = self._profiles(height)
+            self._inked = [x_pos for x_pos in range(width)
+                           if any(profile[x_pos] for profile in self._columns)]
+        else:
+            self._buckets = {}
+            for stamp in grid.stamps(width, height):
+                x_1, y_1, x_2, y_2, radius, peak, number = stamp
+                reach = radius + 0.5
+                top = max(0, int(math.ceil(min(y_1, y_2) - reach)))
+                bottom = min(height - 1, int(math.floor(max(y_1, y_2) + reach)))
+                d_x, d_y = x_2 - x_1, y_2 - y_1
+                prepared = (x_1, y_1, d_x, d_y, d_x * d_x + d_y * d_y, reach, peak, number)
+                for bucket in range(top // BUCKET_ROWS, bottom // BUCKET_ROWS + 1):
+                    self._buckets.setdefault(bucket, []).append(prepared)
+
+    def _colour(self, rgb):
+        if self.channels == 1:
+            return [sum(weight * value for weight, value in zip(LUMINANCE, rgb))]
+        return [float(value) for value in rgb]
+
+    def _pixel(self, shares):
+        ''' Bytes of a pixel each level covers by shares[level] / 255. '''
+        pixel = self._pixels.get(shares)
+        if pixel is None:
+            values = self.paper
+            for ink, share in zip(self.inks, shares):
+                if share:
+                    values = [value + (colour - value) * share / 255.0
+                              for value, colour in zip(values, ink)]
+            pixel = bytes(bytearray(int(value + 0.5) for value in values))
+            self._pixels[shares] = pixel
+        return pixel
+
+    def _profiles(self, length):
+        ''' Coverage of every column (or row) by each level's lines. '''
+        profiles = [[0.0] * length for _ in self.grid.levels]
+        for position, number in self.grid.lines(length):
+            if number is None:
+                continue
+            radius = self.grid.levels[number].weight / 2
+            peak = min(1.0, 2 * radius)
+            profile = profiles[number]
+            for pixel in range(max(0, int(math.ceil(position - radius - 0.5))),
+                               min(length - 1, int(math.floor(position + radius + 0.5))) + 1):
+                share = coverage(abs(pixel - position), radius, peak)
+                if share > profile[pixel]:
+                    profile[pixel] = share
+        return profiles
+
+    def row(self, y_pos):
+        ''' Bytes of row ``y_pos``. '''
+        if self.grid.kind == SQUARE:
+            key = tuple(int(profile[y_pos] * 255 + 0.5) for profile in self._rows)
+            row = self._built.get(key)
+            if row is None:
+                row = self._square_row(key)
+                if len(self._built) >= ROW_CACHE:
+                    self._built.clear()
+                self._built[key] = row
+            return row
+        return self._stamped_row(y_pos)
+
+    def rows(self, y_1, y_2):
+        return [self.row(y_pos) for y_pos in range(y_1, y_2)]
+
+    def _square_row(self, across):
+        ''' A row crossed by the levels' lines by ``across`` / 255. '''
+        row = bytearray(self._pixel(across) * self.width)
+        size = self.channels
+        for x_pos in self._inked:
+            shares = tuple(max(across[number], int(profile[x_pos] * 255 + 0.5))
+                           for number, profile in enumerate(self._columns))
+            row[x_pos * size:(x_pos + 1) * size] = self._pixel(shares)
+        return bytes(row)
+
+    def _stamped_row(self, y_pos):
+        ''' A row with every stamp that reaches it: the pixels within reach
+            of a stamp take coverage() of their distance to it.
+        '''
+        covered = {}
+        levels = len(self.grid.levels)
+        last = self.width - 1
+        for x_1, y_1, d_x, d_y, length, reach, peak, number in self._buckets.get(
+                y_pos // BUCKET_ROWS, ()):
+            # Part of the segment within reach of the row, from along = t_1 to t_2
+            if d_y:
+                t_1 = (y_pos - reach - y_1) / d_y
+                t_2 = (y_pos + reach - y_1) / d_y
+                if t_1 > t_2:
+                    t_1, t_2 = t_2, t_1
+                t_1, t_2 = max(0.0, t_1), min(1.0, t_2)
+                if t_1 > t_2:
+                    continue
+            elif abs(y_pos - y_1) > reach:
+                continue
+            else:
+                t_1, t_2 = 0.0, 1.0
+            x_a, x_b = x_1 + d_x * t_1, x_1 + d_x * t_2
+            if x_a > x_b:
+                x_a, x_b = x_b, x_a
+            across = y_pos - y_1
+            for x_pos in range(max(0, int(math.ceil(x_a - reach))),
+                               min(last, int(math.floor(x_b + reach))) + 1):
+                along = ((x_pos - x_1) * d_x + across * d_y) / length if length else 0.0
+                if along < 0.0:
+                    along = 0.0
+                elif along > 1.0:
+                    along = 1.0
+                e_x = x_pos - x_1 - along * d_x
+                e_y = across - along * d_y
+                share = reach - math.sqrt(e_x * e_x + e_y * e_y)
+                if share <= 0.0:
+                    continue
+                if share > peak:
+                    share = peak
+                shares = covered.get(x_pos)
+                if shares is None:
+                    shares = covered[x_pos] = [0.0] * levels
+                if share > shares[number]:
+                    shares[number] = share
+        if not covered:
+            return self.blank
+        row = bytearray(self.blank)
+        size = self.channels
+        for x_pos, shares in covered.items():
+            row[x_pos * size:(x_pos + 1) * size] = self._pixel(
+                tuple(int(share * 255 + 0.5) for share in shares))
+        return bytes(row)
+
+
+def write_png(path, raster, progress=None):
+    ''' Write ``raster`` to a PNG a band of rows at a time; ``progress``
+        (fraction) is called as bands are written.
+    '''
+    colour_type = png_writer.RGB if raster.channels == 3 else png_writer.GRAY
+    with png_writer.PNGWriter(path, raster.width, raster.height, colour_type) as writer:
+        for y_1 in range(0, raster.height, BAND_ROWS):
+            y_2 = min(y_1 + BAND_ROWS, raster.height)
+            writer.write_deflated(*png_writer.deflate_rows(raster.rows(y_1, y_2)))
+            if progress is not None:
+                progress(float(y_2) / raster.height)
+
+
+def _colour(text):
+    return tuple(int(value) for value in text.split(","))
+
+
+def main(argv=None):
+    ''' Write a square, dot, isometric or hex grid to a PNG without GIMP. '''
+    import argparse
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("path", help="sheet.png")
+    parser.add_argument("width", type=int, help="width (px)")
+    parser.add_argument("height", type=int, help="height (px)")
+    parser.add_argument("spacing", type=float, help="spacing of the minor lines (px)")
+    parser.add_argument("--kind", choices=KINDS, default=SQUARE)
+    parser.add_argument("--weight", type=float, default=1.0, help="minor line weight (px)")
+    parser.add_argument("--colour", type=_colour, default=(0, 0, 0), metavar="R,G,B")
+    parser.add_argument("--major", type=int, default=0, metavar="N",
+                        help="a major line every N minor lines")
+    parser.add_argument("--major-weight", type=float, default=2.0)
+    parser.add_argument("--major-colour", type=_colour, default=(0, 0, 0), metavar="R,G,B")
+    parser.add_argument("--gray", action="store_true", help="8-bit grey instead of RGB")
+    options = parser.parse_args(argv)
+    levels = [Level(1, options.weight, options.colour)]
+    if options.major > 1:
+        levels.append(Level(options.major, options.major_weight, options.major_colour))
+    grid = Grid(options.kind, options.spacing, levels)
+    write_png(options.path, Raster(grid, options.width, options.height,
+                                   1 if options.gray else 3))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# vim: expandtab:ts=4:sw=4
+''' layer_memory.py
+
+    What the layers of an image cost.  For every layer: its size and
+    offsets, bytes per pixel, the bytes GIMP allocates for it and the
+    share of its pixels that are not fully transparent, then the total
+    for the image.  Layers as large as the canvas that are mostly
+    transparent are flagged: cropping those to their content (Crystal
+    Tux's crop option, plug_in_autocrop_layer), merging or flattening is
+    where memory is won.
+
+    Only the layers are counted, not the undo history, the selection or
+    saved channels.
+
+    Usage, from a plug-in:
+        layer_memory.emit(image, "-")           table on stderr
+        layer_memory.emit(image, "/tmp/m.txt")  table written to the file
+        layer_memory.emit(image, "/tmp/m.json") JSON written to the file
+'''
+
+from __future__ import print_function
+
+import json
+import sys
+
+# Full-canvas layers with less than this share of visible pixels are flagged
+SPARSE = 0.25
+# Rows read at a time, so counting a layer holds only a band of it
+BAND_ROWS = 256
+
+
+def has_alpha(layer):
+    return getattr(layer, "has_alpha", layer.bpp in (2, 4))
+
+
+def coverage(layer):
+    ''' Share of the layer's pixels that are not fully transparent. '''
+    if not has_alpha(layer):
+        return 1.0
+    if not layer.width or not layer.height:
+        return 0.0
+    bpp = layer.bpp
+    visible = 0
+    for y_1 in range(0, layer.height, BAND_ROWS):
+        y_2 = min(y_1 + BAND_ROWS, layer.height)
+        region = layer.get_pixel_rgn(0, y_1, layer.width, y_2 - y_1, False, False)
+        alpha = region[0 : layer.width, y_1:y_2][bpp - 1 :: bpp]
+        visible += len(alpha) - alpha.count(b"\0")
+    return float(visible) / (layer.width * layer.height)
+
+
+def layers(image):
+    ''' One dict per layer, top first. '''
+    canvas = image.width * image.height
+    rows = []
+    for layer in image.layers:
+        share = coverage(layer)
+        rows.append({
+            "name": layer.name,
+            "width": layer.width,
+            "height": layer.height,
+            "offsets": list(layer.offsets),
+            "bpp": layer.bpp,
+            "bytes": layer.width * layer.height * layer.bpp,
+            "coverage": share,
+            "sparse": layer.width * layer.height >= canvas and share < SPARSE,
+        })
+    return rows
+
+
+def as_dict(image):
+    rows = layers(image)
+    return {
+        "width": image.width,
+        "height": image.height,
+        "layers": rows,
+        "bytes": sum(row["bytes"] for row in rows),
+        "sparse_bytes": sum(row["bytes"] for row in rows if row["sparse"]),
+    }
+
+
+def report(image, stream=None):
+    ''' Print the layers, their total and the flagged ones' share of it. '''
+    stream = stream or sys.stdout
+    summary = as_dict(image)
+    rows = summary["layers"]
+    width = max([len("Layer")] + [len(row["name"]) for row in rows])
+    print("%-*s %11s %11s %3s %11s %8s" % (width, "Layer", "size", "offsets", "bpp",
+                                           "KB", "visible"), file=stream)
+    for row in rows:
+        print("%-*s %11s %11s %3d %11.1f %7.1f%%%s" % (
+            width, row["name"], "%dx%d" % (row["width"], row["height"]),
+            "%d,%d" % tuple(row["offsets"]), row["bpp"], row["bytes"] / 1024.0,
+            row["coverage"] * 100.0, "  mostly empty full canvas" if row["sparse"] else ""),
+            file=stream)
+    print(file=stream)
+    print("%d layers on %dx%d, %.1f MB; %.1f MB in mostly empty full-canvas layers"
+          % (len(rows), image.width, image.height, summary["bytes"] / 1048576.0,
+             summary["sparse_bytes"] / 1048576.0), file=stream)
+
+
+def emit(image, destination):
+    ''' Write the report to "-" (stderr), a .json file or a text file. '''
+    if destination in ("-", "1", "stderr"):
+        report(image, sys.stderr)
+    elif destination.endswith(".json"):
+        with open(destination, "w") as stream:
+            json.dump(as_dict(image), stream, indent=2, sort_keys=True)
+            stream.write("\n")
+    else:
+        with open(destination, "w") as stream:
+            report(image, stream)
@@ -0,0 +1,141 @@
+# vim: expandtab:ts=4:sw=4
+''' mask_cache.py
+
+    Persistent cache of rasterized masks for gimpfu_numpy.py: filled part
+    outlines, shrunk and grown selections and blurred layer windows, which
+    only depend on the path data, the canvas size and the parameters.
+
+    Every entry is one .npy file named after a SHA-1 of its inputs, in a
+    directory per canvas size, and is loaded memory-mapped read-only, so a
+    hit costs neither a copy nor the rasterization.  The inputs say how an
+    array was made -- the outline, then the selection and painting
+    operations on it -- rather than holding its pixels, and only the part
+    of the canvas around what is covered is stored.  Past ``max_bytes`` the
+    least recently used files (by modification time, touched on every hit)
+    are deleted.  Processes may share a directory: files are written under
+    a temporary name and renamed into place.
+
+    Usage:
+        python gimpfu_numpy.py Crystal_Tux.py --mask-cache ~/.cache/tux-masks
+'''
+
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+
+MAX_BYTES = 1024 * 1024 * 1024
+
+
+def digest(*inputs):
+    ''' SHA-1 of arrays (dtype, shape and data), lists of them and reprs. '''
+    sha = hashlib.sha1()
+
+    def update(value):
+        if isinstance(value, np.ndarray):
+            sha.update(repr((str(value.dtype), value.shape)).encode("utf-8"))
+            sha.update(np.ascontiguousarray(value).tobytes())
+        elif isinstance(value, (list, tuple)):
+            sha.update(b"[")
+            for item in value:
+                update(item)
+            sha.update(b"]")
+        else:
+            sha.update(repr(value).encode("utf-8"))
+
+    for value in inputs:
+        update(value)
+    return sha.hexdigest()
+
+
+class MaskCache(object):
+    ''' Arrays on disk under ``root``, by canvas size and key. '''
+
+    def __init__(self, root, max_bytes=MAX_BYTES):
+        self.root = os.path.expanduser(root)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = sum(os.path.getsize(path) for path, _ in self._files())
+
+    def path(self, size, key):
+        return os.path.join(self.root, "%dx%d" % tuple(size), key + ".npy")
+
+    def get(self, size, key):
+        ''' The array stored under ``key``, memory-mapped, or None. '''
+        path = self.path(size, key)
+        try:
+            array = np.load(path, mmap_mode="r")
+            os.utime(path, None)
+        except (IOError, OSError, ValueError):
+            return None
+        return array
+
+    def put(self, size, key, array):
+        path = self.path(size, key)
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                if not os.path.isdir(directory):
+                    raise
+        handle, temporary = tempfile.mkstemp(".npy", ".", directory)
+        with os.fdopen(handle, "wb") as stream:
+            np.save(stream, np.ascontiguousarray(array))
+        try:
+            os.rename(temporary, path)
+        except OSError:
+            # Another process stored it first (Windows does not replace)
+            os.remove(temporary)
+            return
+        self.nbytes += os.path.getsize(path)
+        if self.nbytes > self.max_bytes:
+            self.evict()
+
+    def cached(self, size, compute, *inputs):
+        ''' compute() for a ``size`` canvas, or what it returned last time
+            for the same ``inputs``.
+        '''
+        key = digest(*inputs)
+        array = self.get(size, key)
+        if array is not None:
+            self.hits += 1
+            return array
+        self.misses += 1
+        array = compute()
+        self.put(size, key, array)
+        return array
+
+    def evict(self):
+        ''' Delete the least recently used files down to max_bytes. '''
+        files = sorted(self._files(), key=lambda entry: entry[1])
+        self.nbytes = sum(os.path.getsize(path) for path, _ in files)
+        for path, _ in files:
+            if self.nbytes <= self.max_bytes:
+                break
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except OSError:
+                continue
+            self.nbytes -= size
+
+    def _files(self):
+        ''' (path, last use) of every cached array. '''
+        files = []
+        if not os.path.isdir(self.root):
+            return files
+        for directory in os.listdir(self.root):
+            directory = os.path.join(self.root, directory)
+            if not os.path.isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                if name.endswith(".npy") and not name.startswith("."):
+                    path = os.path.join(directory, name)
+                    try:
+                        files.append((path, os.path.getmtime(path)))
+                    except OSError:
+                        pass
+        return files
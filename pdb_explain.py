@@ -0,0 +1,300 @@
+# vim: expandtab:ts=4:sw=4
+# pylint: disable=C0103
+''' pdb_explain.py
+
+    Dry run of a plug-in: its logic runs against the recording gimpfu
+    stand-in (gimpfu_recorder.py), so no pixel is touched, and every
+    operation it would perform is listed in order with its arguments and
+    an estimate of the pixels it touches, worked out from the layer
+    sizes, the selection bounds and the stroke lengths at that point.
+    Totals per stage (the innermost ``draw_*`` / ``add_*`` / ``generate_*``
+    function, as in pdb_profiler.py) and per procedure, and the peak of
+    the layer, channel and selection memory the images hold, follow.
+
+    Estimates are upper bounds in the sense GIMP works: a fill or blend
+    touches its drawable where the selection's bounding box is, and
+    selection steps (shrink, grow, translate, invert) the mask.  A blur
+    reads the selected part of the drawable grown by its radius, once per
+    pass for the IIR method and once per kernel tap (2 * radius + 1 a
+    pass) for RLE, so larger radii cost more.
+
+    Usage:
+        python pdb_explain.py Crystal_Tux.py python_fu_G2_Tux_custom 2048
+        python pdb_explain.py graph_paper.py [--json plan.json] [--limit 20]
+'''
+
+from __future__ import print_function
+
+import json
+import math
+import sys
+
+import gimpfu_recorder
+import pdb_profiler
+
+# Paint on their drawable (the first argument) inside the selection
+PAINTERS = ("pdb.gimp_edit_fill", "pdb.gimp_edit_blend", "pdb.gimp_edit_bucket_fill",
+            "pdb.gimp_edit_clear", "pdb.gimp_edit_cut", "pdb.gimp_drawable_edit_stroke_item")
+# Read or write all of their drawable (the first argument)
+WHOLE = ("Layer.fill", "pdb.gimp_drawable_fill", "pdb.gimp_layer_copy",
+         "pdb.gimp_layer_new_from_drawable", "pdb.gimp_item_transform_flip",
+         "pdb.plug_in_autocrop_layer")
+# Filters on (image, drawable, ...): the selected part of the drawable
+FILTERS = ("pdb.plug_in_map_object",)
+# Gaussian blurs on (image, drawable, ...), see _blur()
+BLURS = ("pdb.plug_in_gauss", "pdb.plug_in_gauss_iir", "pdb.plug_in_gauss_rle")
+# plug_in_gauss's method argument
+IIR, RLE = 0, 1
+# Work on the whole selection mask of their image
+MASKS = ("pdb.gimp_selection_translate", "pdb.gimp_selection_invert",
+         "pdb.gimp_selection_all", "pdb.gimp_selection_save", "pdb.script_fu_drop_shadow")
+# Composite every layer of their image
+COMPOSITES = ("pdb.gimp_image_merge_visible_layers", "pdb.gimp_image_flatten",
+              "pdb.gimp_image_scale")
+# Stand-in and wrapper modules, whose frames are not the plug-in's stages
+# (Image.add_layer would otherwise count as an add_* stage)
+PLUMBING = ("gimpfu_recorder", "pdb_profiler", "pdb_context", __name__)
+
+
+def _area(bounds):
+    if bounds is None:
+        return 0
+    return max(0, int(bounds[2] - bounds[0])) * max(0, int(bounds[3] - bounds[1]))
+
+
+def _canvas(image):
+    return image.width * image.height
+
+
+def _selected(drawable):
+    ''' Pixels of ``drawable`` inside the selection's bounding box. '''
+    image = getattr(drawable, "image", None)
+    area = drawable.extents
+    if image is not None and image.selection is not None:
+        area = gimpfu_recorder._intersect(area, image.selection)  # pylint: disable=W0212
+    return _area(area)
+
+
+def _blur(call):
+    ''' Pixels a Gaussian blur reads: the selected part of its drawable
+        grown by the radii, once per pass (IIR) or per kernel tap (RLE).
+    '''
+    name, args = call.name, call.args
+    drawable = args[1]
+    if name == "pdb.plug_in_gauss":
+        horizontal, vertical, method = args[2], args[3], args[4]
+    else:
+        horizontal = args[2] if args[3] else 0
+        vertical = args[2] if args[4] else 0
+        method = IIR if name == "pdb.plug_in_gauss_iir" else RLE
+    area = drawable.extents
+    image = getattr(drawable, "image", None)
+    if image is not None and image.selection is not None:
+        area = gimpfu_recorder._intersect(area, image.selection)  # pylint: disable=W0212
+    if area is None:
+        return 0
+    grow_x, grow_y = int(math.ceil(horizontal)), int(math.ceil(vertical))
+    area = gimpfu_recorder._intersect(  # pylint: disable=W0212
+        drawable.extents, (area[0] - grow_x, area[1] - grow_y, area[2] + grow_x, area[3] + grow_y))
+    passes = [grow for grow in (grow_x, grow_y) if grow > 0]
+    if method == IIR:
+        reads = len(passes)
+    else:
+        reads = sum(2 * grow + 1 for grow in passes)
+    return _area(area) * max(1, reads)
+
+
+def _stroke_length(points):
+    length = 0.0
+    for index in range(2, len(points) - 1, 2):
+        length += math.hypot(points[index] - points[index - 2],
+                             points[index + 1] - points[index - 1])
+    return int(math.ceil(length)) + 1
+
+
+def estimate(call):
+    ''' Pixels the recorded ``call`` touches, from the state before it. '''
+    name, args = call.name, call.args
+    if name in PAINTERS:
+        return _selected(args[0])
+    if name in WHOLE:
+        return _area(getattr(args[0], "extents", None))
+    if name in FILTERS:
+        return _selected(args[1])
+    if name in BLURS:
+        return _blur(call)
+    if name in MASKS:
+        return _canvas(args[0])
+    if name in COMPOSITES:
+        return sum(layer.width * layer.height for layer in args[0].layers)
+    if name in ("pdb.gimp_selection_shrink", "pdb.gimp_selection_grow"):
+        image, steps = args[0], int(args[1])
+        if image.selection is None:
+            return 0
+        x_1, y_1, x_2, y_2 = image.selection
+        return _area(image.clip((x_1 - steps, y_1 - steps, x_2 + steps, y_2 + steps)))
+    if name == "pdb.gimp_image_select_item":
+        item = args[2]
+        return _area(getattr(item, "bounds", None) or getattr(item, "content", None))
+    if name in ("pdb.gimp_ellipse_select", "pdb.gimp_rect_select"):
+        x_pos, y_pos, width, height = args[1:5]
+        return _area(args[0].clip((x_pos, y_pos, x_pos + width, y_pos + height)))
+    if name == "pdb.gimp_pencil":
+        return _stroke_length(args[2])
+    if name == "gimp.Layer":
+        return int(args[2]) * int(args[3])
+    if name == "pdb.gimp_layer_new":
+        return int(args[1]) * int(args[2])
+    if name == "gimp.PixelRgn":
+        return int(args[3]) * int(args[4])
+    if name == "pdb.gimp_image_crop":
+        return int(args[1]) * int(args[2]) * len(args[0].layers)
+    if name.startswith("pdb.file_") and len(args) > 1 and hasattr(args[1], "extents"):
+        return _area(args[1].extents)
+    return 0
+
+
+def _images(value):
+    ''' Images an argument is or belongs to. '''
+    if isinstance(value, gimpfu_recorder.Image):
+        return [value]
+    image = getattr(value, "image", None)
+    if isinstance(image, gimpfu_recorder.Image):
+        return [image]
+    return []
+
+
+def _nbytes(image):
+    ''' Bytes of an image's layers, saved channels and selection mask. '''
+    layers = sum(layer.width * layer.height * layer.bpp for layer in image.layers)
+    masks = len(getattr(image, "channels", ())) + (image.selection is not None)
+    return layers + masks * _canvas(image)
+
+
+def _short(value, width=40):
+    text = repr(value)
+    return text if len(text) <= width else text[: width - 3] + "..."
+
+
+class Plan(object):
+    ''' The operations a run performs, observed through gimpfu_recorder. '''
+
+    def __init__(self):
+        self.operations = []
+        self.images = {}
+        self.peak_bytes = 0
+        self._stages = pdb_profiler.PDBProfiler()
+
+    def observe(self, call):
+        self._measure()
+        frame = sys._getframe(1)  # pylint: disable=W0212
+        while frame is not None and frame.f_globals.get("__name__") in PLUMBING:
+            frame = frame.f_back
+        stage = self._stages.current_stage(frame)
+        self.operations.append((stage, call, estimate(call)))
+        for value in call.args:
+            for image in _images(value):
+                self.images[image.ID] = image
+        if call.name == "pdb.gimp_image_delete":
+            self.images.pop(call.args[0].ID, None)
+
+    def _measure(self):
+        live = sum(_nbytes(image) for image in self.images.values())
+        self.peak_bytes = max(self.peak_bytes, live)
+
+    def finish(self):
+        self._measure()
+
+    @property
+    def pixels(self):
+        return sum(pixels for _, _, pixels in self.operations)
+
+    def totals(self, by_stage):
+        ''' {stage or procedure: [operations, pixels]} '''
+        totals = {}
+        for stage, call, pixels in self.operations:
+            entry = totals.setdefault(stage if by_stage else call.name, [0, 0])
+            entry[0] += 1
+            entry[1] += pixels
+        return totals
+
+    def as_dict(self):
+        return {
+            "operations": [
+                {"stage": stage, "name": call.name, "args": [_short(arg) for arg in call.args],
+                 "pixels": pixels}
+                for stage, call, pixels in self.operations
+            ],
+            "stages": dict((name, {"count": count, "pixels": pixels})
+                           for name, (count, pixels) in self.totals(True).items()),
+            "procedures": dict((name, {"count": count, "pixels": pixels})
+                               for name, (count, pixels) in self.totals(False).items()),
+            "pixels": self.pixels,
+            "peak_bytes": self.peak_bytes,
+        }
+
+    def report(self, stream=None, limit=None):
+        ''' The operations in order, then the totals, largest first. '''
+        stream = stream or sys.stdout
+        width = max([len("Stage")] + [len(stage) for stage, _, _ in self.operations])
+        print("%6s %-*s %12s  %s" % ("#", width, "Stage", "pixels", "Operation"), file=stream)
+        for index, (stage, call, pixels) in enumerate(self.operations):
+            print("%6d %-*s %12d  %s(%s)" % (index + 1, width, stage, pixels, call.name,
+                                              ", ".join(_short(arg) for arg in call.args)),
+                  file=stream)
+        print(file=stream)
+        for title, by_stage in (("Stage", True), ("Procedure", False)):
+            rows = sorted(self.totals(by_stage).items(), key=lambda item: (-item[1][1], item[0]))
+            width = max([len(title)] + [len(name) for name, _ in rows])
+            print("%-*s %7s %14s" % (width, title, "ops", "pixels"), file=stream)
+            for name, (count, pixels) in rows[:limit]:
+                print("%-*s %7d %14d" % (width, name, count, pixels), file=stream)
+            print(file=stream)
+        print("%d operations, %d pixels touched, peak image memory %.1f MB"
+              % (len(self.operations), self.pixels, self.peak_bytes / 1048576.0), file=stream)
+
+
+def explain(function, *args):
+    ''' Run ``function`` (a plug-in loaded with the recording stand-in) on
+        ``args`` and return the Plan of what it did.
+    '''
+    plan = Plan()
+    gimpfu_recorder.OBSERVERS.append(plan.observe)
+    try:
+        function(*args)
+    finally:
+        gimpfu_recorder.OBSERVERS.remove(plan.observe)
+        del gimpfu_recorder.CALLS[:]
+    plan.finish()
+    return plan
+
+
+def main(argv=None):
+    ''' List what a plug-in procedure would do, without GIMP or pixels. '''
+    import argparse
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("plugin", help="plug-in file, e.g. Crystal_Tux.py")
+    parser.add_argument("procedure", nargs="?", help="registered name (default: the first)")
+    parser.add_argument("args", nargs="*", help="arguments (default: registered defaults)")
+    parser.add_argument("--json", metavar="FILE", help="write JSON instead of the table")
+    parser.add_argument("--limit", type=int, metavar="N", help="rows per totals table")
+    options = parser.parse_args(argv)
+
+    plugin = gimpfu_recorder.load_plugin(options.plugin)
+    proc_name = options.procedure or sorted(gimpfu_recorder.REGISTERED)[0]
+    registration = gimpfu_recorder.REGISTERED[proc_name]
+    args = ([pdb_profiler._parse_arg(arg) for arg in options.args]  # pylint: disable=W0212
+            or gimpfu_recorder.default_args(proc_name))
+    plan = explain(registration["function"], *args)
+    if options.json:
+        with open(options.json, "w") as stream:
+            json.dump(plan.as_dict(), stream, indent=2, sort_keys=True)
+            stream.write("\n")
+    else:
+        plan.report(limit=options.limit)
+    return plugin
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+# vim: expandtab:ts=4:sw=4
+# pylint: disable=C0103
+''' pdb_profiler.py
+
+    Opt-in timing of every ``pdb.*`` call a plug-in makes.  Calls are
+    counted and timed per procedure name and per enclosing stage, the
+    innermost ``draw_*`` / ``add_*`` / ``generate_*`` function on the stack.
+    Plug-ins can add counters of their own (cache hits, say) with count().
+
+    Inside GIMP set GIMP_PDB_PROFILE before starting GIMP:
+        GIMP_PDB_PROFILE=-            sorted report on stderr
+        GIMP_PDB_PROFILE=/tmp/p.txt   sorted report written to the file
+        GIMP_PDB_PROFILE=/tmp/p.json  JSON written to the file
+
+    Without GIMP, run a plug-in against the recording gimpfu stand-in:
+        python pdb_profiler.py Crystal_Tux.py [--json out.json] [proc] [args]
+
+    For a timeline, GIMP_PDB_TRACE=/tmp/tux.trace.json (or --trace) writes
+    Chrome trace events, for chrome://tracing or ui.perfetto.dev: nested
+    spans for the plug-in entry point, each stage and each pdb call with
+    its arguments.  Stages run on a process pool are not traced.
+'''
+
+from __future__ import print_function
+
+import functools
+import json
+import os
+import sys
+import time
+
+ENV_VAR = "GIMP_PDB_PROFILE"
+TRACE_VAR = "GIMP_PDB_TRACE"
+STAGE_PREFIXES = ("draw_", "add_", "generate_")
+NO_STAGE = "(module)"
+
+_clock = getattr(time, "perf_counter", time.time)
+
+
+class Timing(object):
+    ''' Call count, total and max wall time of one procedure or stage. '''
+
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, elapsed):
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+
+    def as_dict(self):
+        return {"count": self.count, "total": self.total, "max": self.max}
+
+
+def _short(value, width=80):
+    text = repr(value)
+    return text if len(text) <= width else text[: width - 3] + "..."
+
+
+class Trace(object):
+    ''' Chrome trace-event spans ("X" events, microseconds since start). '''
+
+    def __init__(self, path, stage_prefixes=STAGE_PREFIXES):
+        self.path = path
+        self.stage_prefixes = tuple(stage_prefixes)
+        self.events = []
+        self.origin = _clock()
+        self.pid = os.getpid()
+        # Entry points running, outermost first, and open stage frames
+        self.entries = []
+        self.open = []
+
+    def span(self, name, category, start, end, args=None):
+        event = {"name": name, "cat": category, "ph": "X", "pid": self.pid, "tid": 1,
+                 "ts": (start - self.origin) * 1e6, "dur": (end - start) * 1e6}
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    def profile(self, frame, event, _arg):
+        ''' sys.setprofile hook opening and closing stage spans. '''
+        if event == "call":
+            code = frame.f_code
+            # (the gimpfu stand-ins' own add_layer is not a stage)
+            if (code.co_name.startswith(self.stage_prefixes) and code not in self.entries
+                    and not frame.f_globals.get("__name__", "").startswith("gimpfu")):
+                self.open.append((frame, _clock()))
+        elif event == "return" and self.open and self.open[-1][0] is frame:
+            _, start = self.open.pop()
+            self.span(frame.f_code.co_name, "stage", start, _clock())
+
+    def enter(self, func):
+        if not self.entries:
+            sys.setprofile(self.profile)
+        self.entries.append(getattr(func, "__code__", None))
+        return _clock()
+
+    def leave(self, func, args, start):
+        self.entries.pop()
+        self.span(func.__name__, "plugin", start, _clock(),
+                  {"args": [_short(arg) for arg in args]})
+        if not self.entries:
+            sys.setprofile(None)
+            del self.open[:]
+            self.write()
+
+    def write(self):
+        with open(self.path, "w") as stream:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, stream)
+            stream.write("\n")
+
+
+class PDBProfiler(object):
+    ''' Collects timings for the pdb wrappers it hands out. '''
+
+    def __init__(self, stage_prefixes=STAGE_PREFIXES):
+        self.stage_prefixes = tuple(stage_prefixes)
+        self.procedures = {}
+        self.stages = {}
+        self.stage_procedures = {}
+        self.counters = {}
+        self.trace = None
+
+    def wrap(self, pdb):
+        ''' Return a pdb proxy whose calls are timed by this profiler. '''
+        if isinstance(pdb, ProfiledPDB):
+            return pdb
+        return ProfiledPDB(pdb, self)
+
+    def reset(self):
+        self.procedures.clear()
+        self.stages.clear()
+        self.stage_procedures.clear()
+        self.counters.clear()
+
+    def current_stage(self, frame):
+        ''' Name of the innermost stage function at or above ``frame``. '''
+        while frame is not None:
+            if frame.f_code.co_name.startswith(self.stage_prefixes):
+                return frame.f_code.co_name
+            frame = frame.f_back
+        return NO_STAGE
+
+    def record(self, proc_name, stage, elapsed):
+        self.procedures.setdefault(proc_name, Timing()).add(elapsed)
+        self.stages.setdefault(stage, Timing()).add(elapsed)
+        self.stage_procedures.setdefault((stage, proc_name), Timing()).add(elapsed)
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def as_dict(self):
+        stages = {}
+        for (stage, proc_name), timing in self.stage_procedures.items():
+            stages.setdefault(stage, {})[proc_name] = timing.as_dict()
+        return {
+            "procedures": dict((name, timing.as_dict())
+                               for name, timing in self.procedures.items()),
+            "stages": dict((name, dict(timing.as_dict(), procedures=stages.get(name, {})))
+                           for name, timing in self.stages.items()),
+            "counters": dict(self.counters),
+        }
+
+    def write_json(self, stream):
+        json.dump(self.as_dict(), stream, indent=2, sort_keys=True)
+        stream.write("\n")
+
+    def report(self, stream=None, limit=None):
+        ''' Print procedures and stages sorted by total time, slowest first. '''
+        stream = stream or sys.stdout
+        for title, table in (("Procedure", self.procedures), ("Stage", self.stages)):
+            rows = sorted(table.items(), key=lambda item: (-item[1].total, item[0]))
+            width = max([len(title)] + [len(name) for name, _ in rows])
+            print("%-*s %7s %11s %11s" % (width, title, "calls", "total ms", "max ms"),
+                  file=stream)
+            for name, timing in rows[:limit]:
+                print("%-*s %7d %11.3f %11.3f" % (width, name, timing.count,
+                                                  timing.total * 1000.0, timing.max * 1000.0),
+                      file=stream)
+            print(file=stream)
+        if self.counters:
+            width = max([len("Counter")] + [len(name) for name in self.counters])
+            print("%-*s %7s" % (width, "Counter", "count"), file=stream)
+            for name in sorted(self.counters):
+                print("%-*s %7d" % (width, name, self.counters[name]), file=stream)
+            print(file=stream)
+
+    def emit(self, destination):
+        ''' Write the report to "-" (stderr), a .json file or a text file. '''
+        if destination in ("-", "1", "stderr"):
+            self.report(sys.stderr)
+        elif destination.endswith(".json"):
+            with open(destination, "w") as stream:
+                self.write_json(stream)
+        else:
+            with open(destination, "w") as stream:
+                self.report(stream)
+
+
+class ProfiledPDB(object):
+    ''' Proxy for ``pdb`` that times each procedure call. '''
+
+    def __init__(self, pdb, profiler):
+        self.__dict__["_pdb"] = pdb
+        self.__dict__["_profiler"] = profiler
+
+    def __getattr__(self, name):
+        target = getattr(self._pdb, name)
+        if not callable(target):
+            return target
+        profiler = self._profiler
+
+        def timed(*args, **kwargs):
+            stage = profiler.current_stage(sys._getframe(1))  # pylint: disable=W0212
+            start = _clock()
+            try:
+                return target(*args, **kwargs)
+            finally:
+                end = _clock()
+                profiler.record(name, stage, end - start)
+                if profiler.trace is not None:
+                    profiler.trace.span(name, "pdb", start, end,
+                                        {"args": [_short(arg) for arg in args],
+                                         "stage": stage})
+
+        timed.__name__ = name
+        self.__dict__[name] = timed
+        return timed
+
+    def __getitem__(self, name):
+        return getattr(self, name.replace("-", "_"))
+
+
+PROFILER = None
+
+
+def enable():
+    ''' Turn profiling on for this process and return the profiler. '''
+    global PROFILER  # pylint: disable=W0603
+    if PROFILER is None:
+        PROFILER = PDBProfiler()
+    return PROFILER
+
+
+def enable_trace(path):
+    ''' Turn profiling on with a trace written to ``path`` when the
+        outermost entry point returns.
+    '''
+    profiler = enable()
+    if profiler.trace is None:
+        profiler.trace = Trace(path, profiler.stage_prefixes)
+    return profiler
+
+
+def count(name, amount=1):
+    ''' Add ``amount`` to the counter ``name`` when profiling is enabled. '''
+    if PROFILER is not None:
+        PROFILER.count(name, amount)
+
+
+def instrument(pdb):
+    ''' Wrap ``pdb`` when profiling is enabled, otherwise return it as is. '''
+    if PROFILER is None and not os.environ.get(ENV_VAR) and not os.environ.get(TRACE_VAR):
+        return pdb
+    if os.environ.get(TRACE_VAR):
+        enable_trace(os.environ[TRACE_VAR])
+    return enable().wrap(pdb)
+
+
+def entry_point(func):
+    ''' Decorate a plug-in's registered function so the report is written
+        when it returns, as configured by GIMP_PDB_PROFILE, and the trace
+        with it (GIMP_PDB_TRACE).
+    '''
+    @functools.wraps(func)
+    def run(*args):
+        trace = PROFILER.trace if PROFILER is not None else None
+        start = trace.enter(func) if trace is not None else None
+        try:
+            return func(*args)
+        finally:
+            if trace is not None:
+                trace.leave(func, args, start)
+            destination = os.environ.get(ENV_VAR)
+            if PROFILER is not None and destination:
+                PROFILER.emit(destination)
+    return run
+
+
+def _parse_arg(text):
+    ''' Command line arguments are JSON when they parse, strings otherwise. '''
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def main(argv=None):
+    ''' Profile a plug-in against the recording gimpfu stand-in. '''
+    import argparse
+    import gimpfu_recorder
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("plugin", help="plug-in file, e.g. Crystal_Tux.py")
+    parser.add_argument("procedure", nargs="?", help="registered name (default: the only one)")
+    parser.add_argument("args", nargs="*", help="arguments (default: registered defaults)")
+    parser.add_argument("--json", metavar="FILE", help="write JSON instead of the table")
+    parser.add_argument("--trace", metavar="FILE", help="also write a Chrome trace")
+    options = parser.parse_args(argv)
+
+    # The plug-ins import this module by name; share one profiler with them.
+    sys.modules.setdefault("pdb_profiler", sys.modules[__name__])
+    profiler = enable_trace(options.trace) if options.trace else enable()
+    plugin = gimpfu_recorder.load_plugin(options.plugin)
+    proc_name = options.procedure or sorted(gimpfu_recorder.REGISTERED)[0]
+    registration = gimpfu_recorder.REGISTERED[proc_name]
+    args = [_parse_arg(arg) for arg in options.args] or gimpfu_recorder.default_args(proc_name)
+    profiler.reset()
+    registration["function"](*args)
+    if options.json:
+        with open(options.json, "w") as stream:
+            profiler.write_json(stream)
+    else:
+        profiler.report()
+    return plugin
+
+
+if __name__ == "__main__":
+    main()
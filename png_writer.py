@@ -0,0 +1,164 @@
+# vim: expandtab:ts=4:sw=4
+''' png_writer.py
+
+    A PNG written row by row, so images larger than memory -- posters
+    rendered tile by tile -- can be saved as they are drawn.  Rows are
+    compressed as they come in and flushed to the file in IDAT chunks, so
+    only one band of rows and the compressor's window are ever held.
+
+    Plain Python (struct and zlib), so GIMP's Python 2 runs it too.
+
+    Usage:
+        writer = PNGWriter("poster.png", width, height)
+        writer.write(rows)  # RGBA bytes of whole rows, top first
+        ...
+        writer.close()
+
+    Bands of rows can also be compressed elsewhere -- on a process pool --
+    with deflate_rows() and appended in order with write_deflated(); the
+    pieces are joined into one zlib stream the way pigz does it.
+'''
+
+import struct
+import zlib
+
+SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# Colour types
+GRAY = 0
+RGB = 2
+RGBA = 6
+CHANNELS = {GRAY: 1, RGB: 3, RGBA: 4}
+# Compressed bytes gathered before an IDAT chunk is written
+CHUNK_SIZE = 256 * 1024
+# zlib stream header (deflate, 32K window) and the empty last block that
+# ends a stream of sync-flushed pieces
+ZLIB_HEADER = b"\x78\x9c"
+LAST_BLOCK = b"\x03\x00"
+ADLER_BASE = 65521
+
+
+def chunk(tag, data):
+    ''' A PNG chunk: length, tag, data and CRC. '''
+    return (struct.pack(">I", len(data)) + tag + data
+            + struct.pack(">I", zlib.crc32(tag + data) & 0xffffffff))
+
+
+def adler32_combine(first, second, length):
+    ''' Adler-32 of two strings joined, from theirs and the second's length
+        (zlib's adler32_combine).
+    '''
+    rem = length % ADLER_BASE
+    sum_1 = first & 0xffff
+    sum_2 = (rem * sum_1) % ADLER_BASE
+    sum_1 += (second & 0xffff) + ADLER_BASE - 1
+    sum_2 += ((first >> 16) & 0xffff) + ((second >> 16) & 0xffff) + ADLER_BASE - rem
+    sum_1 %= ADLER_BASE
+    sum_2 %= ADLER_BASE
+    return sum_1 | (sum_2 << 16)
+
+
+def deflate_rows(rows, level=6):
+    ''' (data, checksum, length) for write_deflated(): ``rows`` (strings of
+        whole rows' pixel bytes) as raw deflate ending on a byte boundary,
+        and the Adler-32 and size of what it inflates to.
+    '''
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    pieces = []
+    checksum, length = 1, 0
+    for row in rows:
+        # Filter type 0 (none) in front of every row
+        raw = b"\0" + row
+        pieces.append(compressor.compress(raw))
+        checksum = zlib.adler32(raw, checksum) & 0xffffffff
+        length += len(raw)
+    pieces.append(compressor.flush(zlib.Z_SYNC_FLUSH))
+    return b"".join(pieces), checksum, length
+
+
+class PNGWriter(object):
+    ''' A PNG of ``width`` x ``height`` filled by write() calls; 8 bits a
+        sample, or 1 for bi-level GRAY (8 pixels a byte, first one in the
+        high bit, 0 black).
+    '''
+
+    def __init__(self, path, width, height, colour_type=RGBA, level=6, bit_depth=8):
+        self.width = width
+        self.height = height
+        self.stride = (width * CHANNELS[colour_type] * bit_depth + 7) // 8
+        self.rows = 0
+        self.stream = open(path, "wb")
+        self.compressor = zlib.compressobj(level)
+        self.pending = []
+        self.pending_size = 0
+        # Adler-32 of the rows given to write_deflated(), None until then
+        self.checksum = None
+        self.stream.write(SIGNATURE)
+        self.stream.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, bit_depth,
+                                                     colour_type, 0, 0, 0)))
+
+    def write(self, data):
+        ''' Append whole rows, given as one string of their pixel bytes. '''
+        count, rest = divmod(len(data), self.stride)
+        if rest or self.rows + count > self.height:
+            raise ValueError("%d bytes are not whole rows of the %d left"
+                             % (len(data), self.height - self.rows))
+        # Filter type 0 (none) in front of every row
+        raw = b"".join(b"\0" + data[row * self.stride:(row + 1) * self.stride]
+                       for row in range(count))
+        self._queue(self.compressor.compress(raw))
+        self.rows += count
+
+    def write_deflated(self, data, checksum, length):
+        ''' Append whole rows compressed by deflate_rows(); an image is
+            written either this way or with write(), not both.
+        '''
+        count, rest = divmod(length, self.stride + 1)
+        if rest or self.rows + count > self.height:
+            raise ValueError("%d bytes are not whole rows of the %d left"
+                             % (length, self.height - self.rows))
+        if self.checksum is None:
+            self._queue(ZLIB_HEADER)
+            self.checksum = 1
+        self._queue(data)
+        self.checksum = adler32_combine(self.checksum, checksum, length)
+        self.rows += count
+
+    def close(self):
+        ''' Write what is left; every row must have been written. '''
+        if self.stream is None:
+            return
+        try:
+            if self.rows != self.height:
+                raise ValueError("%d of %d rows written" % (self.rows, self.height))
+            if self.checksum is None:
+                self._queue(self.compressor.flush())
+            else:
+                self._queue(LAST_BLOCK + struct.pack(">I", self.checksum))
+            self._flush()
+            self.stream.write(chunk(b"IEND", b""))
+        finally:
+            self.stream.close()
+            self.stream = None
+
+    def _queue(self, data):
+        if data:
+            self.pending.append(data)
+            self.pending_size += len(data)
+        if self.pending_size >= CHUNK_SIZE:
+            self._flush()
+
+    def _flush(self):
+        if self.pending:
+            self.stream.write(chunk(b"IDAT", b"".join(self.pending)))
+        self.pending = []
+        self.pending_size = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, _value, _traceback):
+        if exc_type is None:
+            self.close()
+        elif self.stream is not None:
+            self.stream.close()
+            self.stream = None
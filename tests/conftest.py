@@ -0,0 +1,7 @@
+# vim: expandtab:ts=4:sw=4
+''' The plug-ins and their helpers are top-level modules of the repository. '''
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,44 @@
+# vim: expandtab:ts=4:sw=4
+''' Crystal Tux renders as the original plug-in did, on the NumPy stand-in. '''
+
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+gimpfu_numpy = pytest.importorskip("gimpfu_numpy")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PLUGIN = os.path.join(ROOT, "Crystal_Tux.py")
+
+# Box, covered pixels and alpha sum of layers of the original plug-in's
+# 256 px render
+WING_REFLECTION_BOTTOM = {
+    "Left Wing Reflection Bottom": ((12, 140, 47, 157), 116, 77.488),
+    "Right Wing Reflection Bottom": ((209, 140, 244, 157), 116, 77.488),
+}
+
+
+def _render():
+    image, = gimpfu_numpy.run(PLUGIN, "python_fu_G2_Tux")
+    return image
+
+
+def _layer(image, name):
+    return [layer for layer in image.layers if layer.name == name][0]
+
+
+def test_wing_reflection_bottom_matches_original():
+    image = _render()
+    for name, (box, covered, total) in WING_REFLECTION_BOTTOM.items():
+        alpha = image.layer_alpha(_layer(image, name))
+        ys, xs = np.nonzero(alpha)
+        assert (xs.min(), ys.min(), xs.max() + 1, ys.max() + 1) == box
+        assert len(xs) == covered
+        assert alpha.sum() == pytest.approx(total, abs=1e-3)
+
+
+def test_default_procedure_keeps_its_signature():
+    image = _render()
+    assert gimpfu_numpy.REGISTERED["python_fu_G2_Tux"]["params"] == []
+    assert (image.width, image.height) == (256, 256)
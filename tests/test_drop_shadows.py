@@ -0,0 +1,48 @@
+# vim: expandtab:ts=4:sw=4
+''' Crystal Tux's drop shadows match what script-fu-drop-shadow draws. '''
+
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+gimpfu_numpy = pytest.importorskip("gimpfu_numpy")
+
+import gimpfu_recorder
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SIZE = 64
+
+SHADOWS = [
+    ("Beak Drop Shadow", ["Beak"], "beak_drop_shadow", "Beak"),
+    ("Drop Shadow", ["Body", "Left Foot", "Right Foot"], "tux_drop_shadow", "Background"),
+]
+
+
+@pytest.fixture(scope="module")
+def plugin():
+    return gimpfu_recorder.load_plugin(os.path.join(ROOT, "Crystal_Tux.py"), gimpfu_numpy)
+
+
+def _layer(image, name):
+    return [layer for layer in image.layers if layer.name == name][0]
+
+
+@pytest.mark.parametrize("name, sources, offset, below", SHADOWS)
+def test_shadow_matches_script_fu(plugin, name, sources, offset, below):
+    image = plugin.draw_tux_image(SIZE, True)
+    layers = plugin.tux_layers.registry(image)
+    expected = image.layer_alpha(_layer(image, name))
+    pdb = plugin.pdb
+    pdb.gimp_selection_none(image)
+    for source in sources:
+        pdb.gimp_image_select_item(image, gimpfu_numpy.CHANNEL_OP_ADD, _layer(image, source))
+    off_x, off_y = layers.layout(offset)
+    pdb.gimp_image_remove_layer(image, _layer(image, name))
+    pdb.script_fu_drop_shadow(
+        image, _layer(image, below), off_x, off_y, layers.layout("drop_shadow_blur"),
+        (0, 0, 0), 63, False
+    )
+    shadow = _layer(image, "Drop Shadow")
+    assert image.layers.index(shadow) == image.layers.index(_layer(image, below)) + 1
+    assert np.allclose(image.layer_alpha(shadow), expected, atol=1e-6)
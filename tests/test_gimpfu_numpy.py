@@ -0,0 +1,19 @@
+# vim: expandtab:ts=4:sw=4
+''' The NumPy stand-in resamples images gimp_image_scale scales. '''
+
+import pytest
+
+np = pytest.importorskip("numpy")
+gimpfu_numpy = pytest.importorskip("gimpfu_numpy")
+
+
+def test_image_scale_resamples_layers():
+    image = gimpfu_numpy.Image(4, 2, gimpfu_numpy.RGB)
+    layer = gimpfu_numpy.Layer(image, "Checks", 4, 2)
+    image.add_layer(layer, 0)
+    layer.pixels[:, :2] = 1.0
+    gimpfu_numpy.pdb.gimp_image_scale(image, 8, 4)
+    assert (image.width, image.height) == (8, 4)
+    assert layer.pixels.shape == (4, 8, 4)
+    assert (layer.pixels[:, :4] == 1.0).all()
+    assert (layer.pixels[:, 4:] == 0.0).all()
@@ -0,0 +1,25 @@
+# vim: expandtab:ts=4:sw=4
+''' Graph Paper... keeps the procedure scripts call; the options have their own. '''
+
+import os
+
+import gimpfu_recorder
+import graph_sheet
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _registered(proc_name):
+    gimpfu_recorder.reset()
+    gimpfu_recorder.load_plugin(os.path.join(ROOT, "graph_paper.py"))
+    return gimpfu_recorder.REGISTERED[proc_name]
+
+
+def test_graph_paper_keeps_its_signature_and_pencil():
+    registration = _registered("python_fu_generate_graph_paper")
+    assert [param[0] for param in registration["params"]] == [gimpfu_recorder.PF_INT] * 3
+    registration["function"](100, 80, 10)
+    names = [call.name for call in gimpfu_recorder.CALLS]
+    assert names.count("pdb.gimp_pencil") == (
+        len(graph_sheet.grid_lines(100, 10)) + len(graph_sheet.grid_lines(80, 10)))
+    assert "pdb.gimp_drawable_edit_stroke_item" not in names
@@ -0,0 +1,25 @@
+# vim: expandtab:ts=4:sw=4
+''' graph_sheet places the lines where GIMP's Python 2 does, on any interpreter. '''
+
+import graph_sheet
+
+
+def test_grid_lines_as_gimp_places_them():
+    assert graph_sheet.grid_lines(612, 72)[0] == 18
+    assert graph_sheet.grid_lines(630, 72)[0] == 27
+    assert graph_sheet.grid_lines(613, 72)[0] == 19
+    assert graph_sheet.grid_lines(100, 7) == list(range(1, 100, 7))
+
+
+def test_pooled_rows_match_serial(tmp_path):
+    serial, pooled = str(tmp_path / "serial.png"), str(tmp_path / "pooled.png")
+    graph_sheet.write(serial, 613, 600, 72, processes=1)
+    graph_sheet.write(pooled, 613, 600, 72, processes=2)
+    with open(serial, "rb") as first, open(pooled, "rb") as second:
+        assert first.read() == second.read()
+
+
+def test_pool_stops_when_bands_are_abandoned():
+    results = graph_sheet._results(abs, [-1, -2, -3, -4], 2)
+    assert next(results) == 1
+    results.close()
@@ -0,0 +1,19 @@
+# vim: expandtab:ts=4:sw=4
+''' grid_engine puts whole-pixel grids where graph_sheet (and GIMP) does. '''
+
+import graph_sheet
+import grid_engine
+
+
+def test_positions_match_grid_lines():
+    for length in (612, 613, 630, 100, 55, 1001):
+        for spacing in (7, 10, 72):
+            lines = grid_engine.positions(length, float(spacing))
+            assert [position for position, _ in lines] == graph_sheet.grid_lines(length, spacing)
+
+
+def test_one_level_square_grid_matches_sheet():
+    for width, height, spacing in ((613, 97, 72), (630, 101, 10)):
+        raster = grid_engine.Raster(grid_engine.Grid(grid_engine.SQUARE, spacing), width, height)
+        sheet = graph_sheet.Sheet(width, height, spacing)
+        assert raster.rows(0, height) == sheet.rows(0, height)
@@ -0,0 +1,56 @@
+# vim: expandtab:ts=4:sw=4
+''' The memory report counts layer bytes and flags mostly empty full-canvas layers. '''
+
+import json
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+gimpfu_numpy = pytest.importorskip("gimpfu_numpy")
+
+import gimpfu_recorder
+import layer_memory
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _image():
+    image = gimpfu_numpy.Image(10, 10)
+    sparse = gimpfu_numpy.Layer(image, "Sparse", 10, 10)
+    sparse.pixels[:2, :5] = 1.0
+    cropped = gimpfu_numpy.Layer(image, "Cropped", 4, 5)
+    cropped.pixels[...] = 1.0
+    cropped.offsets = (3, 2)
+    image.add_layer(sparse, 0)
+    image.add_layer(cropped, 0)
+    return image
+
+
+def test_layers_counted_and_flagged():
+    rows = dict((row["name"], row) for row in layer_memory.layers(_image()))
+    assert rows["Sparse"]["bytes"] == 10 * 10 * 4
+    assert rows["Sparse"]["coverage"] == pytest.approx(0.1)
+    assert rows["Sparse"]["sparse"]
+    assert rows["Cropped"]["bytes"] == 4 * 5 * 4
+    assert rows["Cropped"]["offsets"] == [3, 2]
+    assert rows["Cropped"]["coverage"] == 1.0
+    assert not rows["Cropped"]["sparse"]
+
+
+def test_json_totals(tmp_path):
+    filename = str(tmp_path / "memory.json")
+    layer_memory.emit(_image(), filename)
+    with open(filename) as stream:
+        summary = json.load(stream)
+    assert summary["bytes"] == 400 + 80
+    assert summary["sparse_bytes"] == 400
+
+
+def test_cropped_layers_take_less():
+    plugin = gimpfu_recorder.load_plugin(os.path.join(ROOT, "Crystal_Tux.py"), gimpfu_numpy)
+    full = layer_memory.as_dict(plugin.draw_tux_image(128))
+    cropped = layer_memory.as_dict(plugin.draw_tux_image(128, True))
+    assert cropped["bytes"] < full["bytes"] / 2
+    # Only the transparent Background stays as large as the canvas
+    assert cropped["sparse_bytes"] == 128 * 128 * 4 < full["sparse_bytes"]
@@ -0,0 +1,48 @@
+# vim: expandtab:ts=4:sw=4
+''' Masks and blurs from the mask cache render the same as computed ones. '''
+
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+gimpfu_numpy = pytest.importorskip("gimpfu_numpy")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PLUGIN = os.path.join(ROOT, "Crystal_Tux.py")
+SIZE = 128
+
+
+@pytest.fixture
+def mask_cache(tmp_path):
+    yield gimpfu_numpy.use_mask_cache(str(tmp_path))
+    gimpfu_numpy.MASK_CACHE = None
+
+
+def _render():
+    image, = gimpfu_numpy.run(PLUGIN, "python_fu_G2_Tux_custom", [SIZE, False, False])
+    return image
+
+
+def assert_same_layers(image, expected):
+    assert [layer.name for layer in image.layers] == [layer.name for layer in expected.layers]
+    for layer, other in zip(image.layers, expected.layers):
+        assert np.array_equal(layer.pixels, other.pixels), layer.name
+
+
+def test_cached_masks_match_computed(mask_cache):
+    first = _render()
+    assert mask_cache.misses and not mask_cache.hits
+    misses = mask_cache.misses
+    second = _render()
+    assert (mask_cache.hits, mask_cache.misses) == (misses, misses)
+    gimpfu_numpy.MASK_CACHE = None
+    computed = _render()
+    assert_same_layers(first, computed)
+    assert_same_layers(second, computed)
+
+
+def test_cache_stores_windows(mask_cache):
+    _render()
+    stored = [np.load(path, mmap_mode="r") for path, _ in mask_cache._files()]
+    assert all(array.shape[:2] != (SIZE, SIZE) for array in stored)
@@ -0,0 +1,46 @@
+# vim: expandtab:ts=4:sw=4
+''' Context sets that change nothing are skipped, and only those. '''
+
+import pdb_context
+
+
+class FakePDB(object):
+    ''' Records the name of every procedure called. '''
+
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args: self.calls.append(name)
+
+
+def test_repeated_set_skipped():
+    fake = FakePDB()
+    pdb = pdb_context.shadow(fake)
+    pdb.gimp_context_set_foreground((0, 0, 0))
+    pdb.gimp_context_set_foreground([0, 0, 0])
+    pdb.gimp_context_set_foreground((255, 255, 255))
+    pdb.gimp_context_set_background((0, 0, 0))
+    assert fake.calls == ["gimp_context_set_foreground"] * 2 + ["gimp_context_set_background"]
+    assert pdb.saved == 1
+
+
+def test_pop_restores_what_push_saved():
+    fake = FakePDB()
+    pdb = pdb_context.shadow(fake)
+    pdb.gimp_context_set_foreground((0, 0, 0))
+    pdb.gimp_context_push()
+    pdb.gimp_context_set_foreground((255, 0, 0))
+    pdb.gimp_context_pop()
+    pdb.gimp_context_set_foreground((0, 0, 0))
+    pdb.gimp_context_set_foreground((255, 0, 0))
+    assert fake.calls.count("gimp_context_set_foreground") == 3
+
+
+def test_swapping_colours_forgets_them():
+    fake = FakePDB()
+    pdb = pdb_context.shadow(fake)
+    pdb.gimp_context_set_foreground((0, 0, 0))
+    pdb.gimp_context_swap_colors()
+    pdb.gimp_context_set_foreground((0, 0, 0))
+    assert fake.calls.count("gimp_context_set_foreground") == 2
@@ -0,0 +1,28 @@
+# vim: expandtab:ts=4:sw=4
+''' pdb_explain costs blurs by their radius. '''
+
+import gimpfu_recorder
+import pdb_explain
+
+
+def _blurred(radius, method=pdb_explain.RLE):
+    image = gimpfu_recorder.Image(400, 400, gimpfu_recorder.RGB)
+    layer = gimpfu_recorder.Layer(image, "Glow", 400, 400, gimpfu_recorder.RGBA_IMAGE, 100,
+                                  gimpfu_recorder.NORMAL_MODE)
+    image.add_layer(layer, 0)
+    pdb = gimpfu_recorder.pdb
+    plan = pdb_explain.explain(lambda: (
+        pdb.gimp_rect_select(image, 100, 100, 50, 50, gimpfu_recorder.CHANNEL_OP_REPLACE, False, 0),
+        pdb.plug_in_gauss(image, layer, radius, radius, method)))
+    return [pixels for _, call, pixels in plan.operations if call.name == "pdb.plug_in_gauss"][0]
+
+
+def test_blur_estimate_grows_with_radius():
+    assert _blurred(4) < _blurred(16)
+    assert _blurred(4, pdb_explain.IIR) < _blurred(16, pdb_explain.IIR)
+
+
+def test_rle_blur_reads_every_kernel_tap():
+    # 50 x 50 selection grown by 4 on every side, 9 taps a pass, two passes
+    assert _blurred(4) == 58 * 58 * 18
+    assert _blurred(4, pdb_explain.IIR) == 58 * 58 * 2
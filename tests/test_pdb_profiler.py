@@ -0,0 +1,33 @@
+# vim: expandtab:ts=4:sw=4
+''' The trace nests every stage and PDB call inside the plug-in's span. '''
+
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _profile(tmp_path):
+    report, trace = str(tmp_path / "report.json"), str(tmp_path / "trace.json")
+    subprocess.check_call([sys.executable, "pdb_profiler.py", "Crystal_Tux.py",
+                           "--json", report, "--trace", trace], cwd=ROOT)
+    with open(report) as stream:
+        report = json.load(stream)
+    with open(trace) as stream:
+        trace = json.load(stream)["traceEvents"]
+    return report, trace
+
+
+def test_trace_spans_nest(tmp_path):
+    report, trace = _profile(tmp_path)
+    plugin = [event for event in trace if event["cat"] == "plugin"]
+    assert [event["name"] for event in plugin] == ["draw_tux"]
+    start, end = plugin[0]["ts"], plugin[0]["ts"] + plugin[0]["dur"]
+    calls = [event for event in trace if event["cat"] == "pdb"]
+    stages = [event for event in trace if event["cat"] == "stage"]
+    assert len(calls) == sum(timing["count"] for timing in report["procedures"].values())
+    assert set(event["name"] for event in stages) >= set(["draw_body", "add_wing_reflection"])
+    for event in calls + stages:
+        assert start <= event["ts"] and event["ts"] + event["dur"] <= end, event["name"]
@@ -0,0 +1,48 @@
+# vim: expandtab:ts=4:sw=4
+''' A poster drawn tile by tile matches drawing it whole. '''
+
+import os
+import struct
+import zlib
+
+import pytest
+
+np = pytest.importorskip("numpy")
+gimpfu_numpy = pytest.importorskip("gimpfu_numpy")
+
+import gimpfu_recorder
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PLUGIN = os.path.join(ROOT, "Crystal_Tux.py")
+SIZE = 128
+
+
+def read_png(path):
+    ''' (height, width, 4) bytes of an unfiltered 8-bit RGBA PNG from png_writer. '''
+    with open(path, "rb") as stream:
+        data = stream.read()
+    position, compressed = 8, b""
+    while position < len(data):
+        length, = struct.unpack(">I", data[position:position + 4])
+        tag = data[position + 4:position + 8]
+        if tag == b"IHDR":
+            width, height = struct.unpack(">II", data[position + 8:position + 16])
+        elif tag == b"IDAT":
+            compressed += data[position + 8:position + 8 + length]
+        position += 12 + length
+    rows = np.frombuffer(zlib.decompress(compressed), np.uint8).reshape(height, width * 4 + 1)
+    assert not rows[:, 0].any()
+    return rows[:, 1:].reshape(height, width, 4)
+
+
+@pytest.mark.parametrize("tile_size", [48, SIZE])
+def test_tiles_match_full_render(tmp_path, tile_size):
+    filename = str(tmp_path / "poster.png")
+    gimpfu_numpy.run(PLUGIN, "python_fu_G2_Tux_poster", [SIZE, tile_size, filename])
+    plugin = gimpfu_recorder.load_plugin(PLUGIN, gimpfu_numpy)
+    expected = gimpfu_numpy.to_rgba8(gimpfu_numpy.composite(plugin.draw_tux_image(SIZE, True)))
+    poster = read_png(filename)
+    assert np.array_equal(poster[..., 3], expected[..., 3])
+    # Colours only count where something shows
+    shown = expected[..., 3] > 0
+    assert np.array_equal(poster[shown], expected[shown])
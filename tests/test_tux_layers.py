@@ -0,0 +1,25 @@
+# vim: expandtab:ts=4:sw=4
+''' Derived selections come back from the longest saved prefix of their steps. '''
+
+import tux_layers
+
+SHRUNK = ("Beak", ("shrink", 2))
+MOVED = SHRUNK + (("translate", 3, 3),)
+
+
+def test_lookup_finds_longest_saved_prefix():
+    selections = tux_layers.SelectionCache(1)
+    assert selections.lookup(MOVED) == (0, None)
+    selections.put(SHRUNK, "shrunk")
+    assert selections.lookup(MOVED) == (2, "shrunk")
+    selections.put(MOVED, "moved")
+    assert selections.lookup(MOVED) == (3, "moved")
+
+
+def test_least_recently_used_dropped():
+    selections = tux_layers.SelectionCache(1, max_bytes=2)
+    assert selections.put(SHRUNK, "shrunk") == []
+    assert selections.put(("Body", ("invert",)), "body") == []
+    selections.lookup(SHRUNK)
+    assert selections.put(MOVED, "moved") == ["body"]
+    assert sorted(selections.clear()) == ["moved", "shrunk"]
@@ -0,0 +1,83 @@
+# vim: expandtab:ts=4:sw=4
+''' Crystal Tux redrawn from the scene graph matches a full render. '''
+
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+gimpfu_numpy = pytest.importorskip("gimpfu_numpy")
+
+import gimpfu_recorder
+import tux_scene
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SIZE = 64
+RED = (255, 0, 0)
+
+
+@pytest.fixture(scope="module")
+def plugin():
+    return gimpfu_recorder.load_plugin(os.path.join(ROOT, "Crystal_Tux.py"), gimpfu_numpy)
+
+
+def _layers(image):
+    return dict((layer.name, layer) for layer in image.layers)
+
+
+def assert_same_layers(image, expected):
+    layers, expected = _layers(image), _layers(expected)
+    assert [layer.name for layer in image.layers] == [layer.name for layer in expected.values()]
+    for name, layer in expected.items():
+        assert layers[name].offsets == layer.offsets, name
+        assert np.array_equal(layers[name].pixels, layer.pixels), name
+
+
+def test_mirrored_part_follows_recoloured_source(plugin):
+    nodes = tux_scene.symmetric(tux_scene.SCENE)
+    base = plugin.draw_tux_image(SIZE, True, nodes)
+    nodes = tux_scene.recolour(nodes, "draw_foot left", fill=RED)
+    image = plugin.draw_tux_image(SIZE, True, nodes, base)
+    assert_same_layers(image, plugin.draw_tux_image(SIZE, True, nodes))
+    foot = _layers(image)["Right Foot"].pixels
+    assert tuple(foot[foot[..., 3] == 1][0, :3]) == (1.0, 0.0, 0.0)
+
+
+def test_pooled_stages_match_serial(plugin):
+    serial = plugin.draw_tux_image(SIZE, True)
+    gimpfu_numpy.gimp.processes = 2
+    try:
+        pooled = plugin.draw_tux_image(SIZE, True)
+    finally:
+        gimpfu_numpy.gimp.processes = 1
+    assert_same_layers(pooled, serial)
+
+
+def test_waves_only_read_earlier_layers():
+    drawn = set()
+    for group in tux_scene.waves(tux_scene.SCENE):
+        assert all(name in drawn for node in group for name in node.reads)
+        drawn.update(name for node in group for name in node.produces)
+    assert drawn == set(tux_scene.STACK)
+
+
+def test_incremental_render_matches_full(plugin):
+    base = plugin.draw_tux_image(SIZE, True)
+    nodes = tux_scene.recolour(tux_scene.SCENE, "draw_beak", left=RED)
+    image = plugin.draw_tux_image(SIZE, True, nodes, base)
+    assert_same_layers(image, plugin.draw_tux_image(SIZE, True, nodes))
+
+
+def test_layer_cache_render_matches_full(plugin):
+    cache = tux_scene.LayerCache()
+    plugin.draw_tux_image(SIZE, True, cache=cache)
+    nodes = tux_scene.recolour(tux_scene.SCENE, "draw_eye", top=RED)
+    image = plugin.draw_tux_image(SIZE, True, nodes, cache=cache)
+    assert_same_layers(image, plugin.draw_tux_image(SIZE, True, nodes))
+
+
+def test_recolouring_keeps_other_keys():
+    nodes = tux_scene.recolour(tux_scene.SCENE, "draw_beak", left=RED)
+    before = tux_scene.node_keys(tux_scene.SCENE, SIZE)
+    after = tux_scene.node_keys(nodes, SIZE)
+    assert [name for name in before if before[name] != after[name]] == ["draw_beak"]
@@ -0,0 +1,34 @@
+# vim: expandtab:ts=4:sw=4
+''' Variants composited from weight maps match rendering each palette. '''
+
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+gimpfu_numpy = pytest.importorskip("gimpfu_numpy")
+
+import gimpfu_recorder
+import tux_scene
+import tux_variants
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SIZE = 64
+PALETTES = [
+    {"draw_beak": {"left": (255, 0, 0)}},
+    {"draw_eye": {"top": (0, 80, 200), "bottom": (10, 20, 30)},
+     "draw_body": {"fill": (40, 40, 90)}},
+]
+
+
+def test_variants_match_full_renders():
+    plugin = gimpfu_recorder.load_plugin(os.path.join(ROOT, "Crystal_Tux.py"), gimpfu_numpy)
+    variants = [tux_scene.apply_palette(tux_scene.SCENE, palette) for palette in PALETTES]
+    batch = tux_variants.Variants(variants)
+    images = []
+    for scene in batch.scenes():
+        images.append(plugin.draw_tux_image(SIZE, True, scene, images[0] if images else None))
+    batch.add(images)
+    for pixels, variant in zip(batch.pixels(), variants):
+        expected = gimpfu_numpy.composite(plugin.draw_tux_image(SIZE, True, variant))
+        assert np.allclose(pixels, expected, atol=1e-5)
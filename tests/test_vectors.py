@@ -0,0 +1,39 @@
+# vim: expandtab:ts=4:sw=4
+''' Paths come back from gimp_vectors_import_from_string as IDs, as in GIMP. '''
+
+import os
+
+import gimpfu_recorder
+import tux_paths
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_import_returns_ids():
+    image = gimpfu_recorder.Image(256, 256, gimpfu_recorder.RGB)
+    count, vectors_ids = gimpfu_recorder.pdb.gimp_vectors_import_from_string(
+        image, tux_paths.SVG, -1, False, True)
+    assert count == len(vectors_ids) == len(tux_paths.PART_NAMES)
+    assert all(isinstance(vectors_id, int) for vectors_id in vectors_ids)
+    names = [gimpfu_recorder.gimp.Vectors.from_id(vectors_id).name for vectors_id in vectors_ids]
+    assert names == [tux_paths.path_id(name) for name in tux_paths.PART_NAMES]
+
+
+def test_crystal_tux_draws_from_imported_ids():
+    gimpfu_recorder.reset()
+    gimpfu_recorder.load_plugin(os.path.join(ROOT, "Crystal_Tux.py"))
+    gimpfu_recorder.REGISTERED["python_fu_G2_Tux_custom"]["function"](64)
+    names = [call.name for call in gimpfu_recorder.CALLS]
+    assert "pdb.gimp_vectors_import_from_string" in names
+    assert "pdb.gimp_image_select_item" in names
+
+
+def test_graph_paper_strokes_imported_path():
+    gimpfu_recorder.reset()
+    gimpfu_recorder.load_plugin(os.path.join(ROOT, "graph_paper.py"))
+    generate = gimpfu_recorder.REGISTERED["python_fu_generate_graph_paper_custom"]["function"]
+    generate(100, 80, 10, 1, 0)
+    stroked = [call for call in gimpfu_recorder.CALLS
+               if call.name == "pdb.gimp_drawable_edit_stroke_item"]
+    assert len(stroked) == 1
+    assert isinstance(stroked[0].args[1], gimpfu_recorder.Vectors)
@@ -0,0 +1,133 @@
+# vim: expandtab:ts=4:sw=4
+''' tiff_writer.py
+
+    A tiled TIFF written tile by tile, the counterpart of png_writer.py for
+    readers that page large images in by tiles.  Tiles are deflated
+    (compression 8) one by one and written as they come in; only their
+    offsets are held until close() writes the directory.  Every tile can
+    be compressed elsewhere -- on a process pool -- with deflate_tile().
+
+    Plain Python (struct and zlib), so GIMP's Python 2 runs it too.  The
+    file is a classic TIFF, so it must stay under 4 GB compressed.
+
+    Usage:
+        writer = TIFFWriter("sheet.tif", width, height, samples=3)  # or bits=1
+        writer.write_tile(data)  # tile_size x tile_size pixels, rows top first
+        ...                      # tiles left to right, then top to bottom
+        writer.close()
+'''
+
+import struct
+import zlib
+
+TILE_SIZE = 256
+# Field types
+SHORT, LONG = 3, 4
+# Tags
+IMAGE_WIDTH, IMAGE_LENGTH, BITS_PER_SAMPLE, COMPRESSION = 256, 257, 258, 259
+PHOTOMETRIC, SAMPLES_PER_PIXEL, PLANAR_CONFIGURATION = 262, 277, 284
+TILE_WIDTH, TILE_LENGTH, TILE_OFFSETS, TILE_BYTE_COUNTS = 322, 323, 324, 325
+# Compression and photometric interpretation values
+DEFLATE = 8
+BLACK_IS_ZERO, RGB = 1, 2
+
+
+def deflate_tile(data, level=6):
+    ''' A tile's bytes compressed for write_tile(compressed=True). '''
+    return zlib.compress(data, level)
+
+
+class TIFFWriter(object):
+    ''' A grey (samples=1) or RGB (samples=3) tiled TIFF of ``width`` x
+        ``height`` filled by write_tile() calls; 8 bits a sample, or 1 for
+        bi-level grey (8 pixels a byte, first one in the high bit, 0 black).
+    '''
+
+    def __init__(self, path, width, height, samples=3, tile_size=TILE_SIZE, level=6, bits=8):
+        if tile_size % 16:
+            raise ValueError("tile size %d is not a multiple of 16" % tile_size)
+        self.width = width
+        self.height = height
+        self.samples = samples
+        self.bits = bits
+        self.tile_size = tile_size
+        self.level = level
+        self.tile_bytes = tile_size * tile_size * samples * bits // 8
+        self.count = (-(-width // tile_size)) * (-(-height // tile_size))
+        self.offsets = []
+        self.sizes = []
+        self.stream = open(path, "wb")
+        # Little-endian header; the directory's offset is filled in by close()
+        self.stream.write(b"II*\0" + struct.pack("<I", 0))
+
+    def write_tile(self, data, compressed=False):
+        ''' Append the next tile: its pixel bytes, padded to a whole tile at
+            the right and bottom edges, or deflate_tile() of them.
+        '''
+        if len(self.offsets) == self.count:
+            raise ValueError("all %d tiles are written" % self.count)
+        if not compressed:
+            if len(data) != self.tile_bytes:
+                raise ValueError("%d bytes are not a tile of %d" % (len(data), self.tile_bytes))
+            data = deflate_tile(data, self.level)
+        self.offsets.append(self.stream.tell())
+        self.sizes.append(len(data))
+        self.stream.write(data)
+        if self.stream.tell() % 2:
+            self.stream.write(b"\0")
+
+    def close(self):
+        ''' Write the directory; every tile must have been written. '''
+        if self.stream is None:
+            return
+        try:
+            if len(self.offsets) != self.count:
+                raise ValueError("%d of %d tiles written" % (len(self.offsets), self.count))
+            self._directory()
+        finally:
+            self.stream.close()
+            self.stream = None
+
+    def _directory(self):
+        bits = [self.bits] * self.samples
+        entries = [
+            (IMAGE_WIDTH, LONG, [self.width]),
+            (IMAGE_LENGTH, LONG, [self.height]),
+            (BITS_PER_SAMPLE, SHORT, bits),
+            (COMPRESSION, SHORT, [DEFLATE]),
+            (PHOTOMETRIC, SHORT, [RGB if self.samples == 3 else BLACK_IS_ZERO]),
+            (SAMPLES_PER_PIXEL, SHORT, [self.samples]),
+            (PLANAR_CONFIGURATION, SHORT, [1]),
+            (TILE_WIDTH, SHORT, [self.tile_size]),
+            (TILE_LENGTH, SHORT, [self.tile_size]),
+            (TILE_OFFSETS, LONG, self.offsets),
+            (TILE_BYTE_COUNTS, LONG, self.sizes),
+        ]
+        fields = []
+        for tag, kind, values in entries:
+            packed = struct.pack("<%d%s" % (len(values), "H" if kind == SHORT else "I"), *values)
+            if len(packed) <= 4:
+                value = packed.ljust(4, b"\0")
+            else:
+                if self.stream.tell() % 2:
+                    self.stream.write(b"\0")
+                value = struct.pack("<I", self.stream.tell())
+                self.stream.write(packed)
+            fields.append(struct.pack("<HHI", tag, kind, len(values)) + value)
+        if self.stream.tell() % 2:
+            self.stream.write(b"\0")
+        directory = self.stream.tell()
+        self.stream.write(struct.pack("<H", len(fields)) + b"".join(fields)
+                          + struct.pack("<I", 0))
+        self.stream.seek(4)
+        self.stream.write(struct.pack("<I", directory))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, _value, _traceback):
+        if exc_type is None:
+            self.close()
+        elif self.stream is not None:
+            self.stream.close()
+            self.stream = None
@@ -0,0 +1,158 @@
+# vim: expandtab:ts=4:sw=4
+''' tux_geometry.py
+
+    Bounding boxes of the Crystal Tux parts computed from their Bezier
+    outlines in tux_paths.py, so the plug-in does not have to select a
+    part, ask GIMP for gimp_selection_bounds and clear the selection again.
+
+    Boxes are (x1, y1, x2, y2) in pixels like gimp_selection_bounds
+    returns them: x2 and y2 are exclusive and every pixel the anti-aliased
+    outline touches is inside.
+'''
+
+import math
+
+import tux_paths
+
+
+def _cubic_extrema(start, control_1, control_2, end):
+    ''' Parameters in (0, 1) where one coordinate of a cubic segment has
+        a local extremum: the roots of its derivative.
+    '''
+    # B'(t) / 3 = a t^2 + b t + c
+    a = -start + 3 * control_1 - 3 * control_2 + end
+    b = 2 * (start - 2 * control_1 + control_2)
+    c = control_1 - start
+    if abs(a) < 1e-12:
+        roots = [-c / b] if abs(b) > 1e-12 else []
+    else:
+        discriminant = b * b - 4 * a * c
+        if discriminant < 0:
+            roots = []
+        else:
+            root = math.sqrt(discriminant)
+            roots = [(-b + root) / (2 * a), (-b - root) / (2 * a)]
+    return [t for t in roots if 0.0 < t < 1.0]
+
+
+def _cubic_point(start, control_1, control_2, end, t):
+    u = 1.0 - t
+    return (u * u * u * start + 3 * u * u * t * control_1 + 3 * u * t * t * control_2
+            + t * t * t * end)
+
+
+def path_extent(points):
+    ''' Exact (xmin, ymin, xmax, ymax) of a flat path from tux_paths. '''
+    xs, ys = [points[0]], [points[1]]
+    for index in range(2, len(points), 6):
+        segment_x = (points[index - 2], points[index], points[index + 2], points[index + 4])
+        segment_y = (points[index - 1], points[index + 1], points[index + 3], points[index + 5])
+        for values, coords in ((xs, segment_x), (ys, segment_y)):
+            values.append(coords[3])
+            for t in _cubic_extrema(*coords):
+                values.append(_cubic_point(coords[0], coords[1], coords[2], coords[3], t))
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+_EXTENTS = dict((name, path_extent(points)) for name, points in tux_paths.PARTS)
+
+
+def clip(bounds, width, height=None):
+    ''' Clip a box to the canvas; None when nothing is left. '''
+    if bounds is None:
+        return None
+    height = width if height is None else height
+    x_1, y_1 = max(0, bounds[0]), max(0, bounds[1])
+    x_2, y_2 = min(width, bounds[2]), min(height, bounds[3])
+    if x_2 <= x_1 or y_2 <= y_1:
+        return None
+    return x_1, y_1, x_2, y_2
+
+
+def part_bounds(name, size=tux_paths.DESIGN_SIZE):
+    ''' Pixel box of a part drawn on a size x size canvas. '''
+    scale = float(size) / tux_paths.DESIGN_SIZE
+    x_min, y_min, x_max, y_max = _EXTENTS[name]
+    return clip(
+        (
+            int(math.floor(x_min * scale)),
+            int(math.floor(y_min * scale)),
+            int(math.ceil(x_max * scale)),
+            int(math.ceil(y_max * scale)),
+        ),
+        size,
+    )
+
+
+def ellipse_bounds(x_pos, y_pos, width, height, size=None):
+    ''' Pixel box of gimp_ellipse_select(image, x_pos, y_pos, width, height). '''
+    bounds = (
+        int(math.floor(x_pos)),
+        int(math.floor(y_pos)),
+        int(math.ceil(x_pos + width)),
+        int(math.ceil(y_pos + height)),
+    )
+    return bounds if size is None else clip(bounds, size)
+
+
+def shrink(bounds, steps):
+    ''' A box around a selection after gimp_selection_shrink(image, steps).
+
+        Only an outer bound: the shrunk outline can sit further in than
+        ``steps``, so it sizes layers but does not place blends or cuts.
+    '''
+    if bounds is None:
+        return None
+    x_1, y_1, x_2, y_2 = bounds
+    if x_2 - x_1 <= 2 * steps or y_2 - y_1 <= 2 * steps:
+        return None
+    return x_1 + steps, y_1 + steps, x_2 - steps, y_2 - steps
+
+
+def grow(bounds, steps, size):
+    ''' Box of a selection after gimp_selection_grow(image, steps). '''
+    if bounds is None:
+        return None
+    x_1, y_1, x_2, y_2 = bounds
+    return clip((x_1 - steps, y_1 - steps, x_2 + steps, y_2 + steps), size)
+
+
+def translate(bounds, off_x, off_y, size):
+    ''' Box of a selection after gimp_selection_translate(image, off_x, off_y). '''
+    if bounds is None:
+        return None
+    x_1, y_1, x_2, y_2 = bounds
+    return clip((x_1 + off_x, y_1 + off_y, x_2 + off_x, y_2 + off_y), size)
+
+
+def union(first, second):
+    if first is None:
+        return second
+    if second is None:
+        return first
+    return (
+        min(first[0], second[0]),
+        min(first[1], second[1]),
+        max(first[2], second[2]),
+        max(first[3], second[3]),
+    )
+
+
+def intersect(first, second):
+    ''' Box of what two boxes share; None when they do not overlap. '''
+    if first is None or second is None:
+        return None
+    x_1, y_1 = max(first[0], second[0]), max(first[1], second[1])
+    x_2, y_2 = min(first[2], second[2]), min(first[3], second[3])
+    if x_2 <= x_1 or y_2 <= y_1:
+        return None
+    return x_1, y_1, x_2, y_2
+
+
+def mirror(bounds, axis):
+    ''' Box after gimp_item_transform_flip about the vertical line x = axis. '''
+    if bounds is None:
+        return None
+    x_1, y_1, x_2, y_2 = bounds
+    twice = int(round(2 * axis))
+    return twice - x_2, y_1, twice - x_1, y_2
@@ -0,0 +1,140 @@
+# vim: expandtab:ts=4:sw=4
+''' tux_layers.py
+
+    In-process, name-indexed view of an image's layer stack.
+
+    Crystal_Tux.py looks layers up by name ("Body", "Beak", "Left Foot
+    Glow", ...) and inserts new layers relative to them.  Asking GIMP each
+    time costs a PDB round-trip per lookup; the registry mirrors the stack
+    instead, so lookups and positions are answered from a dict and a list.
+    It must see every change to the stack: insert through ``add`` and
+    rename through ``rename``, or call ``refresh`` after a procedure that
+    adds layers on its own.
+'''
+
+import collections
+
+import tux_layout
+
+_REGISTRIES = {}
+# Channel bytes (one per pixel) an image's SelectionCache keeps at most
+SELECTION_BYTES = 256 * 1024 * 1024
+
+
+class LayerRegistry(object):
+    ''' Layers of one image, top first, with the active layer tracked the
+        way GIMP does (new layers become active, -1 inserts above it).
+    '''
+
+    def __init__(self, image):
+        self.image = image
+        self.width = image.width
+        self.height = image.height
+        # Offsets and radii scaled to this canvas, see tux_layout.py
+        self.layout = tux_layout.Layout(self.width)
+        # Size new layers to their content instead of the canvas
+        self.crop = False
+        # Only keep what lies inside this box of the canvas (a poster tile)
+        self.window = None
+        # Layers drawn as a flipped copy of another and the offset moving
+        # the copy, {name: (source, (off_x, off_y))}, see tux_scene.mirrors
+        self.mirrors = {}
+        self.order = []
+        self.by_name = {}
+        self.active = None
+        # Imported part outlines by part name, see Crystal_Tux.import_part_vectors
+        self.vectors = {}
+        # Selections derived from them, see Crystal_Tux.select_derived
+        self.selections = SelectionCache(self.width * self.height)
+        self.refresh()
+
+    def refresh(self):
+        ''' Re-read the stack from the image: one round-trip. '''
+        self.order = list(self.image.layers)
+        self.by_name = dict((layer.name, layer) for layer in self.order)
+        self.active = self.image.active_layer
+
+    def __getitem__(self, name):
+        return self.by_name[name]
+
+    def __contains__(self, name):
+        return name in self.by_name
+
+    def get(self, name, default=None):
+        return self.by_name.get(name, default)
+
+    def position(self, layer):
+        ''' Stack position of a layer or layer name, 0 being the top. '''
+        if not hasattr(layer, "name"):
+            layer = self.by_name[layer]
+        return self.order.index(layer)
+
+    def add(self, layer, position=-1):
+        ''' Insert ``layer`` into the image at ``position`` and return it. '''
+        self.image.add_layer(layer, position)
+        if position < 0:
+            position = self.order.index(self.active) if self.active in self.order else 0
+        self.order.insert(min(position, len(self.order)), layer)
+        self.by_name[layer.name] = layer
+        self.active = layer
+        return layer
+
+    def rename(self, layer, name):
+        if self.by_name.get(layer.name) is layer:
+            del self.by_name[layer.name]
+        layer.name = name
+        self.by_name[name] = layer
+        return layer
+
+    def activate(self, layer):
+        self.image.active_layer = layer
+        self.active = layer
+
+
+class SelectionCache(object):
+    ''' Selections saved as channels, by key: a part name followed by the
+        operations that derived the selection from its outline, e.g.
+        ("Beak", ("shrink", 2)).  The least recently used go once the
+        channels pass ``max_bytes``; put() returns them for removal.
+    '''
+
+    def __init__(self, channel_bytes, max_bytes=SELECTION_BYTES):
+        self.channel_bytes = channel_bytes
+        self.max_bytes = max_bytes
+        self.entries = collections.OrderedDict()
+
+    def lookup(self, key):
+        ''' (count, channel) of the longest cached key[:count], shortest
+            being the part and one operation; (0, None) when there is none.
+        '''
+        for count in range(len(key), 1, -1):
+            channel = self.entries.pop(key[:count], None)
+            if channel is not None:
+                self.entries[key[:count]] = channel
+                return count, channel
+        return 0, None
+
+    def put(self, key, channel):
+        self.entries[key] = channel
+        dropped = []
+        while len(self.entries) * self.channel_bytes > self.max_bytes and len(self.entries) > 1:
+            dropped.append(self.entries.popitem(last=False)[1])
+        return dropped
+
+    def clear(self):
+        ''' Forget every channel and return them for removal. '''
+        channels = list(self.entries.values())
+        self.entries.clear()
+        return channels
+
+
+def registry(image):
+    ''' The registry of ``image``, created on first use. '''
+    if image.ID not in _REGISTRIES:
+        _REGISTRIES[image.ID] = LayerRegistry(image)
+    return _REGISTRIES[image.ID]
+
+
+def release(image):
+    ''' Drop the registry of ``image`` once it is finished. '''
+    _REGISTRIES.pop(image.ID, None)
@@ -0,0 +1,101 @@
+# vim: expandtab:ts=4:sw=4
+''' tux_layout.py
+
+    Every offset, radius and shrink amount Crystal_Tux.py draws with,
+    given on the 256 px design grid of tux_paths.py and scaled to the
+    canvas actually being drawn, so any size renders natively.
+
+    Whole numbers are pixel counts (selection shrink/grow/translate, drop
+    shadow offsets) and stay whole after scaling; floats (blur radii) are
+    scaled as they are.  Pairs and tuples scale element-wise, and entries
+    that differ per side map "left" and "right" to their value.
+'''
+
+import math
+
+import tux_paths
+
+LAYOUT = {
+    # Glows inside the feet, eyes and beak
+    "glow_shrink": 7,
+    "glow_blend_inset": 7,
+    "glow_blur": 10.0,
+    "beak_glow_blend_drop": 4,
+    # Highlights blended inside a slightly shrunk part
+    "reflection_shrink": 2,
+    "pupil_reflection_shrink": 1,
+    "eyelid_reflection_cut": (0, 3),
+    "eyelid_reflection_blur": 2.0,
+    "eye_reflection_top_cut": {"left": (-15, 4), "right": (-11, 5)},
+    "eye_reflection_top_keep": {"left": (20, -28), "right": (15, -22)},
+    "eye_reflection_bottom_cut": {"left": (8, -8), "right": (1, -7)},
+    "pupil_reflection_top_cut": (-2, 3),
+    "pupil_reflection_top_keep": (4, -14),
+    "pupil_reflection_bottom_cut": {"left": (3, -1), "right": (1, -3)},
+    # Beak reflection cut by the right eye outline moved onto the beak
+    "beak_reflection_cut": (-42, 40),
+    "beak_reflection_bottom_cut": (4, -2),
+    # Ellipses: offset from the reference part's corner, then width, height
+    "white_patch_reflection": (5, -19, 127, 165),
+    "foot_reflection": (-41, 152),
+    "foot_reflection_shrink": 5,
+    "body_reflection": (-59, -47, 119, 103),
+    "body_reflection_blend_drop": 8,
+    "body_reflection_blur": 2.0,
+    "body_reflection_bottom_cut": (-30, -45, 200, 160),
+    "wing_reflection_cut": (3, 3),
+    "wing_reflection_bottom_shrink": 1,
+    "wing_reflection_bottom_keep": (-125, 36),
+    # Shadows
+    "fill_seed": 2,
+    "foot_body_shadow": (10, -1),
+    "foot_shadow_grow": 5,
+    "foot_shadow_cut": (-20, 5),
+    "shadow_blur": 15.0,
+    "beak_drop_shadow": (2, 8),
+    "eye_drop_shadow": (4, 4),
+    "tux_drop_shadow": (2, 8),
+    "drop_shadow_blur": 15,
+    # Mirror symmetry (tux_scene.symmetric): the vertical line the sides
+    # flip about, and the offsets that move a flipped left part onto the
+    # right one, whose outline differs a little
+    "mirror_axis": 128.0,
+    "wing_mirror": (-2, -2),
+    "foot_mirror": (1, 0),
+    "eye_mirror": (1, 2),
+}
+
+# Blur radii: how far paint spreads past what was selected
+BLURS = (
+    "glow_blur",
+    "eyelid_reflection_blur",
+    "body_reflection_blur",
+    "shadow_blur",
+    "drop_shadow_blur",
+)
+
+
+class Layout(object):
+    ''' LAYOUT scaled to a size x size canvas. '''
+
+    def __init__(self, size):
+        self.size = size
+        self.scale = float(size) / tux_paths.DESIGN_SIZE
+
+    def __call__(self, name, side=None):
+        value = LAYOUT[name]
+        if isinstance(value, dict):
+            value = value[side]
+        return self.scaled(value)
+
+    def scaled(self, value):
+        if isinstance(value, tuple):
+            return tuple(self.scaled(item) for item in value)
+        if isinstance(value, float):
+            return value * self.scale
+        # Round halves up on Python 2 and 3 alike
+        return int(math.floor(value * self.scale + 0.5))
+
+    def blur_extent(self):
+        ''' Pixels the widest blur reaches, rounded up. '''
+        return int(math.ceil(max(self(name) for name in BLURS)))
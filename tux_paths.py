@@ -0,0 +1,223 @@
+# vim: expandtab:ts=4:sw=4
+''' tux_paths.py
+
+    Outline of every Crystal Tux body part, on the 256x256 design grid.
+
+    Each part is one closed path of cubic Bezier segments, stored flat:
+    the start point, then for each segment its two control points and its
+    end point (x, y pairs).  The SVG for GIMP's importer is built from this
+    table once, with every part in a single document.
+'''
+
+DESIGN_SIZE = 256
+
+# In drawing order.
+# fmt: off
+PARTS = (
+    (
+        "Body",
+        (
+            191.55, 45.00,
+            197.33, 59.30, 196.46, 75.14, 199.89, 90.00,
+            204.25, 108.93, 213.75, 119.91, 214.00, 141.00,
+            214.42, 177.06, 196.44, 209.60, 162.00, 223.55,
+            147.40, 229.46, 138.40, 230.18, 123.00, 230.00,
+            92.69, 229.64, 61.71, 207.56, 49.87, 180.00,
+            43.10, 164.23, 42.81, 154.65, 43.00, 138.00,
+            43.16, 124.27, 52.23, 103.28, 55.58, 88.00,
+            55.58, 88.00, 62.03, 49.00, 62.03, 49.00,
+            69.93, 24.13, 90.87, 8.08, 116.00, 3.44,
+            148.33, -0.71, 178.94, 13.79, 191.55, 45.00,
+        ),
+    ),
+    (
+        "White Patch",
+        (
+            130.00, 86.22,
+            136.01, 86.07, 141.31, 87.52, 147.00, 89.34,
+            177.72, 99.19, 196.95, 132.65, 197.00, 164.00,
+            197.00, 164.00, 197.00, 173.00, 197.00, 173.00,
+            196.91, 180.71, 193.72, 197.51, 189.78, 203.99,
+            187.08, 208.43, 181.30, 212.43, 177.00, 215.33,
+            163.67, 224.31, 150.72, 228.11, 135.00, 230.56,
+            126.03, 231.96, 116.72, 229.97, 108.00, 227.87,
+            95.59, 224.88, 75.12, 215.43, 67.65, 204.99,
+            63.10, 198.63, 59.04, 178.01, 59.00, 170.00,
+            58.82, 130.69, 80.26, 93.97, 121.00, 86.22,
+            121.00, 86.22, 130.00, 86.22, 130.00, 86.22,
+        ),
+    ),
+    (
+        "Left Wing",
+        (
+            58.00, 93.00,
+            58.00, 93.00, 55.61, 124.00, 55.61, 124.00,
+            55.13, 126.26, 53.54, 129.79, 52.58, 132.00,
+            51.31, 134.92, 48.90, 140.43, 46.61, 142.49,
+            44.40, 144.48, 37.32, 146.26, 34.00, 147.60,
+            34.00, 147.60, 15.00, 156.89, 15.00, 156.89,
+            11.72, 157.93, 8.05, 157.94, 6.92, 153.94,
+            5.37, 148.45, 13.61, 138.72, 17.09, 135.00,
+            17.09, 135.00, 41.96, 113.00, 41.96, 113.00,
+            49.43, 105.19, 50.52, 101.42, 56.00, 93.00,
+            56.00, 93.00, 58.00, 93.00, 58.00, 93.00,
+        ),
+    ),
+    (
+        "Left Foot",
+        (
+            115.83, 210.00,
+            121.25, 216.68, 126.19, 230.52, 115.83, 235.69,
+            113.03, 237.18, 109.23, 236.99, 106.00, 237.00,
+            106.00, 237.00, 52.00, 237.00, 52.00, 237.00,
+            48.81, 237.00, 44.93, 237.18, 42.18, 235.69,
+            32.01, 230.51, 36.74, 216.65, 42.18, 210.01,
+            51.91, 198.65, 63.42, 197.18, 77.00, 195.46,
+            90.59, 194.77, 106.71, 199.28, 115.83, 210.00,
+        ),
+    ),
+    (
+        "Left Eyelid",
+        (
+            133.98, 61.00,
+            135.28, 67.44, 135.50, 74.50, 133.98, 81.00,
+            133.76, 83.14, 133.13, 86.63, 131.30, 88.01,
+            129.65, 89.26, 126.03, 89.00, 124.00, 89.00,
+            124.00, 89.00, 83.00, 89.00, 83.00, 89.00,
+            80.87, 89.00, 77.27, 89.23, 75.51, 87.98,
+            71.51, 85.14, 71.95, 73.52, 72.00, 69.00,
+            72.19, 53.54, 81.19, 37.24, 97.00, 33.47,
+            116.78, 30.70, 129.34, 42.19, 133.98, 61.00,
+        ),
+    ),
+    (
+        "Left Eye",
+        (
+            109.00, 101.61,
+            95.35, 104.58, 85.47, 95.43, 81.72, 83.00,
+            76.84, 66.81, 82.10, 46.45, 100.00, 41.52,
+            133.70, 36.28, 137.02, 95.51, 109.00, 101.61,
+        ),
+    ),
+    (
+        "Left Pupil",
+        (
+            120.02, 84.34,
+            113.56, 82.45, 110.99, 70.10, 119.05, 64.04,
+            132.98, 60.36, 131.00, 87.57, 120.02, 84.34,
+        ),
+    ),
+    (
+        "Right Wing",
+        (
+            208.52, 106.00,
+            219.42, 119.86, 232.48, 126.15, 241.19, 137.00,
+            244.04, 140.55, 252.01, 150.02, 248.36, 154.69,
+            244.08, 160.16, 229.85, 150.60, 225.00, 148.26,
+            225.00, 148.26, 207.97, 141.47, 207.97, 141.47,
+            205.85, 139.23, 202.69, 130.23, 201.72, 127.00,
+            199.18, 118.57, 193.18, 98.92, 193.00, 91.00,
+            202.89, 91.59, 201.18, 96.67, 208.52, 106.00,
+        ),
+    ),
+    (
+        "Right Foot",
+        (
+            215.10, 210.09,
+            219.88, 216.01, 224.83, 229.49, 216.79, 234.91,
+            213.46, 237.16, 208.84, 236.99, 205.00, 237.00,
+            205.00, 237.00, 150.00, 237.00, 150.00, 237.00,
+            142.93, 236.91, 136.28, 235.24, 135.23, 227.00,
+            134.75, 223.29, 136.33, 219.31, 137.89, 216.00,
+            145.22, 200.51, 160.84, 197.50, 176.00, 195.44,
+            188.99, 194.40, 206.72, 199.71, 215.10, 210.09,
+        ),
+    ),
+    (
+        "Right Eyelid",
+        (
+            177.00, 91.00,
+            177.00, 91.00, 131.00, 91.00, 131.00, 91.00,
+            128.60, 91.00, 124.48, 91.24, 122.48, 89.83,
+            120.13, 88.15, 120.08, 84.61, 120.01, 82.00,
+            119.83, 74.96, 120.80, 68.38, 123.99, 62.00,
+            137.77, 34.45, 175.22, 37.68, 185.30, 66.00,
+            188.96, 76.27, 187.21, 80.30, 187.00, 90.00,
+            182.16, 90.87, 181.99, 90.98, 177.00, 91.00,
+        ),
+    ),
+    (
+        "Right Eye",
+        (
+            172.61, 61.02,
+            183.29, 74.38, 173.57, 91.60, 158.00, 94.53,
+            150.45, 95.96, 140.85, 93.90, 135.10, 88.67,
+            125.53, 79.96, 125.98, 65.66, 136.04, 57.53,
+            139.82, 54.48, 143.39, 53.49, 148.00, 52.46,
+            157.39, 51.17, 166.44, 53.29, 172.61, 61.02,
+        ),
+    ),
+    (
+        "Right Pupil",
+        (
+            137.79, 82.81,
+            133.85, 84.95, 130.45, 81.70, 129.43, 78.00,
+            128.10, 73.18, 129.25, 69.10, 133.11, 66.07,
+            143.33, 63.59, 144.18, 79.33, 137.79, 82.81,
+        ),
+    ),
+    (
+        "Beak",
+        (
+            149.50, 94.10,
+            152.60, 100.41, 140.50, 112.49, 136.42, 116.96,
+            134.53, 119.03, 132.85, 120.89, 130.00, 121.55,
+            123.60, 123.04, 112.18, 109.70, 108.33, 105.00,
+            106.61, 102.90, 104.35, 99.87, 104.65, 97.00,
+            105.37, 90.12, 116.52, 87.65, 122.00, 86.46,
+            129.20, 85.47, 145.85, 86.67, 149.50, 94.10,
+        ),
+    ),
+)
+# fmt: on
+
+PATHS = dict(PARTS)
+PART_NAMES = tuple(name for name, _ in PARTS)
+
+
+def path_id(name):
+    ''' SVG id (and GIMP vectors name) of a part: "Left Eye" -> "Left_Eye". '''
+    return name.replace(" ", "_")
+
+
+def path_data(points):
+    ''' SVG path data ("M x,y C ... Z") of a flat point list. '''
+    pairs = ["%.2f,%.2f" % (points[index], points[index + 1])
+             for index in range(0, len(points), 2)]
+    return "M %s C %s Z" % (pairs[0], " ".join(pairs[1:]))
+
+
+def mirrored(points, axis, off_x=0.0, off_y=0.0):
+    ''' A flat path flipped about the vertical line x = axis, then moved. '''
+    flipped = []
+    for index in range(0, len(points), 2):
+        flipped.extend((2 * axis - points[index] + off_x, points[index + 1] + off_y))
+    return tuple(flipped)
+
+
+def svg_document(names=PART_NAMES, size=DESIGN_SIZE, paths=PATHS):
+    ''' One SVG holding the paths of ``names`` with a size x size viewBox;
+        ``paths`` maps names to outlines, PATHS or a variant of it.
+    '''
+    elements = "".join(
+        '<path id="%s" fill="none" stroke="black" stroke-width="1" d="%s" />'
+        % (path_id(name), path_data(paths[name]))
+        for name in names
+    )
+    return (
+        '<svg xmlns="http://www.w3.org/2000/svg" width="%dpx" height="%dpx" '
+        'viewBox="0 0 %d %d">%s</svg>' % (size, size, size, size, elements)
+    )
+
+
+SVG = svg_document()
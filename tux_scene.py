@@ -0,0 +1,609 @@
+# vim: expandtab:ts=4:sw=4
+''' tux_scene.py
+
+    The Crystal Tux recipe as data: one node per drawing stage, naming the
+    layers it reads (selects, cuts with or stacks against) and the layers
+    it produces, the part outlines and tux_layout.py entries (offsets,
+    shrink amounts, blur radii) it draws with, and its colours.
+    Crystal_Tux.py draws the nodes; this module orders them.
+
+    ``execute`` runs the nodes in dependency order.  Under GIMP they run
+    one after the other in the image itself.  When the backend can move
+    layers between processes (gimpfu_numpy.py) every wave of independent
+    nodes -- the left and right parts, the reflection passes -- is drawn
+    side by side on a process pool, each node in a scratch image holding
+    copies of the layers it reads, and the layers it produces are stacked
+    into the image in STACK order.
+
+    Every node also gets a fingerprint of its inputs and of everything
+    upstream (node_keys), so a variant -- say recolour(SCENE, "draw_beak",
+    left=(220, 184, 12)) -- only redraws the nodes whose fingerprint
+    changed and takes the other layers from the previous image or a
+    LayerCache.  A change of geometry or blur radius redraws the node
+    and everything downstream of it.
+
+    symmetric(SCENE) draws the paired parts -- wings, feet, eyelids, eyes
+    and pupils -- once: the right node of each pair copies the left one's
+    layers and flips them about tux_layout.py's "mirror_axis", moved by a
+    per-pair offset.  The right outlines become the flipped left ones as
+    well (see mirrors), so everything selected from them lines up.
+'''
+
+import collections
+import copy
+import hashlib
+import multiprocessing
+import os
+
+import tux_layers
+import tux_layout
+import tux_paths
+
+# Every layer of the finished image, top first
+STACK = [
+    "On Left Foot Shadow",
+    "Left Foot Reflection",
+    "Left Foot Glow",
+    "Left Eye Reflection Top",
+    "Left Pupil Reflection Top",
+    "Beak Reflection Top",
+    "Beak Reflection Bottom",
+    "Beak Glow",
+    "Beak",
+    "Beak Drop Shadow",
+    "Left Pupil Reflection Bottom",
+    "Left Pupil",
+    "Left Eye Reflection Bottom",
+    "Left Eye Glow",
+    "Left Eye",
+    "Left Eye Drop Shadow",
+    "Right Eye Reflection Top",
+    "Right Pupil Reflection Top",
+    "Right Pupil Reflection Bottom",
+    "Right Pupil",
+    "Right Eye Reflection Bottom",
+    "Right Eye Glow",
+    "Right Eye",
+    "Right Eye Drop Shadow",
+    "Left Eyelid Reflection",
+    "Left Eyelid",
+    "Left Foot",
+    "Left Foot Body Shadow",
+    "Left Wing Reflection Top",
+    "Left Wing Reflection Bottom",
+    "Left Wing",
+    "On Right Foot Shadow",
+    "Right Foot Reflection",
+    "Right Foot Glow",
+    "Right Eyelid Reflection",
+    "Right Eyelid",
+    "Right Foot",
+    "Right Foot Body Shadow",
+    "Right Wing Reflection Top",
+    "Right Wing Reflection Bottom",
+    "Right Wing",
+    "White Patch Reflection Top",
+    "White Patch Reflection Bottom",
+    "White Patch",
+    "Body Reflection Top",
+    "Body Reflection Bottom",
+    "Body",
+    "Background",
+    "Drop Shadow",
+]
+
+# Right-hand layers always drawn as a flipped copy of a left-hand one
+MIRRORED = {
+    "Right Foot Reflection": "Left Foot Reflection",
+    "Right Wing Reflection Top": "Left Wing Reflection Top",
+    "Right Wing Reflection Bottom": "Left Wing Reflection Bottom",
+    "Right Foot Body Shadow": "Left Foot Body Shadow",
+    "On Right Foot Shadow": "On Left Foot Shadow",
+}
+
+# Stages whose right node symmetric() can replace by the left one's
+# layers flipped, with the tux_layout.py entry of the offset that then
+# moves them onto the right part.  The eye parts share one so that the
+# eyelid, eye and pupil stay in place with respect to each other.
+SYMMETRIC_STAGES = {
+    "draw_wing": "wing_mirror",
+    "draw_foot": "foot_mirror",
+    "draw_eyelid": "eye_mirror",
+    "draw_eye": "eye_mirror",
+    "draw_pupil": "eye_mirror",
+}
+
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+
+
+class Node(object):
+    ''' One stage of the recipe, drawn by the Crystal_Tux.py function
+        named ``stage`` as stage(image, node).
+    '''
+
+    def __init__(self, stage, side=None, reads=(), produces=(), parts=(), layout=(),
+                 colours=None):
+        self.stage = stage
+        self.side = side
+        self.name = stage if side is None else "%s %s" % (stage, side)
+        # Layers the stage selects, cuts with or positions against
+        self.reads = list(reads)
+        # Layers the stage adds to the image
+        self.produces = list(produces)
+        # Outlines from tux_paths.py whose geometry the stage uses
+        self.parts = list(parts)
+        # tux_layout.py entries: offsets, shrink amounts and blur radii
+        self.layout = list(layout)
+        # Colours by role, e.g. "fill", "glow_foreground"
+        self.colours = dict(colours or {})
+        # Set by symmetric(): (offset entry, ((layer, source layer), ...))
+        # when the node flips copies of other layers instead of drawing
+        self.mirror = None
+
+    def __repr__(self):
+        return "Node(%r)" % self.name
+
+
+def _side_names(side, names):
+    return [name % side.capitalize() if "%s" in name else name for name in names]
+
+
+def _sided(stage, reads, produces, parts, layout, colours):
+    ''' A left and a right node; layer and part names contain "%s" for
+        the side, colours map "left" and "right" when they differ.
+    '''
+    nodes = []
+    for side in ("left", "right"):
+        nodes.append(Node(
+            stage,
+            side,
+            _side_names(side, reads),
+            _side_names(side, produces),
+            _side_names(side, parts),
+            layout,
+            colours.get(side, colours),
+        ))
+    return nodes
+
+
+GLOW = ["glow_shrink", "glow_blur"]
+
+SCENE = (
+    [
+        Node("draw_background", produces=["Background"]),
+        Node("draw_body", reads=["Background"], produces=["Body"], parts=["Body"],
+             colours={"fill": BLACK}),
+        Node("draw_tummy", reads=["Body"], produces=["White Patch"], parts=["White Patch"],
+             colours={"top": (208, 208, 208), "bottom": (171, 171, 171)}),
+    ]
+    + _sided("draw_wing", ["White Patch"], ["%s Wing"], ["%s Wing"], [], {"fill": BLACK})
+    + _sided(
+        "draw_foot",
+        ["%s Wing"],
+        ["%s Foot", "%s Foot Glow"],
+        ["%s Foot"],
+        GLOW + ["glow_blend_inset"],
+        {
+            "left": {"fill": (223, 186, 0), "glow_foreground": (240, 244, 0),
+                     "glow_background": (248, 192, 0)},
+            "right": {"fill": (223, 186, 0), "glow_foreground": (248, 192, 0),
+                      "glow_background": (240, 244, 0)},
+        },
+    )
+    + _sided(
+        "draw_eyelid",
+        ["%s Foot"],
+        ["%s Eyelid", "%s Eyelid Reflection"],
+        ["%s Eyelid"],
+        ["eyelid_reflection_blur", "reflection_shrink", "eyelid_reflection_cut"],
+        {"fill": BLACK, "reflection": WHITE},
+    )
+    + _sided(
+        "draw_eye",
+        # Both eyes go below the left eyelid reflection
+        ["Left Eyelid Reflection"],
+        ["%s Eye", "%s Eye Glow", "%s Eye Reflection Top", "%s Eye Reflection Bottom"],
+        ["%s Eye"],
+        GLOW + ["reflection_shrink", "eye_reflection_top_cut", "eye_reflection_top_keep",
+                "eye_reflection_bottom_cut"],
+        {"top": (165, 165, 165), "bottom": (148, 148, 148), "glow": (222, 219, 222),
+         "reflection": WHITE},
+    )
+    + _sided(
+        "draw_pupil",
+        ["%s Eye Reflection Bottom"],
+        ["%s Pupil", "%s Pupil Reflection Top", "%s Pupil Reflection Bottom"],
+        ["%s Pupil"],
+        ["pupil_reflection_shrink", "pupil_reflection_top_cut", "pupil_reflection_top_keep",
+         "pupil_reflection_bottom_cut"],
+        {"fill": BLACK, "reflection": WHITE},
+    )
+    + [
+        Node(
+            "draw_beak",
+            reads=["Left Pupil Reflection Bottom"],
+            produces=["Beak", "Beak Glow"],
+            parts=["Beak"],
+            layout=GLOW + ["beak_glow_blend_drop"],
+            colours={"left": (220, 160, 14), "right": (220, 184, 12),
+                     "glow_foreground": (240, 244, 0), "glow_background": (248, 192, 0)},
+        ),
+        Node(
+            "add_body_reflections",
+            reads=["Body"],
+            produces=["Body Reflection Top", "Body Reflection Bottom"],
+            parts=["Right Eye", "Body", "Beak", "White Patch"],
+            layout=["body_reflection", "body_reflection_blur", "body_reflection_blend_drop",
+                    "reflection_shrink", "body_reflection_bottom_cut"],
+            colours={"reflection": WHITE},
+        ),
+        Node(
+            "add_beak_reflections",
+            reads=["Beak Glow", "Beak", "Right Eye"],
+            produces=["Beak Reflection Top", "Beak Reflection Bottom"],
+            parts=["Beak", "Right Eye"],
+            layout=["reflection_shrink", "beak_reflection_cut", "beak_reflection_bottom_cut"],
+            colours={"reflection": WHITE},
+        ),
+        Node(
+            "add_white_patch_reflection",
+            reads=["White Patch"],
+            produces=["White Patch Reflection Top", "White Patch Reflection Bottom"],
+            parts=["White Patch", "Left Foot"],
+            layout=["white_patch_reflection", "reflection_shrink"],
+            colours={"reflection": WHITE},
+        ),
+        Node(
+            "add_foot_reflections",
+            reads=["Left Foot Glow", "Right Foot Glow"],
+            produces=["Left Foot Reflection", "Right Foot Reflection"],
+            parts=["Left Eye"],
+            layout=["foot_reflection", "foot_reflection_shrink"],
+            colours={"reflection": WHITE},
+        ),
+        Node(
+            "add_wing_reflection",
+            reads=["Left Wing", "Right Wing", "Right Eye"],
+            produces=["Left Wing Reflection Top", "Right Wing Reflection Top",
+                      "Left Wing Reflection Bottom", "Right Wing Reflection Bottom"],
+            parts=["Left Wing", "Right Eye"],
+            layout=["reflection_shrink", "wing_reflection_cut", "wing_reflection_bottom_shrink",
+                    "fill_seed", "wing_reflection_bottom_keep"],
+            colours={"reflection": WHITE},
+        ),
+        Node(
+            "add_foot_body_shadow",
+            reads=["Left Foot", "Right Foot", "Body"],
+            produces=["Left Foot Body Shadow", "Right Foot Body Shadow"],
+            parts=["Left Foot"],
+            layout=["shadow_blur", "foot_body_shadow", "fill_seed"],
+            colours={"shadow": BLACK},
+        ),
+        Node(
+            "add_foot_shadows",
+            reads=["Left Foot Reflection", "Right Foot Reflection", "Left Foot"],
+            produces=["On Left Foot Shadow", "On Right Foot Shadow"],
+            parts=["Left Foot"],
+            layout=["foot_shadow_grow", "shadow_blur", "fill_seed", "foot_shadow_cut"],
+            colours={"shadow": BLACK},
+        ),
+        Node(
+            "add_other_shadows",
+            reads=["Beak", "Left Eye", "Right Eye", "Body", "Left Foot", "Right Foot",
+                   "Background"],
+            produces=["Beak Drop Shadow", "Left Eye Drop Shadow", "Right Eye Drop Shadow",
+                      "Drop Shadow"],
+            parts=["Beak", "Left Eye", "Right Eye", "Body", "Left Foot", "Right Foot"],
+            layout=["drop_shadow_blur", "beak_drop_shadow", "eye_drop_shadow",
+                    "tux_drop_shadow"],
+            colours={"shadow": BLACK},
+        ),
+    ]
+)
+
+
+def waves(nodes):
+    ''' ``nodes`` grouped so that every node only reads layers produced in
+        earlier groups; nodes in one group do not depend on each other.
+    '''
+    producer = {}
+    for node in nodes:
+        for name in node.produces:
+            if name in producer:
+                raise ValueError("%r is produced by %s and %s" % (name, producer[name], node))
+            producer[name] = node
+    for node in nodes:
+        for name in node.reads:
+            if name not in producer:
+                raise ValueError("%s reads %r, which no node produces" % (node, name))
+
+    drawn, pending, groups = set(), list(nodes), []
+    while pending:
+        group = [node for node in pending
+                 if all(producer[name].name in drawn for name in node.reads)]
+        if not group:
+            raise ValueError("Dependency cycle between %s" % pending)
+        drawn.update(node.name for node in group)
+        pending = [node for node in pending if node.name not in drawn]
+        groups.append(group)
+    return groups
+
+
+def _canonical(value):
+    if isinstance(value, dict):
+        return sorted(value.items())
+    return value
+
+
+def node_keys(nodes, size, crop=False, window=None):
+    ''' A fingerprint per node name of everything its layers depend on:
+        its colours, tux_layout.py entries and part outlines, the canvas
+        and window, and the outlines of the layers it reads.
+
+        Stages only use the layers they read for their alpha -- selections,
+        cuts and stacking -- never for their colours, and colours never
+        change alpha.  So a node depends on the shape, not the key, of the
+        nodes upstream, and recolouring one leaves the others' keys alone.
+        The exception is a node symmetric() made: it copies its source
+        layers, colours and all, so their keys are part of its own.
+    '''
+    producer = dict((name, node) for node in nodes for name in node.produces)
+    keys, shapes = {}, {}
+    for group in waves(nodes):
+        for node in group:
+            inputs = (
+                node.stage,
+                node.side,
+                size,
+                bool(crop),
+                window,
+                node.produces,
+                node.mirror,
+                [(name, _canonical(tux_layout.LAYOUT[name])) for name in node.layout],
+                [(name, tux_paths.PATHS[name]) for name in node.parts],
+                sorted(shapes[producer[name].name] for name in node.reads),
+            )
+            shapes[node.name] = _digest(inputs)
+            colours = sorted(node.colours.items())
+            if node.mirror is not None:
+                # Flipped copies keep their source layers' colours
+                _, sources = node.mirror
+                colours.extend(sorted(set(keys[producer[source].name] for _, source in sources)))
+            keys[node.name] = _digest((inputs, colours))
+    return keys
+
+
+def _digest(value):
+    return hashlib.sha1(repr(value).encode("utf-8")).hexdigest()
+
+
+def recolour(nodes, name, **colours):
+    ''' A copy of ``nodes`` in which the node ``name`` ("draw_eye left"),
+        or both sides of a stage ("draw_eye"), paints with ``colours`` by role.
+    '''
+    changed = []
+    for node in nodes:
+        if name in (node.name, node.stage):
+            unknown = set(colours) - set(node.colours)
+            if unknown:
+                raise KeyError("%s has no colour %s" % (node, ", ".join(sorted(unknown))))
+            node = copy.copy(node)
+            node.colours = dict(node.colours, **colours)
+        changed.append(node)
+    if not any(name in (node.name, node.stage) for node in nodes):
+        raise KeyError("No node %r" % name)
+    return changed
+
+
+def apply_palette(nodes, palette):
+    ''' ``nodes`` recoloured by a palette: {node or stage name: {role: colour}}. '''
+    for name in sorted(palette):
+        colours = dict((str(role), tuple(colour)) for role, colour in palette[name].items())
+        nodes = recolour(nodes, name, **colours)
+    return nodes
+
+
+def symmetric(nodes, stages=tuple(SYMMETRIC_STAGES)):
+    ''' A copy of ``nodes`` in which the right node of each of ``stages``
+        (see SYMMETRIC_STAGES) flips copies of the left node's layers
+        instead of drawing its own, colours included.
+    '''
+    changed = []
+    for node in nodes:
+        if node.stage in stages and node.side == "right":
+            sources = [name.replace("Right", "Left") for name in node.produces]
+            node = copy.copy(node)
+            node.mirror = (SYMMETRIC_STAGES[node.stage], tuple(zip(node.produces, sources)))
+            node.reads = node.reads + sources
+            node.parts = [name.replace("Right", "Left") for name in node.parts]
+            node.layout = ["mirror_axis", SYMMETRIC_STAGES[node.stage]]
+        changed.append(node)
+    return changed
+
+
+def mirrors(nodes, layout):
+    ''' Every layer ``nodes`` (default SCENE) draw as a flipped copy, with
+        the copy's offset in pixels of the tux_layout.Layout ``layout``:
+        {name: (source, (off_x, off_y))}.  Part outlines ("Right Eye") are
+        mirrored along with their layers.
+    '''
+    found = dict((name, (source, (0, 0))) for name, source in MIRRORED.items())
+    for node in SCENE if nodes is None else nodes:
+        if node.mirror is not None:
+            entry, sources = node.mirror
+            for name, source in sources:
+                found[name] = (source, layout(entry))
+    return found
+
+
+# Fingerprints the nodes of each drawn image had, by image ID
+RENDERED = {}
+
+
+class LayerCache(object):
+    ''' Layer states (gimp.layer_state) of drawn nodes by fingerprint.
+        The least recently used go once their pixels pass ``max_bytes``.
+        States share their pixels with the layers they were taken from.
+    '''
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = collections.OrderedDict()
+        self.nbytes = 0
+
+    def get(self, key):
+        states = self.entries.pop(key, None)
+        if states is not None:
+            self.entries[key] = states
+        return states
+
+    def put(self, key, states):
+        if key in self.entries:
+            self.nbytes -= _nbytes(self.entries.pop(key))
+        self.entries[key] = states
+        self.nbytes += _nbytes(states)
+        while self.nbytes > self.max_bytes and len(self.entries) > 1:
+            _, dropped = self.entries.popitem(last=False)
+            self.nbytes -= _nbytes(dropped)
+
+
+def _nbytes(states):
+    return sum(getattr(part, "nbytes", 0) for state in states for part in state)
+
+
+def stack_layer(image, layer):
+    ''' Insert ``layer`` where STACK puts it among the layers already there. '''
+    layers = tux_layers.registry(image)
+    rank = STACK.index(layer.name)
+    position = len(layers.order)
+    for index, other in enumerate(layers.order):
+        if other.name in STACK and STACK.index(other.name) > rank:
+            position = index
+            break
+    return layers.add(layer, position)
+
+
+# What pool workers draw with, set before the pool forks
+_WORKER = {}
+
+
+def _draw_apart(index, states):
+    ''' Draw node ``index`` in a scratch image holding the layers it reads,
+        rebuilt from their states, and return the states of its layers.
+    '''
+    gimp = _WORKER["gimp"]
+    node = _WORKER["nodes"][index]
+    image = _WORKER["new_image"]()
+    for state in states:
+        stack_layer(image, gimp.layer_from_state(image, state))
+    _WORKER["run_node"](image, node)
+    layers = tux_layers.registry(image)
+    produced = [gimp.layer_state(layers[name]) for name in node.produces]
+    tux_layers.release(image)
+    return produced
+
+
+def _draw_task(task):
+    return _draw_apart(*task)
+
+
+def _fork_pool(processes):
+    ''' A pool of forked workers, which inherit the loaded plug-in, or None
+        where processes cannot be forked.
+    '''
+    if os.name == "nt":
+        return None
+    try:
+        context = multiprocessing.get_context("fork")
+    except AttributeError:
+        # Python 2 always forks on POSIX
+        context = multiprocessing
+    return context.Pool(processes)
+
+
+def _reused(image, node, key, reuse, cache, gimp):
+    ''' Put the layers of ``node`` into ``image`` without drawing them:
+        from reuse(image, node, key) or the cache.  False when neither has them.
+    '''
+    if reuse is not None and reuse(image, node, key):
+        return True
+    states = cache.get(key) if cache is not None else None
+    if states is None:
+        return False
+    for state in states:
+        stack_layer(image, gimp.layer_from_state(image, state))
+    return True
+
+
+def execute(image, run_node, nodes=None, new_image=None, processes=1, gimp=None, reuse=None,
+            cache=None):
+    ''' Draw ``nodes`` (default SCENE) on ``image`` with run_node(image, node)
+        and return the nodes actually drawn.
+
+        With processes > 1, new_image() returning an empty scratch image
+        and a ``gimp`` that has layer_state / layer_from_state, each wave
+        of independent nodes is drawn on a pool of that many processes.
+
+        A node is not drawn when reuse(image, node, key) supplies its
+        layers, or ``cache`` (a LayerCache, needs layer_state) holds them
+        under its fingerprint ``key``; see node_keys.  Reused layers go
+        in at their STACK position, but stages drawn next to them place
+        their own, so the caller restacks the image afterwards.
+    '''
+    nodes = SCENE if nodes is None else nodes
+    groups = waves(nodes)
+    layers = tux_layers.registry(image)
+    keys = node_keys(nodes, layers.width, layers.crop, layers.window)
+    RENDERED[image.ID] = keys
+    if not hasattr(gimp, "layer_state"):
+        cache = None
+    widest = max(len(group) for group in groups)
+    pool = None
+    if processes > 1 and widest > 1 and new_image is not None and hasattr(gimp, "layer_state"):
+        _WORKER.update(gimp=gimp, nodes=nodes, new_image=new_image, run_node=run_node)
+        pool = _fork_pool(min(processes, widest))
+
+    drawn = []
+    if pool is None:
+        # In declaration order, which is also the stacking order the
+        # stages' own layer positions were written for
+        present = set()
+        for node in nodes:
+            missing = [name for name in node.reads if name not in present]
+            if missing:
+                raise ValueError("%s is declared before %s is drawn" % (node, missing[0]))
+            present.update(node.produces)
+            if _reused(image, node, keys[node.name], reuse, cache, gimp):
+                continue
+            run_node(image, node)
+            drawn.append(node)
+            if cache is not None:
+                cache.put(keys[node.name], [gimp.layer_state(layers[name])
+                                            for name in node.produces])
+        return drawn
+
+    try:
+        for group in groups:
+            group = [node for node in group
+                     if not _reused(image, node, keys[node.name], reuse, cache, gimp)]
+            tasks = [(nodes.index(node), [gimp.layer_state(layers[name]) for name in node.reads])
+                     for node in group]
+            if len(tasks) == 1:
+                results = [_draw_task(tasks[0])]
+            else:
+                results = pool.map(_draw_task, tasks)
+            for node, states in zip(group, results):
+                for state in states:
+                    stack_layer(image, gimp.layer_from_state(image, state))
+                if cache is not None:
+                    cache.put(keys[node.name], states)
+            drawn.extend(group)
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+        _WORKER.clear()
+    return drawn
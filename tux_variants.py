@@ -0,0 +1,145 @@
+# vim: expandtab:ts=4:sw=4
+''' tux_variants.py
+
+    Colour variants of Crystal Tux from one set of rasterized layers, for
+    stand-ins whose layers hold NumPy pixels (gimpfu_numpy.py).
+
+    Every operation the recipe paints with -- fills, blends, blurs, cuts,
+    flips and NORMAL compositing -- is linear in the colours, and none of
+    them lets a colour change any alpha.  The flattened colour of a variant
+    is therefore the colour of a render with the varied colours set to
+    black, plus one weight map per varied (node, role) times its colour.
+
+    Variants.scenes() lists the renders that takes: the base render and,
+    for the nodes whose colours vary, rounds drawing up to three of their
+    roles at once in pure red, green and blue (every other colour black).
+    Only those nodes are drawn again in a round; with draw_tux_image(...,
+    previous=base) the rest is copied, see tux_scene.node_keys.  After
+    add() has seen every render, pixels() composites any number of
+    palettes in one vectorized pass per batch.
+'''
+
+import numpy as np
+
+import tux_scene
+
+BLACK = (0, 0, 0)
+PRIMARIES = [(255, 0, 0), (0, 255, 0), (0, 0, 255)]
+
+
+def _overlap(layer, width, height):
+    ''' Slices of the layer and of the canvas where the two overlap. '''
+    off_x, off_y = layer.offsets
+    x_1, y_1 = max(off_x, 0), max(off_y, 0)
+    x_2, y_2 = min(off_x + layer.width, width), min(off_y + layer.height, height)
+    if x_2 <= x_1 or y_2 <= y_1:
+        return None, None
+    return ((slice(y_1 - off_y, y_2 - off_y), slice(x_1 - off_x, x_2 - off_x)),
+            (slice(y_1, y_2), slice(x_1, x_2)))
+
+
+class Variants(object):
+    ''' Variants of ``nodes`` (default tux_scene.SCENE), each a list of
+        nodes that only differs in colours, e.g. from tux_scene.apply_palette.
+    '''
+
+    def __init__(self, variants, nodes=None):
+        self.nodes = tux_scene.SCENE if nodes is None else nodes
+        self.variants = variants
+        # Every (node name, role) whose colour differs in some variant
+        self.roles = sorted(set(
+            (node.name, role)
+            for variant in variants
+            for base, node in zip(self.nodes, variant)
+            for role in node.colours
+            if tuple(node.colours[role]) != tuple(base.colours[role])
+        ))
+        self.base = None
+        self.maps = None
+        self.rounds = []
+
+    def scenes(self):
+        ''' The scenes to render, base first, for add(). '''
+        by_node = {}
+        for name, role in self.roles:
+            by_node.setdefault(name, []).append(role)
+        base = [self._coloured(node, by_node.get(node.name, []), {}) for node in self.nodes]
+        scenes = [base]
+        self.rounds = []
+        count = max([len(roles) for roles in by_node.values()] or [0])
+        for first in range(0, count, len(PRIMARIES)):
+            channels = {}
+            scene = []
+            for index, node in enumerate(self.nodes):
+                varied = by_node.get(node.name, [])[first:first + len(PRIMARIES)]
+                if not varied:
+                    scene.append(base[index])
+                    continue
+                assigned = dict((role, channel) for channel, role in enumerate(varied))
+                channels.update(((node.name, role), channel) for role, channel in assigned.items())
+                scene.append(self._coloured(node, node.colours, assigned))
+            scenes.append(scene)
+            self.rounds.append(channels)
+        return scenes
+
+    @staticmethod
+    def _coloured(node, black, primaries):
+        ''' A copy of ``node`` painting ``black`` roles black and the roles
+            of ``primaries`` in their channel's primary colour.
+        '''
+        colours = dict((role, BLACK) for role in black)
+        colours.update((role, PRIMARIES[channel]) for role, channel in primaries.items())
+        if not colours:
+            return node
+        return tux_scene.recolour([node], node.name, **colours)[0]
+
+    def add(self, images):
+        ''' Take the weights from the rendered ``images`` of scenes(). '''
+        base = images[0]
+        width, height = base.width, base.height
+        produced = dict((name, node.name) for node in self.nodes for name in node.produces)
+        index = dict((role, number) for number, role in enumerate(self.roles))
+        self.maps = np.zeros((len(self.roles), height, width), np.float32)
+        rgb = np.zeros((height, width, 3), np.float32)
+        transmittance = np.ones((height, width), np.float32)
+        rounds = [dict((layer.name, layer) for layer in image.layers) for image in images[1:]]
+        for layer in base.layers:
+            source, target = _overlap(layer, width, height)
+            if source is None or not layer.visible:
+                continue
+            opacity = layer.opacity / 100.0
+            weight = transmittance[target] * opacity
+            rgb[target] += weight[..., None] * layer.pixels[source][..., :3]
+            transmittance[target] *= 1.0 - layer.pixels[source][..., 3] * opacity
+            node = produced.get(layer.name)
+            for channels, layers in zip(self.rounds, rounds):
+                for (name, role), channel in channels.items():
+                    if name == node:
+                        painted = layers[layer.name].pixels[source][..., channel]
+                        self.maps[index[(name, role)]][target] += weight * painted
+        self.base = np.concatenate([rgb, 1.0 - transmittance[..., None]], axis=-1)
+
+    def colours(self, variant):
+        ''' The varied colours of one variant, (roles, 3) in 0..1. '''
+        by_name = dict((node.name, node) for node in variant)
+        return np.array([by_name[name].colours[role][:3] for name, role in self.roles],
+                        np.float32).reshape(-1, 3) / 255.0
+
+    def pixels(self, batch=8):
+        ''' Premultiplied (height, width, 4) pixels of every variant, in order. '''
+        for first in range(0, len(self.variants), batch):
+            colours = np.array([self.colours(variant)
+                                for variant in self.variants[first:first + batch]])
+            rgb = np.einsum("nkc,khw->nhwc", colours, self.maps) + self.base[..., :3]
+            for pixels in rgb:
+                yield np.concatenate([pixels, self.base[..., 3:]], axis=-1)
+
+
+def to_image(gimp, pixels, name="Crystal Tux"):
+    ''' A one-layer image of the stand-in holding premultiplied ``pixels``. '''
+    height, width = pixels.shape[:2]
+    image = gimp.Image(width, height, 0)
+    layer = gimp.Layer(image, name, width, height)
+    layer.pixels = pixels.astype(np.float32)
+    image.add_layer(layer, 0)
+    return image